@@ -2,17 +2,87 @@
 Human Review Queue Module
 Handles flagging and storage of unsafe AI responses for human review.
 Persists to Supabase 'review_queue' table for audit and compliance.
+
+Write-behind: flagging only appends the entry to an in-memory buffer and
+returns, so a slow Supabase never holds up a chat request. A background
+flusher (started in the FastAPI lifespan) batch-inserts buffered entries
+with one PostgREST array insert per batch, retrying with exponential
+backoff. Batches that still fail are appended to a local spool file, which
+the flusher replays when it starts and after the next successful flush, so
+an outage doesn't lose compliance records. Entries carry a client-generated
+id and inserts ignore duplicates, so a batch replayed twice is stored once.
+Entries the database rejects outright (a 4xx that retrying won't fix) are
+moved to a dead-letter file, so one bad entry doesn't hold up the spool.
+
+Duplicates are aggregated: each entry carries a fingerprint of its
+normalized response text (case, whitespace, punctuation and numbers folded),
+violation types and query_type. A duplicate of an entry still in the buffer
+is merged into it (occurrence_count + 1, up to REVIEW_QUEUE_MAX_SAMPLES
+samples); batches are written through the ingest_review_queue() function,
+which merges the same way into a pending row seen within the dedup window,
+across workers. A regression that repeats one phrasing thousands of times
+yields one row to review, with a count.
+
+All requests go through the shared pooled client (app.core.supabase_client).
+
+Configuration (env):
+    REVIEW_QUEUE_BATCH_SIZE      - entries per insert (default 100)
+    REVIEW_QUEUE_FLUSH_INTERVAL  - seconds between flushes (default 1.0)
+    REVIEW_QUEUE_MAX_RETRIES     - attempts per batch before spooling (default 3)
+    REVIEW_QUEUE_MAX_PENDING     - in-memory entries before new ones go straight to the spool (default 10000)
+    REVIEW_QUEUE_SPOOL_PATH      - append-only spool file (default data/review_queue.spool.jsonl)
+    REVIEW_QUEUE_SPOOL_RETRY     - min seconds between spool replays while it keeps failing (default 30)
+    REVIEW_QUEUE_DEAD_LETTER_PATH - entries the database rejected (default data/review_queue.dead.jsonl)
+    REVIEW_QUEUE_DEDUP_WINDOW    - seconds a pending entry absorbs duplicates (default 3600, 0 = off)
+    REVIEW_QUEUE_MAX_SAMPLES     - samples kept per aggregated entry (default 20)
+    REVIEW_QUEUE_COUNTS_TTL      - seconds review_counts() is served from cache (default 30)
 """
 
-from typing import List, Dict, Any, Optional
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Dict, Any, Optional, Tuple
+import asyncio
+import base64
+import hashlib
 import json
 import os
+import re
+import threading
+import time
+import uuid
 import httpx
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
 from dotenv import load_dotenv
 
+from app.core.supabase_client import supabase_http
+
 load_dotenv()
 
+REVIEW_STATUSES = {"pending", "approved", "rejected", "escalated"}
+REVIEW_COLUMNS = {
+    "id", "status", "violations", "unsafe_response", "context", "query_type",
+    "patient_id", "session_id", "reviewed_by", "reviewed_at", "review_notes",
+    "metadata", "created_at", "ruleset_version", "fingerprint", "occurrence_count",
+    "samples", "last_seen_at",
+}
+# Ids per bulk PATCH, keeping the id=in.(...) URL well under proxy limits
+REVIEW_UPDATE_CHUNK = 200
+
+_NUMBER = re.compile(r"\d[\d,.]*")
+_PUNCTUATION = re.compile(r"[^\w\s#]")
+
+
+def fingerprint(response: str, violations: List[Dict[str, Any]], query_type: Optional[str]) -> str:
+    """
+    Identity of a flagged response for dedup: the same phrasing with other
+    amounts ("$2,400" / "$2,500") or spacing gets the same fingerprint.
+    """
+    text = _NUMBER.sub("#", response.lower())
+    text = " ".join(_PUNCTUATION.sub(" ", text).split())
+    types = ",".join(sorted({str(v.get("type")) for v in violations}))
+    return hashlib.sha256(f"{query_type}|{types}|{text}".encode("utf-8")).hexdigest()[:32]
+
 
 class ReviewQueue:
     """
@@ -21,6 +91,38 @@ class ReviewQueue:
     """
 
     def __init__(self):
+        self.batch_size = int(os.getenv("REVIEW_QUEUE_BATCH_SIZE", "100"))
+        self.flush_interval = float(os.getenv("REVIEW_QUEUE_FLUSH_INTERVAL", "1.0"))
+        self.max_retries = int(os.getenv("REVIEW_QUEUE_MAX_RETRIES", "3"))
+        self.max_pending = int(os.getenv("REVIEW_QUEUE_MAX_PENDING", "10000"))
+        self.spool_path = Path(os.getenv("REVIEW_QUEUE_SPOOL_PATH", "data/review_queue.spool.jsonl"))
+        self.spool_retry = float(os.getenv("REVIEW_QUEUE_SPOOL_RETRY", "30"))
+        self.dead_letter_path = Path(os.getenv("REVIEW_QUEUE_DEAD_LETTER_PATH", "data/review_queue.dead.jsonl"))
+        self.dedup_window = float(os.getenv("REVIEW_QUEUE_DEDUP_WINDOW", "3600"))
+        self.max_samples = int(os.getenv("REVIEW_QUEUE_MAX_SAMPLES", "20"))
+        self._next_replay = 0.0
+
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._spool_lock = threading.Lock()
+        # fingerprint -> its entry in _pending, for merging duplicates
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._open_lock = threading.Lock()
+        self.counts_ttl = float(os.getenv("REVIEW_QUEUE_COUNTS_TTL", "30"))
+        self._counts: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._counts_lock = threading.Lock()
+        self.counts_cache_hits = 0
+        self._flusher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.flushed = 0
+        self.spooled = 0
+        self.failed_batches = 0
+        self.merged_in_buffer = 0
+        self.merged_in_db = 0
+        self.dead_lettered = 0
+
+        self._http = supabase_http.scoped("review_queue")
+        self._http_sync = supabase_http.scoped("review_queue", sync=True)
         self.supabase_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
@@ -43,11 +145,14 @@ class ReviewQueue:
         violations: List[Dict[str, Any]],
         metadata: Dict[str, Any] = None,
         session_id: str = None,
-        patient_id: str = None
+        patient_id: str = None,
+        ruleset_version: str = None
     ) -> Dict[str, Any]:
         """
         Add an item to the review queue.
 
+        Only buffers the entry; the background flusher writes it to Supabase.
+
         Args:
             input_messages: List of conversation messages (LangChain message objects)
             unsafe_response: The AI response that was flagged
@@ -55,9 +160,11 @@ class ReviewQueue:
             metadata: Additional metadata (query_type, etc.)
             session_id: Optional session identifier
             patient_id: Optional patient UUID for linking
+            ruleset_version: Safety rule pack version that produced the verdict
 
         Returns:
-            Dict with the created entry or error info
+            The queued entry, or for a duplicate the buffered entry it was
+            merged into
         """
         # Extract message content safely
         context = []
@@ -68,15 +175,31 @@ class ReviewQueue:
                     "content": msg.content[:500]  # Truncate for storage
                 })
 
+        query_type = metadata.get("query_type") if metadata else None
+        now = datetime.now(timezone.utc).isoformat()
+        entry_id = str(uuid.uuid4())
         entry = {
+            "id": entry_id,
             "status": "pending",
             "violations": violations,
             "unsafe_response": unsafe_response[:2000],  # Truncate long responses
             "context": context,
-            "query_type": metadata.get("query_type") if metadata else None,
+            "query_type": query_type,
             "session_id": session_id,
             "patient_id": patient_id,
-            "metadata": metadata or {}
+            "ruleset_version": ruleset_version,
+            "metadata": metadata or {},
+            "fingerprint": fingerprint(unsafe_response[:2000], violations, query_type),
+            "occurrence_count": 1,
+            "samples": [{
+                "id": entry_id,
+                "created_at": now,
+                "session_id": session_id,
+                "patient_id": patient_id,
+                "excerpt": unsafe_response[:300]
+            }],
+            "created_at": now,
+            "last_seen_at": now
         }
 
         # Always log to console for debugging
@@ -86,39 +209,10 @@ class ReviewQueue:
             print(f"    - {v.get('type')}: {v.get('severity')} - {v.get('excerpt', '')[:50]}...")
         print(f"  Response preview: {unsafe_response[:100]}...")
 
-        # Persist to Supabase if enabled
         if self.enabled:
-            try:
-                result = self._persist_to_supabase(entry)
-                if result:
-                    print(f"  ✅ Saved to Supabase (ID: {result.get('id', 'unknown')})")
-                    return result
-            except Exception as e:
-                print(f"  ❌ Failed to save to Supabase: {str(e)}")
-
+            return self._enqueue(entry)
         return entry
 
-    def _persist_to_supabase(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """
-        Persist entry to Supabase review_queue table.
-
-        Uses synchronous httpx for simplicity in this context.
-        """
-        with httpx.Client() as client:
-            response = client.post(
-                f"{self.supabase_url}/rest/v1/review_queue",
-                headers=self.headers,
-                json=entry,
-                timeout=10.0
-            )
-
-            if response.status_code in [200, 201]:
-                data = response.json()
-                return data[0] if isinstance(data, list) and data else data
-            else:
-                print(f"  Supabase error: {response.status_code} - {response.text}")
-                return None
-
     async def flag_for_review_async(
         self,
         input_messages: List[Any],
@@ -126,96 +220,422 @@ class ReviewQueue:
         violations: List[Dict[str, Any]],
         metadata: Dict[str, Any] = None,
         session_id: str = None,
-        patient_id: str = None
+        patient_id: str = None,
+        ruleset_version: str = None
     ) -> Dict[str, Any]:
         """
         Async version of flag_for_review for use in async contexts.
         """
-        context = []
-        for msg in input_messages:
-            if hasattr(msg, 'content'):
-                context.append({
-                    "role": getattr(msg, 'type', 'unknown'),
-                    "content": msg.content[:500]
-                })
-
-        entry = {
-            "status": "pending",
-            "violations": violations,
-            "unsafe_response": unsafe_response[:2000],
-            "context": context,
-            "query_type": metadata.get("query_type") if metadata else None,
-            "session_id": session_id,
-            "patient_id": patient_id,
-            "metadata": metadata or {}
-        }
+        return self.flag_for_review(
+            input_messages, unsafe_response, violations, metadata,
+            session_id, patient_id, ruleset_version
+        )
+
+    # --- Write-behind ---
+
+    def _enqueue(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        # Without a running flusher (scripts, tests) or when the buffer is
+        # full, the spool is the durable place to put it (merged on ingest)
+        if self._flusher is None or len(self._pending) >= self.max_pending:
+            self._spool([entry])
+            return entry
+
+        with self._open_lock:
+            duplicate_of = self._open.get(entry["fingerprint"]) if self.dedup_window > 0 else None
+            if duplicate_of is not None and self._within_window(duplicate_of, entry):
+                self._merge(duplicate_of, entry)
+                self.merged_in_buffer += 1
+                return duplicate_of
+
+            self._open[entry["fingerprint"]] = entry
+            self._pending.append(entry)
+        if len(self._pending) >= self.batch_size:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        return entry
 
-        print(f"\n[REVIEW QUEUE] 🚩 Flagged Response (async):")
-        print(f"  Violations: {len(violations)}")
+    def _within_window(self, first: Dict[str, Any], entry: Dict[str, Any]) -> bool:
+        age = datetime.fromisoformat(entry["created_at"]) - datetime.fromisoformat(first["created_at"])
+        return age.total_seconds() <= self.dedup_window
+
+    def _merge(self, into: Dict[str, Any], duplicate: Dict[str, Any]) -> None:
+        into["occurrence_count"] += duplicate["occurrence_count"]
+        into["last_seen_at"] = duplicate["last_seen_at"]
+        room = self.max_samples - len(into["samples"])
+        if room > 0:
+            into["samples"].extend(duplicate["samples"][:room])
+
+    async def start(self) -> None:
+        """Start the background flusher (FastAPI lifespan); it replays the spool first"""
+        if not self.enabled or self._flusher is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher, writing out (or spooling) everything still buffered"""
+        if self._flusher is None:
+            return
+        flusher, self._flusher = self._flusher, None
+        flusher.cancel()
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            pass
+
+        while self._pending:
+            await self._flush_batch(retries=1)
+
+    async def _run(self) -> None:
+        # What earlier runs spooled, without holding up startup
+        try:
+            replayed = await self._replay_spool()
+            if replayed:
+                print(f"[REVIEW QUEUE] ✅ Replayed {replayed} spooled entries")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[REVIEW QUEUE] ❌ Spool replay failed: {str(e)}")
+
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
 
-        if self.enabled:
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        f"{self.supabase_url}/rest/v1/review_queue",
-                        headers=self.headers,
-                        json=entry,
-                        timeout=10.0
-                    )
-
-                    if response.status_code in [200, 201]:
-                        data = response.json()
-                        result = data[0] if isinstance(data, list) and data else data
-                        print(f"  ✅ Saved to Supabase (ID: {result.get('id', 'unknown')})")
-                        return result
-                    else:
-                        print(f"  ❌ Supabase error: {response.status_code}")
+                while self._pending:
+                    if not await self._flush_batch(self.max_retries):
+                        break
+                else:
+                    # Supabase is reachable again: drain what was spooled
+                    spooled = self.spool_path.exists() or self._replay_path.exists()
+                    if spooled and self._loop.time() >= self._next_replay:
+                        await self._replay_spool()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"  ❌ Failed to save: {str(e)}")
+                print(f"[REVIEW QUEUE] ❌ Flusher error: {str(e)}")
+
+    async def _flush_batch(self, retries: int) -> bool:
+        """Insert the next batch; spool it if every attempt fails"""
+        with self._open_lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            for entry in batch:
+                if self._open.get(entry.get("fingerprint")) is entry:
+                    del self._open[entry["fingerprint"]]
+        if not batch:
+            return True
+        try:
+            if await self._insert(batch, retries) == "ok":
+                self.flushed += len(batch)
+                return True
+        except asyncio.CancelledError:
+            self._spool(batch)
+            raise
+
+        self.failed_batches += 1
+        self._spool(batch)
+        return False
+
+    async def _insert(self, batch: List[Dict[str, Any]], retries: int) -> str:
+        """
+        One ingest_review_queue() call per batch (inserts, merging duplicates
+        into pending rows), with exponential backoff between attempts.
 
-        return entry
+        Returns "ok", "rejected" (the database refused the entries; retrying
+        won't help) or "failed".
+        """
+        payload = {
+            "p_entries": batch,
+            "p_window_seconds": int(self.dedup_window),
+            "p_max_samples": self.max_samples
+        }
+        for attempt in range(max(retries, 1)):
+            if attempt:
+                await asyncio.sleep(min(0.5 * 2 ** (attempt - 1), 10.0))
+            try:
+                response = await self._http.post(
+                    f"{self.supabase_url}/rest/v1/rpc/ingest_review_queue",
+                    headers=self.headers,
+                    json=payload
+                )
+                if response.status_code == 200:
+                    result = response.json()
+                    if result:
+                        self.merged_in_db += result[0].get("merged") or 0
+                    return "ok"
+                print(f"[REVIEW QUEUE] ❌ Supabase error: {response.status_code} - {response.text[:200]}")
+                if response.status_code == 404:
+                    print("[REVIEW QUEUE] ⚠️ ingest_review_queue() missing - apply "
+                          "supabase/migrations/20261018_review_queue_fingerprint.sql")
+                if response.status_code in (401, 403, 404):
+                    return "failed"  # Deployment problem, not the entries: keep them spooled for a fix
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    return "rejected"
+            except httpx.HTTPError as e:
+                print(f"[REVIEW QUEUE] ❌ Failed to save batch of {len(batch)}: {str(e)}")
+        return "failed"
+
+    def _spool(self, entries: List[Dict[str, Any]]) -> None:
+        """Append entries to the spool file and fsync"""
+        lines = "".join(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in entries)
+        with self._spool_lock:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        self.spooled += len(entries)
+        print(f"[REVIEW QUEUE] ⚠️ Spooled {len(entries)} entries to {self.spool_path}")
+
+    @property
+    def _replay_path(self) -> Path:
+        return self.spool_path.with_suffix(self.spool_path.suffix + ".replay")
+
+    def _dead_letter(self, lines: List[str], reason: str) -> None:
+        """Append spool lines the database won't take to the dead-letter file and fsync"""
+        with self._spool_lock:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        self.dead_lettered += len(lines)
+        print(f"[REVIEW QUEUE] ❌ Moved {len(lines)} entries to {self.dead_letter_path}: {reason}")
+
+    async def _replay_spool(self) -> int:
+        """
+        Insert spooled entries, reading the spool batch_size lines at a time.
+        The spool is moved aside first so new spooling can continue. When an
+        insert fails, that batch and the rest of the file are appended back
+        for a later replay. A crash mid-replay leaves the .replay file,
+        picked up next time.
+        """
+        replay_path = self._replay_path
+        with self._spool_lock:
+            if not replay_path.exists():
+                if not self.spool_path.exists():
+                    return 0
+                os.replace(self.spool_path, replay_path)
+
+        replayed = 0
+        with open(replay_path, encoding="utf-8") as f:
+            lines = (line for line in f if line.strip())
+            while True:
+                batch = list(islice(lines, self.batch_size))
+                if not batch:
+                    break
+                stored, unsent = await self._replay_batch(batch)
+                replayed += stored
+                if unsent:
+                    self._next_replay = self._loop.time() + self.spool_retry
+                    with self._spool_lock, open(self.spool_path, "a", encoding="utf-8") as out:
+                        out.writelines(unsent)
+                        out.writelines(lines)
+                        out.flush()
+                        os.fsync(out.fileno())
+                    break
+
+        os.remove(replay_path)
+        self.flushed += replayed
+        return replayed
+
+    async def _replay_batch(self, lines: List[str]) -> Tuple[int, List[str]]:
+        """
+        Insert one batch of spool lines; returns (entries stored, lines to
+        put back in the spool). A rejected batch is retried entry by entry,
+        so only the entries rejected on their own (and unreadable lines) go
+        to the dead-letter file.
+        """
+        entries = []
+        for line in lines:
+            try:
+                entries.append((line, json.loads(line)))
+            except ValueError:
+                self._dead_letter([line], "unreadable spool line")
+
+        result = await self._insert([entry for _, entry in entries], self.max_retries) if entries else "ok"
+        if result == "ok":
+            return len(entries), []
+        if result == "failed":
+            return 0, [line for line, _ in entries]
+
+        stored = 0
+        for index, (line, entry) in enumerate(entries):
+            result = await self._insert([entry], self.max_retries)
+            if result == "failed":
+                return stored, [line for line, _ in entries[index:]]
+            if result == "ok":
+                stored += 1
+            else:
+                self._dead_letter([line], f"rejected entry {entry.get('id')}")
+        return stored, []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushed": self.flushed,
+            "spooled": self.spooled,
+            "failed_batches": self.failed_batches,
+            "merged_in_buffer": self.merged_in_buffer,
+            "merged_in_db": self.merged_in_db,
+            "counts_cache_hits": self.counts_cache_hits,
+            "dead_lettered": self.dead_lettered,
+            "spool_bytes": self.spool_path.stat().st_size if self.spool_path.exists() else 0
+        }
 
-    def get_pending_reviews(self, limit: int = 50) -> List[Dict[str, Any]]:
+    # --- Review feed ---
+
+    def get_reviews(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[str] = "pending",
+        violation_type: Optional[str] = None,
+        severity: Optional[str] = None,
+        query_type: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
-        Fetch pending reviews from Supabase.
+        One page of the review feed, newest first.
+
+        Keyset-paginated on (created_at, id): pass the returned next_cursor
+        to get the following page; it stays stable while new entries arrive.
+
+        Args:
+            limit: Page size (1-200)
+            cursor: next_cursor of the previous page
+            status: Review status to list, None for all
+            violation_type: Only entries with a violation of this type
+            severity: Only entries with a violation of this severity (the same
+                violation as violation_type when both are given)
+            query_type: Only entries of this query type
+            columns: Columns to return (default: all); id and created_at are
+                always included
+
+        Returns:
+            {"items": [...], "next_cursor": str | None}
+
+        Raises:
+            ValueError: unknown status/column, bad limit or cursor
         """
+        if not 1 <= limit <= 200:
+            raise ValueError("limit must be between 1 and 200")
         if not self.enabled:
-            return []
+            return {"items": [], "next_cursor": None}
 
-        with httpx.Client() as client:
-            response = client.get(
-                f"{self.supabase_url}/rest/v1/review_queue",
-                headers=self.headers,
-                params={
-                    "status": "eq.pending",
-                    "order": "created_at.desc",
-                    "limit": str(limit)
-                },
-                timeout=10.0
-            )
+        params = {
+            "select": self._projection(columns),
+            "order": "created_at.desc,id.desc",
+            "limit": str(limit + 1)
+        }
+        if status:
+            params["status"] = f"eq.{self._check_status(status)}"
+        if query_type:
+            params["query_type"] = f"eq.{query_type}"
+        violation = {}
+        if violation_type:
+            violation["type"] = violation_type
+        if severity:
+            violation["severity"] = severity
+        if violation:
+            # jsonb containment, served by the GIN index on violations
+            params["violations"] = f"cs.{json.dumps([violation])}"
+        if cursor:
+            created_at, last_id = self._decode_cursor(cursor)
+            params["or"] = f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id}))'
+
+        response = self._http_sync.get(
+            f"{self.supabase_url}/rest/v1/review_queue",
+            headers=self.headers,
+            params=params
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to get reviews: {response.text}")
+
+        rows = response.json()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1])
+        return {"items": rows, "next_cursor": next_cursor}
 
-            if response.status_code == 200:
-                return response.json()
+    def get_pending_reviews(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Fetch the newest pending reviews from Supabase (first page of get_reviews).
+        """
+        try:
+            return self.get_reviews(limit=min(max(limit, 1), 200))["items"]
+        except Exception as e:
+            print(f"[REVIEW QUEUE] ❌ {str(e)}")
             return []
 
-    def update_review_status(
+    def review_counts(self) -> Dict[str, Any]:
+        """
+        Entries and occurrences per status, and entries per violation type
+        within each status. Served from a cache for REVIEW_QUEUE_COUNTS_TTL
+        seconds, since dashboards poll it.
+        """
+        if not self.enabled:
+            return {"statuses": {}, "cached_at": None}
+
+        with self._counts_lock:
+            cached = self._counts
+            if cached is not None and time.monotonic() < cached[0]:
+                self.counts_cache_hits += 1
+                return cached[1]
+
+        response = self._http_sync.post(
+            f"{self.supabase_url}/rest/v1/rpc/review_queue_counts",
+            headers=self.headers,
+            json={}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to get review counts: {response.text}")
+
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for row in response.json():
+            bucket = statuses.setdefault(row["status"], {"entries": 0, "occurrences": 0, "types": {}})
+            if row["violation_type"] is None:
+                bucket["entries"] = row["entries"]
+                bucket["occurrences"] = row["occurrences"]
+            else:
+                bucket["types"][row["violation_type"]] = row["entries"]
+
+        counts = {"statuses": statuses, "cached_at": datetime.now(timezone.utc).isoformat()}
+        with self._counts_lock:
+            self._counts = (time.monotonic() + self.counts_ttl, counts)
+        return counts
+
+    def update_review_statuses(
         self,
-        review_id: str,
+        review_ids: List[str],
         status: str,
         reviewed_by: str = None,
         review_notes: str = None
-    ) -> bool:
+    ) -> int:
         """
-        Update the status of a review item.
+        Set the status of many review items with one PATCH per
+        REVIEW_UPDATE_CHUNK ids (id=in.(...)).
 
         Args:
-            review_id: UUID of the review item
-            status: New status ('approved', 'rejected', 'escalated')
+            review_ids: UUIDs of the review items
+            status: New status ('pending', 'approved', 'rejected', 'escalated')
             reviewed_by: UUID of the reviewer
             review_notes: Optional notes from reviewer
+
+        Returns:
+            Number of rows updated
+
+        Raises:
+            ValueError: unknown status or a malformed id
         """
-        if not self.enabled:
-            return False
+        self._check_status(status)
+        ids = list(dict.fromkeys(str(uuid.UUID(str(review_id))) for review_id in review_ids))
+        if not self.enabled or not ids:
+            return 0
 
         update_data = {
             "status": status,
@@ -227,16 +647,70 @@ class ReviewQueue:
         if review_notes:
             update_data["review_notes"] = review_notes
 
-        with httpx.Client() as client:
-            response = client.patch(
+        updated = 0
+        for offset in range(0, len(ids), REVIEW_UPDATE_CHUNK):
+            chunk = ids[offset:offset + REVIEW_UPDATE_CHUNK]
+            response = self._http_sync.patch(
                 f"{self.supabase_url}/rest/v1/review_queue",
                 headers=self.headers,
-                params={"id": f"eq.{review_id}"},
-                json=update_data,
-                timeout=10.0
+                params={"id": f"in.({','.join(chunk)})", "select": "id"},
+                json=update_data
             )
+            if response.status_code != 200:
+                print(f"[REVIEW QUEUE] ❌ Status update failed: {response.status_code} - {response.text[:200]}")
+                break
+            updated += len(response.json())
+
+        with self._counts_lock:
+            self._counts = None
+        return updated
 
-            return response.status_code == 200
+    def update_review_status(
+        self,
+        review_id: str,
+        status: str,
+        reviewed_by: str = None,
+        review_notes: str = None
+    ) -> bool:
+        """
+        Update the status of a review item.
+
+        Args:
+            review_id: UUID of the review item
+            status: New status ('approved', 'rejected', 'escalated')
+            reviewed_by: UUID of the reviewer
+            review_notes: Optional notes from reviewer
+        """
+        return self.update_review_statuses([review_id], status, reviewed_by, review_notes) == 1
+
+    @staticmethod
+    def _check_status(status: str) -> str:
+        if status not in REVIEW_STATUSES:
+            raise ValueError(f"status must be one of {sorted(REVIEW_STATUSES)}")
+        return status
+
+    @staticmethod
+    def _projection(columns: Optional[List[str]]) -> str:
+        if not columns:
+            return "*"
+        unknown = set(columns) - REVIEW_COLUMNS
+        if unknown:
+            raise ValueError(f"unknown columns: {sorted(unknown)}")
+        # The cursor is built from created_at and id
+        return ",".join(dict.fromkeys(["id", "created_at", *columns]))
+
+    @staticmethod
+    def _encode_cursor(row: Dict[str, Any]) -> str:
+        raw = json.dumps([row["created_at"], row["id"]]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            created_at, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(last_id))
+        except (ValueError, TypeError) as e:
+            raise ValueError("invalid cursor") from e
 
 
 # Singleton instance
@@ -0,0 +1,163 @@
+"""
+FAQ Answer Cache
+In-process LRU/TTL cache for first-turn FAQ answers, so near-duplicate
+questions ("how much is rhinoplasty?", "How much is a rhinoplasty") don't
+each pay for a full LLM call.
+
+Lookups try two keys, both scoped by query_type and prompt version:
+    exact   - the question lowercased and whitespace-collapsed
+    lexical - punctuation and stopwords removed, remaining tokens in order
+              (word order is kept: "flights from seoul to busan" and
+              "flights from busan to seoul" are different questions)
+
+Only responses that passed MedicalSafetyLayer with action "send" are stored
+(see safety_check_node), so a cache hit never bypasses the safety rules.
+
+Configuration (env):
+    ANSWER_CACHE_MAX_ENTRIES - max cached answers per worker (default 1000)
+    ANSWER_CACHE_TTL_SECONDS - entry lifetime (default 3600)
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did",
+    "i", "me", "my", "we", "you", "your", "it", "its", "to", "of", "in", "on",
+    "for", "at", "by", "with", "and", "or", "can", "could", "would", "will",
+    "please", "tell", "about", "there", "this", "that", "any", "some",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s₩$]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Answers longer than this are not worth holding in memory
+MAX_ANSWER_CHARS = 8000
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase and collapse whitespace (exact-match key)"""
+    return _WHITESPACE.sub(" ", text.strip().lower())
+
+
+def lexical_key(text: str) -> str:
+    """Token key without case, punctuation or stopwords, in the original word order"""
+    tokens = _PUNCTUATION.sub(" ", text.lower()).split()
+    return " ".join(t for t in tokens if t not in STOPWORDS)
+
+
+def prompt_version(*parts: str) -> str:
+    """Short hash identifying a system prompt + model combination"""
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:12]
+
+
+class AnswerCache:
+    """
+    Bounded LRU cache with per-entry TTL.
+
+    Both the exact and lexical keys of a question point at the same entry;
+    when an entry expires or is evicted, its aliases are dropped with it.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+        # primary key -> (answer, expires_at, alias keys); ordered by recency
+        self._entries: "OrderedDict[str, Tuple[str, float, Tuple[str, ...]]]" = OrderedDict()
+        # alias key -> primary key
+        self._aliases: Dict[str, str] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def keys_for(query: str, query_type: str, version: str) -> Tuple[str, str]:
+        scope = f"{query_type}:{version}"
+        return f"{scope}:exact:{normalize_query(query)}", f"{scope}:lex:{lexical_key(query)}"
+
+    @staticmethod
+    def cacheable_query(messages: List[Any]) -> Optional[str]:
+        """
+        Return the question text if this turn can be served from cache.
+
+        Only first-turn questions are cacheable: later turns depend on the
+        conversation history, which is not part of the key.
+        """
+        if len(messages) != 1:
+            return None
+        message = messages[0]
+        if getattr(message, "type", None) != "human":
+            return None
+        content = message.content
+        return content if isinstance(content, str) and content.strip() else None
+
+    def get(self, query: str, query_type: str, version: str) -> Optional[str]:
+        for key in self.keys_for(query, query_type, version):
+            primary = self._aliases.get(key)
+            if primary is None:
+                continue
+
+            answer, expires_at, _ = self._entries[primary]
+            if expires_at < time.monotonic():
+                self._drop(primary)
+                continue
+
+            self._entries.move_to_end(primary)
+            self.hits += 1
+            return answer
+
+        self.misses += 1
+        return None
+
+    def put(self, query: str, query_type: str, version: str, answer: str) -> None:
+        if not answer or len(answer) > MAX_ANSWER_CHARS:
+            return
+
+        exact, lexical = self.keys_for(query, query_type, version)
+        if exact in self._entries:
+            self._drop(exact)
+
+        aliases = (exact, lexical) if lexical.split(":lex:", 1)[1] else (exact,)
+        self._entries[exact] = (answer, time.monotonic() + self.ttl_seconds, aliases)
+        for alias in aliases:
+            self._aliases[alias] = exact
+        self.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, primary: str) -> None:
+        _, _, aliases = self._entries.pop(primary)
+        for alias in aliases:
+            # A newer entry may have taken over a shared lexical alias
+            if self._aliases.get(alias) == primary:
+                del self._aliases[alias]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._aliases.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
+
+
+# Singleton instance
+answer_cache = AnswerCache()
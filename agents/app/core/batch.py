@@ -0,0 +1,132 @@
+"""
+Batch chat runner for offline evaluation and bulk replay.
+
+Runs many independent conversations through the agent graph with bounded
+concurrency and yields one NDJSON line per item as soon as it completes
+(completion order, not input order - use `index`/`id` to correlate), then a
+final summary line.
+
+`Runnable.abatch` only returns once every item is done, and in
+langchain-core 0.3 `abatch_as_completed` ignores `max_concurrency`, so this
+uses the same semaphore-bounded gather as `abatch` but yields per item.
+
+Items run on throwaway threads that are deleted from the checkpointer
+afterwards, so a 1,000-prompt eval doesn't leave 1,000 sessions behind.
+
+Configuration (env):
+    BATCH_MAX_ITEMS        - max conversations per request (default 1000)
+    BATCH_MAX_CONCURRENCY  - max conversations in flight (default 16)
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.llm_pool import request_deadline, LLMDeadlineExceeded
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+
+
+def format_ndjson(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=str) + "\n"
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run_batch(
+    agent_app,
+    items: List[Dict[str, Any]],
+    max_concurrency: int = None,
+    use_answer_cache: bool = True
+) -> AsyncIterator[str]:
+    """
+    Run each item's conversation through the graph and yield NDJSON lines.
+
+    Args:
+        agent_app: Compiled LangGraph application
+        items: [{"id": optional caller id, "inputs": {"messages": [...]}}]
+        max_concurrency: conversations in flight (capped at BATCH_MAX_CONCURRENCY)
+        use_answer_cache: False to force fresh LLM answers (safety regression)
+    """
+    limit = max(1, min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(limit)
+    delete_thread = getattr(agent_app.checkpointer, "adelete_thread", None)
+    batch_start = time.perf_counter()
+
+    async def run_item(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        thread_id = f"batch-{uuid.uuid4()}"
+        result: Dict[str, Any] = {"type": "result", "index": index, "id": item.get("id")}
+
+        async with semaphore:
+            # Deadline starts when the item leaves the queue, not at submit
+            config = {"configurable": {
+                "thread_id": thread_id,
+                "deadline": request_deadline(),
+                "use_answer_cache": use_answer_cache
+            }}
+            start = time.perf_counter()
+            try:
+                state = await agent_app.ainvoke(item["inputs"], config=config)
+                result.update({
+                    "route": state.get("query_type"),
+                    "safety_action": state.get("safety_action", "send"),
+                    "violations": [v["type"] for v in state.get("safety_violations", [])],
+                    "ruleset_version": state.get("safety_ruleset_version"),
+                    "response": state["messages"][-1].content,
+                    "error": None
+                })
+            except LLMDeadlineExceeded as e:
+                result["error"] = f"deadline_exceeded: {e}"
+            except Exception as e:
+                result["error"] = str(e)
+            result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        if delete_thread is not None:
+            try:
+                await delete_thread(thread_id)
+            except Exception as e:
+                print(f"⚠️ Could not delete batch thread {thread_id}: {e}")
+        return result
+
+    tasks = [asyncio.create_task(run_item(i, item)) for i, item in enumerate(items)]
+    latencies: List[float] = []
+    routes: Counter = Counter()
+    actions: Counter = Counter()
+    errors = 0
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result["error"]:
+                errors += 1
+            else:
+                latencies.append(result["latency_ms"])
+                routes[result["route"]] += 1
+                actions[result["safety_action"]] += 1
+            yield format_ndjson(result)
+
+        yield format_ndjson({
+            "type": "summary",
+            "items": len(items),
+            "errors": errors,
+            "max_concurrency": limit,
+            "routes": dict(routes),
+            "safety_actions": dict(actions),
+            "latency_ms_p50": _percentile(latencies, 0.50),
+            "latency_ms_p95": _percentile(latencies, 0.95),
+            "elapsed_ms": round((time.perf_counter() - batch_start) * 1000, 1)
+        })
+    finally:
+        # Client went away (or the generator was closed): stop remaining work
+        for task in tasks:
+            task.cancel()
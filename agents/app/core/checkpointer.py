@@ -0,0 +1,650 @@
+"""
+Bounded, Durable LangGraph Checkpointer
+Replaces MemorySaver, which keeps every checkpoint of every thread in process
+memory forever and loses all history on restart.
+
+Two tiers:
+    hot     - in-memory LRU of the latest checkpoint per thread, bounded by
+              thread count and serialized bytes, with idle-TTL eviction
+    durable - SQL store (SQLite file or the Supabase Postgres database) that
+              every write goes through to, so history survives restarts and
+              is shared across workers
+
+With a store, a hot entry is only served after one indexed lookup confirms
+it is still the thread's latest checkpoint in the store (same id, same
+number of pending writes). Another worker may have advanced the thread since
+this one cached it; resuming from the stale copy would drop those turns on
+the next write, so the entry is replaced from the store instead.
+
+Configuration (env):
+    CHECKPOINT_BACKEND            - sqlite | postgres | memory (default sqlite)
+    CHECKPOINT_SQLITE_PATH        - SQLite file (default data/checkpoints.sqlite)
+    DATABASE_URL                  - Postgres DSN when CHECKPOINT_BACKEND=postgres
+    CHECKPOINT_HOT_MAX_THREADS    - threads kept in memory (default 2000)
+    CHECKPOINT_HOT_MAX_BYTES      - memory ceiling for the hot tier (default 64 MB)
+    CHECKPOINT_IDLE_TTL_SECONDS   - evict threads idle this long (default 1800)
+    CHECKPOINT_KEEP_PER_THREAD    - checkpoints retained per thread on disk (default 10)
+
+The Postgres tables are created by supabase/migrations/20261018_agent_checkpoints.sql.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+Typed = Tuple[str, bytes]
+
+
+@dataclass
+class StoredCheckpoint:
+    """Serialized checkpoint as held by either tier"""
+    thread_id: str
+    checkpoint_ns: str
+    checkpoint_id: str
+    parent_checkpoint_id: Optional[str]
+    checkpoint: Typed
+    metadata: Typed
+    # (task_id, idx) -> (task_id, channel, value)
+    writes: Dict[Tuple[str, int], Tuple[str, str, Typed]] = field(default_factory=dict)
+
+    def size(self) -> int:
+        return (
+            len(self.checkpoint[1])
+            + len(self.metadata[1])
+            + sum(len(w[2][1]) for w in self.writes.values())
+        )
+
+
+# ============================================================================
+# Durable tier
+# ============================================================================
+
+class SQLCheckpointStore:
+    """
+    Checkpoint persistence over a DB-API connection.
+
+    The SQL is portable between SQLite and Postgres; only the placeholder
+    style and the connection differ.
+    """
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS agent_checkpoints (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            parent_checkpoint_id TEXT,
+            checkpoint_type TEXT NOT NULL,
+            checkpoint BLOB NOT NULL,
+            metadata_type TEXT NOT NULL,
+            metadata BLOB NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS agent_checkpoint_writes (
+            thread_id TEXT NOT NULL,
+            checkpoint_ns TEXT NOT NULL DEFAULT '',
+            checkpoint_id TEXT NOT NULL,
+            task_id TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            value_type TEXT NOT NULL,
+            value BLOB NOT NULL,
+            PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+        )
+        """,
+    ]
+
+    def __init__(self, connection, placeholder: str = "?", keep_per_thread: int = None):
+        self.conn = connection
+        self.ph = placeholder
+        self.keep_per_thread = keep_per_thread or int(os.getenv("CHECKPOINT_KEEP_PER_THREAD", "10"))
+        self._lock = threading.Lock()
+
+    @classmethod
+    def sqlite(cls, path: str = None) -> "SQLCheckpointStore":
+        path = path or os.getenv("CHECKPOINT_SQLITE_PATH", "data/checkpoints.sqlite")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        store = cls(conn, "?")
+        for statement in cls.SCHEMA:
+            conn.execute(statement)
+        return store
+
+    @classmethod
+    def postgres(cls, dsn: str = None) -> "SQLCheckpointStore":
+        import psycopg2
+
+        dsn = dsn or os.getenv("DATABASE_URL")
+        if not dsn:
+            raise ValueError("DATABASE_URL is required for the postgres checkpoint backend")
+
+        conn = psycopg2.connect(dsn)
+        conn.autocommit = True
+        return cls(conn, "%s")
+
+    def _sql(self, statement: str) -> str:
+        return statement.replace("?", self.ph)
+
+    def _execute(self, statement: str, params: Sequence[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(self._sql(statement), params)
+                return cursor.fetchall() if cursor.description else []
+            finally:
+                cursor.close()
+
+    def put(self, stored: StoredCheckpoint) -> None:
+        self._execute(
+            """
+            INSERT INTO agent_checkpoints (
+                thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                checkpoint_type, checkpoint, metadata_type, metadata
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO UPDATE SET
+                checkpoint_type = excluded.checkpoint_type,
+                checkpoint = excluded.checkpoint,
+                metadata_type = excluded.metadata_type,
+                metadata = excluded.metadata
+            """,
+            (
+                stored.thread_id, stored.checkpoint_ns, stored.checkpoint_id,
+                stored.parent_checkpoint_id, stored.checkpoint[0], stored.checkpoint[1],
+                stored.metadata[0], stored.metadata[1]
+            )
+        )
+        self._prune(stored.thread_id, stored.checkpoint_ns)
+
+    def put_writes(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        writes: List[Tuple[str, int, str, Typed]],
+        overwrite: bool
+    ) -> None:
+        conflict = (
+            "DO UPDATE SET channel = excluded.channel, value_type = excluded.value_type, value = excluded.value"
+            if overwrite else "DO NOTHING"
+        )
+        for task_id, idx, channel, value in writes:
+            self._execute(
+                f"""
+                INSERT INTO agent_checkpoint_writes (
+                    thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, value_type, value
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx) {conflict}
+                """,
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, value[0], value[1])
+            )
+
+    def latest(self, thread_id: str, checkpoint_ns: str) -> Optional[Tuple[str, int]]:
+        """(checkpoint_id, pending write count) of the thread's newest checkpoint, from the primary key index"""
+        rows = self._execute(
+            """
+            SELECT c.checkpoint_id, (
+                SELECT COUNT(*) FROM agent_checkpoint_writes w
+                WHERE w.thread_id = c.thread_id AND w.checkpoint_ns = c.checkpoint_ns
+                  AND w.checkpoint_id = c.checkpoint_id
+            )
+            FROM agent_checkpoints c
+            WHERE c.thread_id = ? AND c.checkpoint_ns = ?
+            ORDER BY c.checkpoint_id DESC LIMIT 1
+            """,
+            (thread_id, checkpoint_ns)
+        )
+        return (rows[0][0], int(rows[0][1])) if rows else None
+
+    def get(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: Optional[str] = None
+    ) -> Optional[StoredCheckpoint]:
+        rows = self.list(thread_id, checkpoint_ns, checkpoint_id=checkpoint_id, limit=1)
+        return rows[0] if rows else None
+
+    def list(
+        self,
+        thread_id: Optional[str],
+        checkpoint_ns: Optional[str] = None,
+        checkpoint_id: Optional[str] = None,
+        before_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[StoredCheckpoint]:
+        clauses, params = [], []
+        for column, op, value in (
+            ("thread_id", "=", thread_id),
+            ("checkpoint_ns", "=", checkpoint_ns),
+            ("checkpoint_id", "=", checkpoint_id),
+            ("checkpoint_id", "<", before_id),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit_sql = f"LIMIT {int(limit)}" if limit is not None else ""
+        rows = self._execute(
+            f"""
+            SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                   checkpoint_type, checkpoint, metadata_type, metadata
+            FROM agent_checkpoints {where}
+            ORDER BY checkpoint_id DESC {limit_sql}
+            """,
+            params
+        )
+
+        result = []
+        for row in rows:
+            stored = StoredCheckpoint(
+                thread_id=row[0],
+                checkpoint_ns=row[1],
+                checkpoint_id=row[2],
+                parent_checkpoint_id=row[3],
+                checkpoint=(row[4], bytes(row[5])),
+                metadata=(row[6], bytes(row[7]))
+            )
+            for task_id, idx, channel, value_type, value in self._execute(
+                """
+                SELECT task_id, idx, channel, value_type, value
+                FROM agent_checkpoint_writes
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                ORDER BY task_id, idx
+                """,
+                (stored.thread_id, stored.checkpoint_ns, stored.checkpoint_id)
+            ):
+                stored.writes[(task_id, idx)] = (task_id, channel, (value_type, bytes(value)))
+            result.append(stored)
+        return result
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep only the newest checkpoints of a thread; older ones are never read"""
+        cutoff = self._execute(
+            """
+            SELECT checkpoint_id FROM agent_checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?
+            ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?
+            """,
+            (thread_id, checkpoint_ns, self.keep_per_thread)
+        )
+        if not cutoff:
+            return
+
+        for table in ("agent_checkpoint_writes", "agent_checkpoints"):
+            self._execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id <= ?",
+                (thread_id, checkpoint_ns, cutoff[0][0])
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        for table in ("agent_checkpoint_writes", "agent_checkpoints"):
+            self._execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+
+# ============================================================================
+# Hot tier
+# ============================================================================
+
+class HotCheckpointCache:
+    """Latest checkpoint per (thread_id, checkpoint_ns), LRU + idle TTL + byte budget"""
+
+    def __init__(self, max_threads: int = None, max_bytes: int = None, idle_ttl_seconds: float = None):
+        self.max_threads = max_threads or int(os.getenv("CHECKPOINT_HOT_MAX_THREADS", "2000"))
+        self.max_bytes = max_bytes or int(os.getenv("CHECKPOINT_HOT_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.idle_ttl_seconds = idle_ttl_seconds or float(os.getenv("CHECKPOINT_IDLE_TTL_SECONDS", "1800"))
+
+        # (thread_id, ns) -> (stored, last_access); ordered by recency
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[StoredCheckpoint, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+
+    def get(self, thread_id: str, checkpoint_ns: str) -> Optional[StoredCheckpoint]:
+        key = (thread_id, checkpoint_ns)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries[key] = (entry[0], time.monotonic())
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, stored: StoredCheckpoint) -> None:
+        key = (stored.thread_id, stored.checkpoint_ns)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[0].size()
+            self._entries[key] = (stored, time.monotonic())
+            self._bytes += stored.size()
+            self._expire()
+            self._enforce_bounds()
+
+    def resize(self, stored: StoredCheckpoint, old_size: int) -> None:
+        """Account for pending writes added to a cached checkpoint"""
+        with self._lock:
+            key = (stored.thread_id, stored.checkpoint_ns)
+            if key in self._entries and self._entries[key][0] is stored:
+                self._bytes += stored.size() - old_size
+                self._enforce_bounds()
+
+    def discard(self, stored: StoredCheckpoint) -> None:
+        """Drop an entry found to be older than the durable store's latest checkpoint"""
+        with self._lock:
+            key = (stored.thread_id, stored.checkpoint_ns)
+            if key in self._entries and self._entries[key][0] is stored:
+                self._bytes -= self._entries.pop(key)[0].size()
+                self.stale += 1
+
+    def drop_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == thread_id]:
+                self._bytes -= self._entries.pop(key)[0].size()
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        while self._entries:
+            key, (stored, last_access) = next(iter(self._entries.items()))
+            if last_access >= cutoff:
+                break
+            self._entries.popitem(last=False)
+            self._bytes -= stored.size()
+            self.evictions += 1
+
+    def _enforce_bounds(self) -> None:
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_threads or self._bytes > self.max_bytes
+        ):
+            _, (stored, _) = self._entries.popitem(last=False)
+            self._bytes -= stored.size()
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": len(self._entries),
+            "bytes": self._bytes,
+            "max_threads": self.max_threads,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale": self.stale
+        }
+
+
+# ============================================================================
+# Checkpoint saver
+# ============================================================================
+
+class TieredCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer with a bounded hot tier over an optional durable store.
+
+    Without a store it is a bounded in-memory saver: idle or evicted threads
+    start a fresh conversation. With a store, hot entries are checked against
+    the store's latest checkpoint before they are served (see module docstring).
+    """
+
+    def __init__(self, store: Optional[SQLCheckpointStore] = None, hot: Optional[HotCheckpointCache] = None):
+        super().__init__()
+        self.store = store
+        self.hot = hot or HotCheckpointCache()
+
+    # --- helpers ---
+
+    def _to_tuple(self, stored: StoredCheckpoint) -> CheckpointTuple:
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": stored.thread_id,
+                    "checkpoint_ns": stored.checkpoint_ns,
+                    "checkpoint_id": stored.checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed(stored.checkpoint),
+            metadata=self.serde.loads_typed(stored.metadata),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": stored.thread_id,
+                        "checkpoint_ns": stored.checkpoint_ns,
+                        "checkpoint_id": stored.parent_checkpoint_id,
+                    }
+                }
+                if stored.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for task_id, channel, value in stored.writes.values()
+            ],
+        )
+
+    def _hot_lookup(self, config: RunnableConfig) -> Optional[StoredCheckpoint]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = self.hot.get(thread_id, checkpoint_ns)
+        checkpoint_id = get_checkpoint_id(config)
+        if stored and (checkpoint_id is None or checkpoint_id == stored.checkpoint_id):
+            return stored
+        return None
+
+    def _is_current(self, stored: StoredCheckpoint) -> bool:
+        """Whether a hot entry is still the store's latest checkpoint of its thread"""
+        latest = self.store.latest(stored.thread_id, stored.checkpoint_ns)
+        if latest == (stored.checkpoint_id, len(stored.writes)):
+            return True
+        self.hot.discard(stored)
+        return False
+
+    # --- sync API ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        stored = self._hot_lookup(config)
+        if stored is not None and self.store is not None and not self._is_current(stored):
+            stored = None
+        if stored is None and self.store is not None:
+            checkpoint_id = get_checkpoint_id(config)
+            stored = self.store.get(
+                config["configurable"]["thread_id"],
+                config["configurable"].get("checkpoint_ns", ""),
+                checkpoint_id
+            )
+            # Re-warm the hot tier with the latest checkpoint of a cold thread
+            if stored is not None and checkpoint_id is None:
+                self.hot.put(stored)
+        return self._to_tuple(stored) if stored else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if self.store is not None:
+            candidates = self.store.list(
+                config["configurable"]["thread_id"] if config else None,
+                config["configurable"].get("checkpoint_ns") if config else None,
+                checkpoint_id=get_checkpoint_id(config) if config else None,
+                before_id=get_checkpoint_id(before) if before else None,
+                limit=None if filter else limit
+            )
+        else:
+            stored = self._hot_lookup(config) if config else None
+            candidates = [stored] if stored else []
+
+        for stored in candidates:
+            result = self._to_tuple(stored)
+            if filter and not all(result.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = StoredCheckpoint(
+            thread_id=thread_id,
+            checkpoint_ns=checkpoint_ns,
+            checkpoint_id=checkpoint["id"],
+            parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+            checkpoint=self.serde.dumps_typed(checkpoint),
+            metadata=self.serde.dumps_typed(metadata)
+        )
+
+        if self.store is not None:
+            self.store.put(stored)
+        self.hot.put(stored)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = [
+            (task_id, WRITES_IDX_MAP.get(channel, idx), channel, self.serde.dumps_typed(value))
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        overwrite = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+
+        if self.store is not None:
+            self.store.put_writes(thread_id, checkpoint_ns, checkpoint_id, rows, overwrite)
+
+        stored = self.hot.get(thread_id, checkpoint_ns)
+        if stored is not None and stored.checkpoint_id == checkpoint_id:
+            old_size = stored.size()
+            for task, idx, channel, value in rows:
+                if not overwrite and (task, idx) in stored.writes:
+                    continue
+                stored.writes[(task, idx)] = (task, channel, value)
+            self.hot.resize(stored, old_size)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.hot.drop_thread(thread_id)
+        if self.store is not None:
+            self.store.delete_thread(thread_id)
+
+    # --- async API (durable I/O runs off the event loop) ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        if self.store is None:
+            stored = self._hot_lookup(config)
+            return self._to_tuple(stored) if stored else None
+        # Even a hot hit is validated against the store
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        results = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for result in results:
+            yield result
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        if self.store is None:
+            return self.put(config, checkpoint, metadata, new_versions)
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        if self.store is None:
+            return self.put_writes(config, writes, task_id, task_path)
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__ if self.store else "memory",
+            "hot": self.hot.stats()
+        }
+
+
+def create_checkpointer(backend: str = None) -> TieredCheckpointSaver:
+    """Build the checkpointer selected by CHECKPOINT_BACKEND"""
+    backend = (backend or os.getenv("CHECKPOINT_BACKEND", "sqlite")).lower()
+
+    if backend == "memory":
+        return TieredCheckpointSaver()
+    if backend == "sqlite":
+        return TieredCheckpointSaver(SQLCheckpointStore.sqlite())
+    if backend == "postgres":
+        return TieredCheckpointSaver(SQLCheckpointStore.postgres())
+
+    raise ValueError(f"Unknown CHECKPOINT_BACKEND: {backend}")
@@ -0,0 +1,140 @@
+"""
+Conversation Context Window
+Keeps the prompt sent to the LLM bounded on long chat sessions.
+
+The most recent messages are sent verbatim within a message count and token
+budget; everything older is folded into a rolling summary that lives in the
+thread's checkpointed state (summary / summary_upto / summary_hash), so it
+is computed once per fold and not on every turn.
+
+Folding uses hysteresis: the verbatim window may grow until it exceeds the
+budget, then it is folded down to half the budget in one summarization call.
+Prompt size therefore oscillates within a fixed band instead of growing with
+the session.
+
+If a fold fails (LLM error or deadline), the hard cap in context_window()
+still bounds the prompt, which leaves the messages between summary_upto and
+the window out of this turn. That is logged and counted
+(kmedtour_context_truncations_total); summary_upto does not move, so the
+next turn folds the skipped range into the summary.
+
+Configuration (env):
+    CONTEXT_MAX_MESSAGES  - max verbatim messages sent to the LLM (default 12)
+    CONTEXT_TOKEN_BUDGET  - max estimated tokens of verbatim history (default 3000)
+"""
+
+import hashlib
+import os
+from typing import Any, List, Optional
+
+from langchain_core.messages import SystemMessage
+
+from app.core.metrics import CONTEXT_TRUNCATIONS
+
+CONTEXT_MAX_MESSAGES = int(os.getenv("CONTEXT_MAX_MESSAGES", "12"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between an international patient and the KmedTour medical tourism assistant.
+
+Update the existing summary with the new messages. Keep: procedures and hospitals discussed, costs or dates mentioned, travel/visa details, the patient's stated preferences and open questions. Drop greetings and repetition. Do not add medical advice or facts that were not in the conversation.
+
+Reply with the updated summary only, at most 150 words."""
+
+
+def estimate_tokens(message: Any) -> int:
+    """Cheap token estimate (~4 characters per token) without a tokenizer"""
+    content = getattr(message, "content", message)
+    if not isinstance(content, str):
+        content = str(content)
+    return len(content) // 4 + 4
+
+
+def window_start(messages: List[Any], max_messages: int, token_budget: int) -> int:
+    """
+    Index of the first message that fits in the window, walking back from
+    the newest. The last message is always included.
+    """
+    start = len(messages)
+    tokens = 0
+    while start > 0:
+        cost = estimate_tokens(messages[start - 1])
+        if start < len(messages) and (
+            len(messages) - start + 1 > max_messages or tokens + cost > token_budget
+        ):
+            break
+        tokens += cost
+        start -= 1
+    return start
+
+
+def history_hash(messages: List[Any]) -> str:
+    """Fingerprint of the folded prefix, to detect a client-rewritten history"""
+    digest = hashlib.sha256()
+    for message in messages:
+        digest.update(getattr(message, "type", "").encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(str(getattr(message, "content", message)).encode("utf-8"))
+        digest.update(b"\x01")
+    return digest.hexdigest()[:16]
+
+
+def needs_fold(messages: List[Any], summary_upto: int) -> bool:
+    """True when the unsummarized tail no longer fits the budget"""
+    tail = messages[summary_upto:]
+    return (
+        len(tail) > CONTEXT_MAX_MESSAGES
+        or sum(estimate_tokens(m) for m in tail) > CONTEXT_TOKEN_BUDGET
+    )
+
+
+def fold_target(messages: List[Any]) -> int:
+    """Where the next fold should stop: leave half the budget verbatim"""
+    return window_start(messages, max(2, CONTEXT_MAX_MESSAGES // 2), CONTEXT_TOKEN_BUDGET // 2)
+
+
+def valid_summary_upto(state: dict) -> int:
+    """summary_upto if the folded prefix is unchanged, else 0 (summary is stale)"""
+    upto = state.get("summary_upto") or 0
+    messages = state["messages"]
+    if upto <= 0 or upto > len(messages):
+        return 0
+    if history_hash(messages[:upto]) != state.get("summary_hash"):
+        return 0
+    return upto
+
+
+def build_summary_prompt(previous_summary: Optional[str], messages: List[Any]) -> List[Any]:
+    lines = []
+    for message in messages:
+        role = "Patient" if getattr(message, "type", "") == "human" else "Assistant"
+        lines.append(f"{role}: {getattr(message, 'content', message)}")
+
+    return [
+        SystemMessage(content=SUMMARY_SYSTEM_PROMPT),
+        SystemMessage(content=(
+            f"Existing summary:\n{previous_summary or '(none)'}\n\n"
+            f"New messages:\n" + "\n".join(lines)
+        )),
+    ]
+
+
+def context_window(state: dict) -> List[Any]:
+    """
+    Messages to send to the LLM for this turn: the rolling summary (if any)
+    followed by the verbatim recent window.
+    """
+    messages = state["messages"]
+    upto = valid_summary_upto(state)
+
+    # Hard cap in case the last fold failed and the tail outgrew the budget
+    start = max(upto, window_start(messages, CONTEXT_MAX_MESSAGES, CONTEXT_TOKEN_BUDGET))
+    if start > upto:
+        # Neither summarized nor sent; context_manager_node folds them next turn
+        CONTEXT_TRUNCATIONS.inc()
+        print(f"[CONTEXT] ⚠️ Summary behind: left messages {upto}-{start - 1} out of this prompt")
+
+    window = list(messages[start:])
+    summary = state.get("summary") if upto else None
+    if summary:
+        window.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    return window
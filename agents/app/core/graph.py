@@ -8,12 +8,26 @@ from langgraph.graph import StateGraph, START, END
 # from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
-from typing import Literal, TypedDict, List, Any
+from langchain_core.runnables import RunnableConfig
+from typing import Literal, TypedDict, List, Any, Optional
 import os
 from dotenv import load_dotenv
 
 # Import Safety Layer
 from app.core.medical_safety import MedicalSafetyLayer, SafetyViolation
+from app.core.keyword_matcher import KeywordMatcher
+from app.core.llm_pool import llm_limiter, LLMDeadlineExceeded
+from app.core.single_flight import faq_single_flight
+from app.core.metrics import timed_node, record_safety_action, CHAT_TURNS
+from app.core.answer_cache import answer_cache, prompt_version
+from app.core.context_window import (
+    context_window,
+    needs_fold,
+    fold_target,
+    valid_summary_upto,
+    history_hash,
+    build_summary_prompt
+)
 
 # Load environment variables
 load_dotenv()
@@ -22,7 +36,9 @@ load_dotenv()
 llm = ChatOpenAI(
     model="gpt-4o-mini",
     api_key=os.getenv("OPENAI_API_KEY"),
-    temperature=0.7
+    temperature=0.7,
+    # Token usage on streamed (SSE) completions too, for the metrics counters
+    stream_usage=True
 )
 
 # Initialize Safety Layer
@@ -34,6 +50,12 @@ class AgentState(TypedDict):
     query_type: str
     requires_human_review: bool
     safety_violations: List[SafetyViolation]
+    safety_action: str
+    safety_ruleset_version: Optional[str]
+    cache_query: Optional[str]
+    summary: Optional[str]
+    summary_upto: int
+    summary_hash: Optional[str]
 
 # --- PROMPTS ---
 MEDICAL_DISCLAIMER = """⚠️ **MEDICAL DISCLAIMER**
@@ -87,59 +109,133 @@ You are a specialized medical information agent for KmedTour.
 Use simple language that non-medical people can understand.
 """
 
-# --- NODES ---
+# Cached FAQ answers are invalidated whenever the prompt or model changes
+FAQ_PROMPT_VERSION = prompt_version(FAQ_SYSTEM_PROMPT, llm.model_name)
 
-def route_query(state: AgentState) -> Literal["faq", "medical_info", "emergency", "human"]:
-    """Deterministic routing node"""
-    query = state["messages"][-1].content.lower()
+# --- NODES ---
 
+# Router keywords, compiled once into a shared matcher. Category order is
+# priority: emergency > human > medical_info, otherwise faq.
+ROUTE_KEYWORDS = {
     # Emergency check (also pre-check for safety layer)
-    emergency_keywords = [
+    "emergency": [
         "chest pain", "heart attack", "can't breathe", "difficulty breathing",
         "severe bleeding", "heavy bleeding", "suicide", "kill myself",
         "overdose", "unconscious", "stroke", "seizure", "emergency"
-    ]
-    if any(keyword in query for keyword in emergency_keywords):
-        return "emergency"
-
+    ],
     # Medical advice requests (out of scope)
-    medical_advice_phrases = [
+    "human": [
         "should i get", "should i have", "do i need",
         "diagnose", "what's wrong with", "am i sick",
         "what medication", "what treatment"
-    ]
-    if any(phrase in query for phrase in medical_advice_phrases):
-        return "human"
-
+    ],
     # Detailed medical/procedure questions
-    procedure_keywords = [
+    "medical_info": [
         "how does", "procedure work", "surgery", "surgical",
         "recovery", "healing", "what happens during",
         "technique", "method", "approach"
-    ]
-    if any(keyword in query for keyword in procedure_keywords):
-        return "medical_info"
+    ],
+}
 
-    return "faq"
+route_matcher = KeywordMatcher(
+    ((category, keyword) for category, keywords in ROUTE_KEYWORDS.items() for keyword in keywords),
+    lowercase=True,
+    literal=True
+)
 
-def faq_agent_node(state: AgentState):
+def route_query(state: AgentState) -> Literal["faq", "medical_info", "emergency", "human"]:
+    """Deterministic routing node"""
+    return route_matcher.first_category(state["messages"][-1].content) or "faq"
+
+async def router_node(state: AgentState):
+    first_turn = sum(1 for m in state["messages"] if isinstance(m, HumanMessage)) == 1
+    CHAT_TURNS.labels(first_turn=str(first_turn).lower()).inc()
+    return {"query_type": route_query(state)}
+
+async def context_manager_node(state: AgentState, config: RunnableConfig):
+    """
+    Keeps the LLM prompt within budget by folding old turns into the
+    thread's rolling summary (see app.core.context_window).
+    """
     messages = state["messages"]
+    upto = valid_summary_upto(state)
+    stale = upto != (state.get("summary_upto") or 0)
+    reset = {"summary": None, "summary_upto": 0, "summary_hash": None} if stale else None
+
+    if not needs_fold(messages, upto):
+        return reset
+
+    target = fold_target(messages)
+    if target <= upto:
+        return reset
+
+    previous = state.get("summary") if upto else None
+    try:
+        response = await llm_limiter.ainvoke(
+            llm.bind(max_tokens=300),
+            build_summary_prompt(previous, messages[upto:target]),
+            config
+        )
+    except Exception as e:
+        # context_window() still caps the prompt (and counts what it skips);
+        # summary_upto stays put, so next turn folds from it again
+        print(f"⚠️ Conversation summary failed: {str(e)}")
+        return reset
+
+    return {
+        "summary": response.content,
+        "summary_upto": target,
+        "summary_hash": history_hash(messages[:target])
+    }
+
+async def faq_agent_node(state: AgentState, config: RunnableConfig):
+    messages = state["messages"]
+
+    # Answer cache: first-turn questions already answered (and safety-approved).
+    # Batch evals can opt out to always exercise the LLM.
+    use_cache = (config.get("configurable") or {}).get("use_answer_cache", True)
+    query = answer_cache.cacheable_query(messages) if use_cache else None
+    if query:
+        cached = answer_cache.get(query, "faq", FAQ_PROMPT_VERSION)
+        if cached is not None:
+            return {
+                "messages": messages + [AIMessage(content=cached)],
+                "query_type": "faq",
+                "cache_query": None
+            }
+
     system_msg = SystemMessage(content=FAQ_SYSTEM_PROMPT)
-    response = llm.invoke([system_msg] + messages)
+    prompt = [system_msg] + context_window(state)
+
+    if query:
+        # Identical first-turn questions in flight share one LLM call
+        key = answer_cache.keys_for(query, "faq", FAQ_PROMPT_VERSION)[0]
+        try:
+            response, _ = await faq_single_flight.do(
+                key,
+                lambda: llm_limiter.ainvoke(llm, prompt, config),
+                timeout=llm_limiter.time_left(config)
+            )
+        except TimeoutError as e:
+            if isinstance(e, LLMDeadlineExceeded):
+                raise
+            raise LLMDeadlineExceeded("Deadline passed while waiting for a shared LLM call")
+    else:
+        response = await llm_limiter.ainvoke(llm, prompt, config)
     # We append the response to messages list? Or return updates?
     # LangGraph StateGraph usually expects updates.
     # But since we defined custom TypedDict, we must return the full update manually or just the changed field.
     # Current LangGraph versions merge updates for TypedDict if annotated, or replace.
     # Let's return the updated messages list safe way.
-    return {"messages": messages + [response], "query_type": "faq"}
+    return {"messages": messages + [response], "query_type": "faq", "cache_query": query}
 
-def medical_info_agent_node(state: AgentState):
+async def medical_info_agent_node(state: AgentState, config: RunnableConfig):
     messages = state["messages"]
     system_msg = SystemMessage(content=MEDICAL_INFO_SYSTEM_PROMPT)
-    response = llm.invoke([system_msg] + messages)
+    response = await llm_limiter.ainvoke(llm, [system_msg] + context_window(state), config)
     return {"messages": messages + [response], "query_type": "medical_info"}
 
-def emergency_escalation_node(state: AgentState):
+async def emergency_escalation_node(state: AgentState):
     emergency_message = """🚨 **THIS IS A MEDICAL EMERGENCY**
 
 Please call emergency services immediately:
@@ -153,7 +249,7 @@ Our AI assistant cannot help with medical emergencies. Please seek immediate med
     response = AIMessage(content=emergency_message)
     return {"messages": state["messages"] + [response], "query_type": "emergency"}
 
-def human_escalation_node(state: AgentState):
+async def human_escalation_node(state: AgentState):
     escalation_message = """I cannot provide medical advice, diagnoses, or treatment recommendations.
 
 **Next Steps**:
@@ -166,7 +262,7 @@ Would you like me to help you schedule a consultation?
     response = AIMessage(content=escalation_message)
     return {"messages": state["messages"] + [response], "query_type": "human"}
 
-def safety_check_node(state: AgentState):
+async def safety_check_node(state: AgentState):
     """
     CRITICAL SAFETY LAYER
     This node intercepts the agent's response and checks it against rules.
@@ -181,6 +277,7 @@ def safety_check_node(state: AgentState):
         last_message.content,
         query_type=state.get("query_type", "faq")
     )
+    record_safety_action(check_result["action"], check_result["violations"])
 
     if check_result["action"] == "block":
         # Block: Replace with safe fallback
@@ -194,32 +291,47 @@ def safety_check_node(state: AgentState):
         return {
             "messages": new_messages,
             "requires_human_review": True,
-            "safety_violations": check_result["violations"]
+            "safety_violations": check_result["violations"],
+            "safety_action": "block",
+            "safety_ruleset_version": check_result["ruleset_version"]
         }
     
     elif check_result["action"] == "human_review":
         # Flag: Keep response but mark for review
         return {
             "requires_human_review": True,
-            "safety_violations": check_result["violations"]
+            "safety_violations": check_result["violations"],
+            "safety_action": "human_review",
+            "safety_ruleset_version": check_result["ruleset_version"]
         }
     
-    return {"safety_violations": []}
+    # Only answers that passed every rule are eligible for the FAQ cache
+    if state.get("query_type") == "faq" and state.get("cache_query"):
+        answer_cache.put(state["cache_query"], "faq", FAQ_PROMPT_VERSION, last_message.content)
+
+    # Reset review flags so a flag from an earlier turn in this thread doesn't stick
+    return {
+        "requires_human_review": False,
+        "safety_violations": [],
+        "safety_action": "send",
+        "safety_ruleset_version": check_result["ruleset_version"]
+    }
 
 from app.admin.review_queue import review_queue
 
-def human_review_queue_node(state: AgentState):
+async def human_review_queue_node(state: AgentState):
     """
     Sends data to an admin review queue.
     """
     last_message = state["messages"][-1]
     content = last_message.content if hasattr(last_message, "content") else str(last_message)
     
-    review_queue.flag_for_review(
+    await review_queue.flag_for_review_async(
         input_messages=state["messages"][:-1],
         unsafe_response=content,
         violations=state.get("safety_violations", []),
-        metadata={"query_type": state.get("query_type")}
+        metadata={"query_type": state.get("query_type")},
+        ruleset_version=state.get("safety_ruleset_version")
     )
     return state
 
@@ -228,29 +340,39 @@ def human_review_queue_node(state: AgentState):
 workflow = StateGraph(AgentState)
 
 # Add Nodes
-workflow.add_node("router", lambda state: {"query_type": route_query(state)})
-workflow.add_node("faq_agent", faq_agent_node)
-workflow.add_node("medical_info_agent", medical_info_agent_node)
-workflow.add_node("emergency", emergency_escalation_node)
-workflow.add_node("human", human_escalation_node)
-workflow.add_node("safety_check", safety_check_node)
-workflow.add_node("human_review", human_review_queue_node)
+workflow.add_node("router", timed_node("router", router_node))
+workflow.add_node("context", timed_node("context", context_manager_node))
+workflow.add_node("faq_agent", timed_node("faq_agent", faq_agent_node))
+workflow.add_node("medical_info_agent", timed_node("medical_info_agent", medical_info_agent_node))
+workflow.add_node("emergency", timed_node("emergency", emergency_escalation_node))
+workflow.add_node("human", timed_node("human", human_escalation_node))
+workflow.add_node("safety_check", timed_node("safety_check", safety_check_node))
+workflow.add_node("human_review", timed_node("human_review", human_review_queue_node))
 
 # Add Edges
 workflow.add_edge(START, "router")
 
-# Router Logic
+# Router Logic (LLM-backed agents go through the context manager first)
 workflow.add_conditional_edges(
     "router",
     lambda state: state["query_type"],
     {
-        "faq": "faq_agent",
-        "medical_info": "medical_info_agent",
+        "faq": "context",
+        "medical_info": "context",
         "emergency": "emergency",
         "human": "human"
     }
 )
 
+workflow.add_conditional_edges(
+    "context",
+    lambda state: state["query_type"],
+    {
+        "faq": "faq_agent",
+        "medical_info": "medical_info_agent"
+    }
+)
+
 # Agents -> Safety Check (Linear Flow)
 workflow.add_edge("faq_agent", "safety_check")
 workflow.add_edge("medical_info_agent", "safety_check")
@@ -275,11 +397,13 @@ workflow.add_conditional_edges(
 
 workflow.add_edge("human_review", END)
 
-# Compile
-from langgraph.checkpoint.memory import MemorySaver
-app = workflow.compile(checkpointer=MemorySaver())
+# Compile (bounded hot tier + durable store, see CHECKPOINT_* env vars)
+from app.core.checkpointer import create_checkpointer
+checkpointer = create_checkpointer()
+app = workflow.compile(checkpointer=checkpointer)
 
 if __name__ == "__main__":
+    import asyncio
     import sys
     import traceback
     sys.stdout.reconfigure(encoding='utf-8')
@@ -290,7 +414,7 @@ if __name__ == "__main__":
         # Test valid query
         config = {"configurable": {"thread_id": "test-safe"}}
         print("\nTest 1 (Safe): What is rhinoplasty?")
-        res = app.invoke({"messages": [HumanMessage(content="What is rhinoplasty?")]}, config=config)
+        res = asyncio.run(app.ainvoke({"messages": [HumanMessage(content="What is rhinoplasty?")]}, config=config))
         print(f"Outcome: {res['messages'][-1].content[:50]}...")
     except Exception:
         traceback.print_exc()
@@ -0,0 +1,359 @@
+"""
+Shared Keyword Matcher
+One compiled matching engine for the chat router, MedicalSafetyLayer and the
+voice FastRouters, instead of each running its own keyword/regex loop.
+
+Rules are (category, pattern) pairs. At build time every pattern is reduced
+to a set of required literals (e.g. "(cure|treat|fix|heal) your" -> " your",
+"\\b(hours|open)\\b" -> {"hours", "open"}) and all literals go into a single
+Aho-Corasick automaton. A scan walks the text once through the automaton;
+pure-literal rules are reported straight from it, and a regex rule is only
+run when one of its required literals occurred. Rules without an extractable
+literal (e.g. "\\d+") are always run.
+
+pyahocorasick provides the automaton. When it isn't installed the literal
+pass falls back to one str.find sweep per literal, which gives the same
+results at roughly the cost of the old per-keyword loops.
+
+Regex rules compile on re by default; with engine="re2" every pattern RE2
+can run identically goes to the linear-time engine (see app.core.regex_engine).
+
+Note: a single alternation regex ("(?P<a>...)|(?P<b>...)") was measured and
+is several times slower than the old loops under CPython's re engine, which
+is why the literal automaton does the scanning.
+"""
+
+import re
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.regex_engine import compile_regex
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_constants
+    import sre_parse
+
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional accelerator
+    ahocorasick = None
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+class KeywordHit(NamedTuple):
+    category: Any
+    pattern: str
+    start: int
+    end: int
+
+
+def required_literals(pattern: str, flags: int = 0) -> Optional[FrozenSet[str]]:
+    """
+    A set of literals such that every match of `pattern` contains at least
+    one of them, or None if no such set can be derived.
+    """
+    return _required(sre_parse.parse(pattern, flags))
+
+
+def _required(items) -> Optional[FrozenSet[str]]:
+    candidates: List[FrozenSet[str]] = []
+    run: List[str] = []
+
+    def flush():
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            inner = _required(av[-1])
+            if inner:
+                candidates.append(inner)
+        elif op is sre_constants.BRANCH:
+            alternatives = [_required(branch) for branch in av[1]]
+            if all(alternatives):
+                candidates.append(frozenset().union(*alternatives))
+        elif op in _REPEATS and av[0] >= 1:
+            inner = _required(av[2])
+            if inner:
+                candidates.append(inner)
+
+    flush()
+    # Prefer the set whose shortest literal is longest (fewest false candidates)
+    return max(candidates, key=lambda s: (min(map(len, s)), -len(s)), default=None)
+
+
+def _is_plain_literal(pattern: str, flags: int) -> bool:
+    parsed = sre_parse.parse(pattern, flags)
+    return all(op is sre_constants.LITERAL for op, _ in parsed)
+
+
+def _max_width(pattern: str, flags: int) -> Optional[int]:
+    """Longest possible match, or None if unbounded"""
+    width = sre_parse.parse(pattern, flags).getwidth()[1]
+    return width if width < sre_constants.MAXREPEAT else None
+
+
+_CONTEXT_OPS = {
+    sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT,
+    sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS,
+}
+
+
+def _uses_context(items) -> bool:
+    """True if matching looks beyond the consumed characters (anchors, \\b, lookarounds)"""
+    for op, av in items:
+        if op in _CONTEXT_OPS:
+            return True
+        if op is sre_constants.SUBPATTERN and _uses_context(av[-1]):
+            return True
+        if op is sre_constants.BRANCH and any(_uses_context(branch) for branch in av[1]):
+            return True
+        if op in _REPEATS and _uses_context(av[2]):
+            return True
+    return False
+
+
+class _Rule(NamedTuple):
+    category: Any
+    pattern: str
+    priority: int
+    # None for pure-literal rules, reported directly from the automaton
+    regex: Optional[Any]
+    # "literal", "re" or "re2"
+    engine: str
+    max_width: Optional[int]
+    # Bounded width and no context ops: a match found in any slice of the
+    # text is a match in the whole text (see window_matches)
+    local: bool
+
+
+class KeywordMatcher:
+    """
+    Compiled multi-pattern matcher.
+
+    Args:
+        rules: (category, pattern) pairs. Category priority is the order in
+            which categories first appear.
+        flags: re flags for the patterns (re.IGNORECASE is supported).
+        lowercase: lowercase the text before matching, as the chat router and
+            safety layer always have. Hit offsets then refer to text.lower().
+        literal: treat patterns as plain substrings instead of regexes.
+        engine: "re" or "re2" for the regex rules; "re2" falls back to re
+            per pattern where RE2 could match differently.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Tuple[Any, str]],
+        flags: int = 0,
+        lowercase: bool = False,
+        literal: bool = False,
+        engine: str = "re"
+    ):
+        self.flags = flags
+        self.lowercase = lowercase
+        self.ignore_case = bool(flags & re.IGNORECASE)
+
+        self._rules: List[_Rule] = []
+        self._priority: Dict[Any, int] = {}
+        # literal -> indices of the rules it can trigger
+        self._anchors: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+
+        for category, pattern in rules:
+            priority = self._priority.setdefault(category, len(self._priority))
+            index = len(self._rules)
+
+            if literal:
+                anchors = frozenset([pattern.lower() if self.ignore_case else pattern])
+                source = re.escape(pattern)
+                plain = not self.ignore_case
+            else:
+                anchors = required_literals(pattern, flags)
+                if anchors and self.ignore_case:
+                    anchors = frozenset(a.lower() for a in anchors)
+                source = pattern
+                # Case-insensitive literals go through re so offsets stay exact
+                plain = not self.ignore_case and _is_plain_literal(pattern, flags)
+
+            regex, used = (None, "literal") if plain else compile_regex(source, flags, engine)
+            max_width = _max_width(source, flags)
+            local = max_width is not None and not _uses_context(sre_parse.parse(source, flags))
+            self._rules.append(_Rule(category, pattern, priority, regex, used, max_width, local))
+            if anchors:
+                for anchor in anchors:
+                    self._anchors.setdefault(anchor, []).append(index)
+            else:
+                self._always.append(index)
+
+        # Rules per engine, e.g. {"literal": 12, "re2": 9, "re": 1}
+        self.engines = dict(Counter(rule.engine for rule in self._rules))
+
+        # Widest match among local rules: overlap needed between windows
+        self.window = max((rule.max_width for rule in self._rules if rule.local), default=0)
+
+        self._automaton = None
+        if ahocorasick is not None and self._anchors:
+            self._automaton = ahocorasick.Automaton()
+            for anchor in self._anchors:
+                self._automaton.add_word(anchor, anchor)
+            self._automaton.make_automaton()
+
+    @property
+    def anchors(self) -> List[str]:
+        """Literals the automaton looks for (every regex rule needs one to run)"""
+        return list(self._anchors)
+
+    def _literal_hits(self, probe: str, first_only: bool) -> Dict[str, Any]:
+        """
+        Literal -> end offset (exclusive) of its first occurrence, or of every
+        occurrence when first_only is False, in one pass over the text.
+        """
+        found: Dict[str, Any] = {}
+        if self._automaton is not None:
+            if first_only:
+                for end, anchor in self._automaton.iter(probe):
+                    if anchor not in found:
+                        found[anchor] = end + 1
+            else:
+                for end, anchor in self._automaton.iter(probe):
+                    found.setdefault(anchor, []).append(end + 1)
+            return found
+
+        for anchor in self._anchors:
+            position = probe.find(anchor)
+            if position == -1:
+                continue
+            if first_only:
+                found[anchor] = position + len(anchor)
+                continue
+            ends = found[anchor] = []
+            while position != -1:
+                ends.append(position + len(anchor))
+                position = probe.find(anchor, position + 1)
+        return found
+
+    def _prepare(self, text: str) -> Tuple[str, str, bool]:
+        """
+        (text regex rules run against, text the literal pass runs against,
+        whether offsets in the two agree)
+
+        With IGNORECASE and lowercase=False the literal pass runs on
+        text.lower(), which is longer than the text when a character lowers
+        to several ("İ" -> "i̇"); literal offsets then can't be used as regex
+        start positions. lower() never shortens a string, so equal lengths
+        mean every offset lines up.
+        """
+        haystack = text.lower() if self.lowercase else text
+        probe = haystack.lower() if self.ignore_case and not self.lowercase else haystack
+        return haystack, probe, len(probe) == len(haystack)
+
+    def _verify_from(self, rule: _Rule, first_end: int, aligned: bool) -> int:
+        # A match contains an anchor, so it can't start before the first
+        # anchor's end minus the pattern's widest match
+        if not aligned or rule.max_width is None:
+            return 0
+        return max(0, first_end - rule.max_width)
+
+    def scan(self, text: str) -> List[KeywordHit]:
+        """Every rule hit in the text, ordered by start offset then priority"""
+        haystack, probe, aligned = self._prepare(text)
+
+        hits: List[Tuple[int, int, int]] = []
+        verify: Dict[int, int] = dict.fromkeys(self._always, 0)
+
+        for anchor, ends in self._literal_hits(probe, first_only=False).items():
+            for index in self._anchors[anchor]:
+                rule = self._rules[index]
+                if rule.regex is None:
+                    hits.extend((end - len(anchor), index, end) for end in ends)
+                else:
+                    start = self._verify_from(rule, ends[0], aligned)
+                    verify[index] = min(verify.get(index, start), start)
+
+        for index, start in verify.items():
+            for match in self._rules[index].regex.finditer(haystack, start):
+                hits.append((match.start(), index, match.end()))
+
+        hits.sort(key=lambda hit: (hit[0], self._rules[hit[1]].priority, hit[1]))
+        return [
+            KeywordHit(self._rules[index].category, self._rules[index].pattern, start, end)
+            for start, index, end in hits
+        ]
+
+    def _first_matches(self, text: str, local_only: bool = False) -> Dict[int, Tuple[int, int]]:
+        """
+        Rule index -> span of its leftmost match, for rules with at least one
+        hit. Cheaper than scan(): literals stop at their first occurrence and
+        each regex runs a single search.
+        """
+        haystack, probe, aligned = self._prepare(text)
+
+        matched: Dict[int, Tuple[int, int]] = {}
+        verify: Dict[int, int] = {
+            index: 0 for index in self._always if not local_only or self._rules[index].local
+        }
+
+        for anchor, first_end in self._literal_hits(probe, first_only=True).items():
+            for index in self._anchors[anchor]:
+                rule = self._rules[index]
+                if local_only and not rule.local:
+                    continue
+                if rule.regex is None:
+                    matched[index] = (first_end - len(anchor), first_end)
+                else:
+                    start = self._verify_from(rule, first_end, aligned)
+                    verify[index] = min(verify.get(index, start), start)
+
+        for index, start in verify.items():
+            match = self._rules[index].regex.search(haystack, start)
+            if match:
+                matched[index] = match.span()
+        return matched
+
+    def first_matches(self, text: str) -> Dict[Tuple[Any, str], KeywordHit]:
+        """(category, pattern) -> leftmost hit, for every rule that matches"""
+        hits = {}
+        for index, (start, end) in self._first_matches(text).items():
+            rule = self._rules[index]
+            hits[(rule.category, rule.pattern)] = KeywordHit(rule.category, rule.pattern, start, end)
+        return hits
+
+    def window_matches(self, text: str) -> Set[Tuple[Any, str]]:
+        """
+        (category, pattern) of local rules that match inside `text`, a slice
+        of a longer text. Non-local rules (unbounded width, anchors, \\b,
+        lookarounds) are skipped because a slice can't decide them.
+
+        To scan a stream, keep the last `window - 1` characters of what was
+        already scanned and prepend them to each new chunk; every local match
+        then falls entirely inside some window.
+        """
+        return {
+            (self._rules[index].category, self._rules[index].pattern)
+            for index in self._first_matches(text, local_only=True)
+        }
+
+    def categories(self, text: str) -> Set[Any]:
+        return {self._rules[index].category for index in self._first_matches(text)}
+
+    def matched_patterns(self, text: str) -> Set[Tuple[Any, str]]:
+        return {(self._rules[index].category, self._rules[index].pattern) for index in self._first_matches(text)}
+
+    def first_category(self, text: str) -> Optional[Any]:
+        """Highest-priority category present anywhere in the text"""
+        matched = self._first_matches(text)
+        if not matched:
+            return None
+        return self._rules[min(matched, key=lambda index: self._rules[index].priority)].category
@@ -0,0 +1,153 @@
+"""
+LLM Concurrency Pool
+Bounds the number of in-flight LLM calls across the whole process and
+enforces per-request deadlines, so a handful of slow completions cannot
+starve the event loop or the rest of the API.
+
+Configuration (env):
+    LLM_MAX_CONCURRENCY   - max simultaneous LLM calls per worker (default 8)
+    LLM_TIMEOUT_SECONDS   - upper bound for a single call incl. queueing (default 30)
+    CHAT_DEADLINE_SECONDS - end-to-end budget for one chat request (default 45)
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from fastapi import Request
+
+from app.core.metrics import model_label, record_llm_call
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when an LLM call cannot finish before the request deadline"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client goes away while the graph is running"""
+
+
+def request_deadline(seconds: float = None) -> float:
+    """Absolute monotonic deadline for a request, stored in the graph config"""
+    budget = seconds if seconds is not None else float(os.getenv("CHAT_DEADLINE_SECONDS", "45"))
+    return time.monotonic() + budget
+
+
+class LLMConcurrencyLimiter:
+    """
+    Global semaphore in front of every LLM call.
+
+    Usage:
+        response = await llm_limiter.ainvoke(llm, messages, config)
+
+    The deadline is read from config["configurable"]["deadline"] (see
+    request_deadline); waiting for a slot counts against it.
+    """
+
+    def __init__(self, max_concurrency: int = None, timeout_seconds: float = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.timeout_seconds = timeout_seconds or float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.last_success_at: Optional[float] = None
+        self.last_error_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def time_left(self, config: Optional[Dict[str, Any]]) -> float:
+        deadline = ((config or {}).get("configurable") or {}).get("deadline")
+        if deadline is None:
+            return self.timeout_seconds
+        return min(self.timeout_seconds, deadline - time.monotonic())
+
+    async def ainvoke(self, llm, messages: List[Any], config: Optional[Dict[str, Any]] = None):
+        """Invoke the LLM asynchronously inside the concurrency and deadline bounds"""
+        time_left = self.time_left(config)
+        if time_left <= 0:
+            raise LLMDeadlineExceeded("Request deadline passed before LLM call")
+
+        model = model_label(llm)
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(time_left):
+                self.waiting += 1
+                try:
+                    await self._semaphore.acquire()
+                finally:
+                    self.waiting -= 1
+
+                self.in_flight += 1
+                try:
+                    response = await llm.ainvoke(messages, config=config)
+                finally:
+                    self.in_flight -= 1
+                    self._semaphore.release()
+        except TimeoutError:
+            self._record_failure(model, start, "deadline exceeded")
+            raise LLMDeadlineExceeded(f"LLM call exceeded {time_left:.1f}s deadline")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._record_failure(model, start, str(e))
+            raise
+
+        record_llm_call(model, time.perf_counter() - start, response)
+        self.last_success_at = time.time()
+        return response
+
+    def _record_failure(self, model: str, start: float, error: str) -> None:
+        record_llm_call(model, time.perf_counter() - start, error=True)
+        self.last_error_at = time.time()
+        self.last_error = error[:200]
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Passive LLM health from real traffic (no probe calls, which would
+        cost tokens on every health check).
+        """
+        if self.last_error_at and (not self.last_success_at or self.last_error_at > self.last_success_at):
+            status = "failing"
+        elif self.last_success_at:
+            status = "ok"
+        else:
+            status = "unknown"
+
+        return {
+            "status": status,
+            "last_success_at": self.last_success_at,
+            "last_error_at": self.last_error_at,
+            "last_error": self.last_error
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting
+        }
+
+
+async def run_until_disconnect(request: Request, work: Awaitable, poll_interval: float = 0.25):
+    """
+    Await `work`, cancelling it if the HTTP client disconnects first.
+
+    Cancellation propagates into the graph, so a pending LLM call releases
+    its pool slot instead of finishing for nobody.
+    """
+    task = asyncio.ensure_future(work)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+# Singleton instance
+llm_limiter = LLMConcurrencyLimiter()
@@ -2,10 +2,21 @@
 Medical Safety Layer - Deterministic Rule-Based Checks
 This module provides strict, rule-based safety checks for AI responses.
 It is designed to be FDA-compliant (auditable, deterministic) and free of hallucinations.
+
+Configuration (env): SAFETY_RULES_PATH, SAFETY_RULES_RELOAD_INTERVAL,
+SAFETY_RULES_MAX_SCAN_MS (see app.core.safety_rules)
 """
 
+import os
 import re
-from typing import Dict, List, Literal, Any, TypedDict
+import threading
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Literal, Any, Optional, TypedDict
+
+from app.core.keyword_matcher import KeywordMatcher
+from app.core.safety_rules import DEFAULT_RULES_PATH, RulesetError, SafetyRuleset, load_ruleset
 
 class SafetyViolation(TypedDict):
     type: Literal["medical_advice", "unverified_pricing", "accreditation_claim", "emergency_keyword"]
@@ -17,51 +28,106 @@ class CheckResult(TypedDict):
     safe: bool
     violations: List[SafetyViolation]
     action: Literal["send", "block", "human_review"]
+    ruleset_version: str
 
 class MedicalSafetyLayer:
     """
     Deterministic safety checks for KmedTour AI agents.
     Uses regex patterns and strict logic to prevent unsafe medical advice.
+
+    The patterns come from a versioned rule pack (see app.core.safety_rules).
+    reload() compiles a new pack and swaps it in atomically; every verdict
+    carries the version of the ruleset that produced it. Regex rules run
+    on RE2 where it matches identically (SAFETY_REGEX_ENGINE, see
+    app.core.regex_engine), so worst-case latency is linear in the response.
     """
-    
-    # 1. Medical Advice Patterns (High Risk)
-    MEDICAL_ADVICE_PATTERNS = [
-        r"you should (take|use|try|buy)",
-        r"i (recommend|suggest|advise|prescribe)",
-        r"(cure|treat|fix|heal) your",
-        r"dosage",
-        r"take \d+ (mg|ml|pills)",
-        r"diagnosis",
-        r"you have",
-    ]
-
-    # 2. Pricing Claims (Medium Risk)
-    PRICING_PATTERNS = [
-        r"\$\d+",
-        r"₩\d+",
-        r"\d{1,3}(,\d{3})* (KRW|USD|EUR)",
-        r"cost is",
-        r"price is",
-    ]
-
-    # 3. Accreditation Claims (High Risk)
-    ACCREDITATION_PATTERNS = [
-        r"(JCI|KAHF|ISO).*(accredited|certified|approved)",
-        r"internationally (accredited|recognized)",
-        r"best (hospital|clinic|doctor)",
-        r"guaranteed (success|results)",
-    ]
-    
-    # 4. Emergency Keywords (Critical Risk)
-    EMERGENCY_PATTERNS = [
-        r"suicide",
-        r"kill myself",
-        r"chest pain",
-        r"severe bleeding",
-        r"heart attack",
-        r"stroke",
-        r"difficulty breathing"
-    ]
+
+    def __init__(self, rules_path: Optional[str] = None):
+        self.rules_path = rules_path or os.getenv("SAFETY_RULES_PATH") or str(DEFAULT_RULES_PATH)
+        self.reload_interval = float(os.getenv("SAFETY_RULES_RELOAD_INTERVAL", "30"))
+        self._reload_lock = threading.Lock()
+        self._rules_mtime = self._mtime()
+        self._next_poll = time.monotonic() + self.reload_interval
+        self._poller: Optional[threading.Thread] = None
+
+        # Fail fast at startup: there is no previous ruleset to fall back to
+        self.ruleset: SafetyRuleset = load_ruleset(Path(self.rules_path))
+
+    # Pattern lists of the active ruleset, by check
+    @property
+    def EMERGENCY_PATTERNS(self) -> List[str]:
+        return self.ruleset.patterns("emergency_keyword")
+
+    @property
+    def MEDICAL_ADVICE_PATTERNS(self) -> List[str]:
+        return self.ruleset.patterns("medical_advice")
+
+    @property
+    def PRICING_PATTERNS(self) -> List[str]:
+        return self.ruleset.patterns("unverified_pricing")
+
+    @property
+    def ACCREDITATION_PATTERNS(self) -> List[str]:
+        return self.ruleset.patterns("accreditation_claim")
+
+    @property
+    def ADVICE_NEGATION_PATTERN(self) -> str:
+        return self.ruleset.advice_negation
+
+    @property
+    def _matcher(self) -> KeywordMatcher:
+        return self.ruleset.matcher
+
+    def reload(self) -> SafetyRuleset:
+        """
+        Load the rule pack again and swap it in.
+
+        Raises RulesetError (and keeps the current ruleset) if the new pack
+        doesn't validate.
+        """
+        with self._reload_lock:
+            mtime = self._mtime()
+            ruleset = load_ruleset(Path(self.rules_path))
+            previous, self.ruleset = self.ruleset, ruleset
+            self._rules_mtime = mtime
+
+        if ruleset.version == previous.version and ruleset.digest != previous.digest:
+            print(f"[SAFETY RULES] ⚠️ {ruleset.source} changed but is still version {ruleset.version}")
+        print(f"[SAFETY RULES] Loaded {ruleset.version} ({ruleset.digest}), "
+              f"scan {ruleset.scan_ms:.2f}ms / 8 KB")
+        return ruleset
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.rules_path).st_mtime
+        except OSError:
+            return None
+
+    def _schedule_reload(self) -> None:
+        """
+        At most once per reload interval, check the rule pack file in a
+        background thread; compiling and benchmarking a pack stays off the
+        request path, which keeps using the current ruleset meanwhile.
+        """
+        if self.reload_interval <= 0 or time.monotonic() < self._next_poll:
+            return
+        self._next_poll = time.monotonic() + self.reload_interval
+        if self._poller is not None and self._poller.is_alive():
+            return
+
+        self._poller = threading.Thread(target=self._maybe_reload, name="safety-rules-reload", daemon=True)
+        self._poller.start()
+
+    def _maybe_reload(self) -> None:
+        """Pick up an edited rule pack file"""
+        if self._mtime() == self._rules_mtime or self._reload_lock.locked():
+            return
+        try:
+            self.reload()
+        except RulesetError as e:
+            # Don't retry the same broken file on every poll
+            self._rules_mtime = self._mtime()
+            print(f"[SAFETY RULES] ❌ Reload failed, keeping {self.ruleset.version}: {e}")
 
     def check_response(
         self, 
@@ -71,54 +137,39 @@ class MedicalSafetyLayer:
         """
         Main entry point for safety checks.
         """
+        self._schedule_reload()
+        return self._check(response, query_type, self.ruleset)
+
+    def _check(self, response: str, query_type: str, ruleset: SafetyRuleset) -> CheckResult:
         violations: List[SafetyViolation] = []
-        response_lower = response.lower()
+        version = ruleset.version
 
         if query_type == "emergency":
-             return {"safe": True, "violations": [], "action": "send"}
+             return {"safe": True, "violations": [], "action": "send", "ruleset_version": version}
 
-        # CHECK 1: Emergency Keywords in non-emergency response
-        for pattern in self.EMERGENCY_PATTERNS:
-            if re.search(pattern, response_lower):
-                violations.append({
-                    "type": "emergency_keyword",
-                    "severity": "HIGH",
-                    "excerpt": self._extract_violation(response, pattern),
-                    "action": "block"
-                })
+        # One scan of the response for every rule: leftmost match per pattern
+        hits = ruleset.matcher.first_matches(response)
+        if not hits:
+            return {"safe": True, "violations": [], "action": "send", "ruleset_version": version}
 
-        # CHECK 2: Direct Medical Advice
-        for pattern in self.MEDICAL_ADVICE_PATTERNS:
-            if re.search(pattern, response_lower):
-                # Exception: "I cannot recommend" is safe
-                if "cannot" in response_lower or "not" in response_lower:
-                    if re.search(r"(cannot|not) (recommend|suggest|advise)", response_lower):
-                        continue
-                
-                violations.append({
-                    "type": "medical_advice",
-                    "severity": "HIGH",
-                    "excerpt": self._extract_violation(response, pattern),
-                    "action": "block"
-                })
+        # Exception: "I cannot recommend" is safe
+        negated = ("advice_negation", ruleset.advice_negation) in hits
+        sentences = SentenceIndex(response)
 
-        # CHECK 3: Pricing and Accreditation
-        for pattern in self.PRICING_PATTERNS:
-            if re.search(pattern, response_lower):
+        # CHECK 1: Emergency keywords, CHECK 2: direct medical advice,
+        # CHECK 3: pricing and accreditation
+        for kind, patterns, severity, action in ruleset.checks:
+            if kind == "medical_advice" and negated:
+                continue
+            for pattern in patterns:
+                hit = hits.get((kind, pattern))
+                if hit is None:
+                    continue
                 violations.append({
-                    "type": "unverified_pricing",
-                    "severity": "MEDIUM",
-                    "excerpt": self._extract_violation(response, pattern),
-                    "action": "flag"
-                })
-
-        for pattern in self.ACCREDITATION_PATTERNS:
-            if re.search(pattern, response_lower):
-                violations.append({
-                    "type": "accreditation_claim",
-                    "severity": "MEDIUM",
-                    "excerpt": self._extract_violation(response, pattern),
-                    "action": "flag"
+                    "type": kind,
+                    "severity": severity,
+                    "excerpt": self._excerpt(ruleset, response, pattern, hit.start, sentences),
+                    "action": action
                 })
 
         # Determine Final Action
@@ -126,13 +177,32 @@ class MedicalSafetyLayer:
         
         if any(v["severity"] == "HIGH" for v in violations):
             action = "block"
-            return {"safe": False, "violations": violations, "action": action}
+            return {"safe": False, "violations": violations, "action": action, "ruleset_version": version}
 
         if any(v["severity"] == "MEDIUM" for v in violations):
             action = "human_review"
-            return {"safe": True, "violations": violations, "action": action}
+            return {"safe": True, "violations": violations, "action": action, "ruleset_version": version}
 
-        return {"safe": True, "violations": [], "action": "send"}
+        return {"safe": True, "violations": [], "action": "send", "ruleset_version": version}
+
+    def _excerpt(
+        self,
+        ruleset: SafetyRuleset,
+        text: str,
+        pattern: str,
+        offset: int,
+        sentences: "SentenceIndex"
+    ) -> str:
+        """
+        Sentence around the leftmost match, looked up by offset.
+
+        Same result as _extract_violation for ASCII text. Elsewhere (and for
+        patterns that can cross sentence boundaries) lower() and IGNORECASE
+        may disagree on offsets, so the sentence-by-sentence search is used.
+        """
+        if sentences.ascii and ruleset.sentence_local[pattern]:
+            return sentences.sentence_at(offset)
+        return self._extract_violation(text, pattern)
 
     def _extract_violation(self, text: str, pattern: str) -> str:
         sentences = text.split('.')
@@ -140,3 +210,108 @@ class MedicalSafetyLayer:
             if re.search(pattern, sentence, re.IGNORECASE):
                 return sentence.strip()
         return "Pattern match found"
+
+    def scanner(
+        self,
+        query_type: Literal["faq", "medical_info", "emergency", "human"]
+    ) -> "IncrementalSafetyScanner":
+        """Incremental scanner for streamed output (see IncrementalSafetyScanner)"""
+        return IncrementalSafetyScanner(self, query_type)
+
+
+ScanStatus = Literal["pending", "human_review", "block"]
+_RANK = {"pending": 0, "human_review": 1, "block": 2}
+
+
+class IncrementalSafetyScanner:
+    """
+    Safety checks over streamed text, chunk by chunk.
+
+    feed() returns the strongest verdict that is already certain for the
+    final text, so callers can stop generation as soon as it is "block":
+        pending      - nothing decided yet
+        human_review - final action is at least human_review
+        block        - final action is block; remaining tokens can be dropped
+
+    Only rules that a prefix can decide count early, with the verdict their
+    severity in the ruleset forces (HIGH: block, MEDIUM: human_review, LOW:
+    none), exactly as check_response ranks them. Medical-advice hits stay
+    provisional (`advice_pending`) because a later "cannot recommend" still
+    suppresses them, and rules with unbounded width are decided when the
+    stream ends. finish() runs check_response on the full text, so the
+    final result is always identical to the non-streaming check.
+
+    Across chunk boundaries the scanner keeps the last `window - 1`
+    characters, enough for any early-decidable pattern split between chunks.
+    The ruleset is pinned when the scanner is created, so a reload in the
+    middle of a stream doesn't change its verdict.
+    """
+
+    def __init__(self, layer: MedicalSafetyLayer, query_type: str):
+        self.layer = layer
+        self.query_type = query_type
+        self.ruleset = layer.ruleset
+        self.status: ScanStatus = "pending"
+        self.advice_pending = False
+        self._negated = False
+        self._chunks: List[str] = []
+        self._tail = ""
+        self._keep = max(self.ruleset.matcher.window - 1, 0)
+
+    def feed(self, chunk: str) -> ScanStatus:
+        if not chunk:
+            return self.status
+        self._chunks.append(chunk)
+
+        # Emergency answers are never checked, and block can't be undone
+        if self.query_type == "emergency" or self.status == "block":
+            return self.status
+
+        window = self._tail + chunk
+        self._tail = window[-self._keep:] if self._keep else ""
+
+        for kind, _ in self.ruleset.matcher.window_matches(window):
+            if kind == "advice_negation":
+                self._negated = True
+            elif kind == "medical_advice":
+                self.advice_pending = True
+            else:
+                verdict = self.ruleset.verdicts.get(kind)
+                if verdict is not None and _RANK[verdict] > _RANK[self.status]:
+                    self.status = verdict
+
+        if self._negated:
+            self.advice_pending = False
+        return self.status
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def finish(self) -> CheckResult:
+        """Final verdict on everything fed so far (same as check_response)"""
+        return self.layer._check(self.text, self.query_type, self.ruleset)
+
+
+class SentenceIndex:
+    """
+    Offsets of the '.' separators in a text, so the sentence containing a
+    given offset (as text.split('.') would cut it) is found by bisect.
+    Built lazily on first lookup.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.ascii = text.isascii()
+        self._dots: Optional[List[int]] = None
+
+    def sentence_at(self, offset: int) -> str:
+        if self._dots is None:
+            self._dots = [m.start() for m in _DOT.finditer(self.text)]
+        index = bisect_right(self._dots, offset)
+        start = self._dots[index - 1] + 1 if index else 0
+        end = self._dots[index] if index < len(self._dots) else len(self.text)
+        return self.text[start:end].strip()
+
+
+_DOT = re.compile(r"\.")
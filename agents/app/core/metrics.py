@@ -0,0 +1,216 @@
+"""
+Prometheus Metrics
+Process-wide metrics exposed on /metrics, so p99 latency can be broken down
+by graph node, LLM and Supabase instead of guessed at.
+
+    kmedtour_graph_node_duration_seconds{node}
+    kmedtour_llm_request_duration_seconds{model, outcome}
+    kmedtour_llm_tokens_total{model, type}              type = prompt | completion
+    kmedtour_chat_turns_total{first_turn}
+    kmedtour_safety_actions_total{action, violation_type}
+    kmedtour_supabase_request_duration_seconds{client, method, table, status}
+    kmedtour_journey_state_cache_total{result}          result = hit | miss
+    kmedtour_context_truncations_total                  prompts that skipped unsummarized messages
+
+Always import this module as `app.core.metrics` (also from agents/src), so
+every caller shares one set of collectors in the default registry.
+
+Configuration (env):
+    PROMETHEUS_MULTIPROC_DIR - set when running several uvicorn workers so
+                               /metrics aggregates all of them
+"""
+
+import functools
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# Graph nodes are mostly sub-millisecond except LLM calls (seconds)
+NODE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+HTTP_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+GRAPH_NODE_DURATION = Histogram(
+    "kmedtour_graph_node_duration_seconds",
+    "Time spent in each LangGraph node",
+    ["node"],
+    buckets=NODE_BUCKETS
+)
+
+LLM_REQUEST_DURATION = Histogram(
+    "kmedtour_llm_request_duration_seconds",
+    "LLM call latency including queueing for a pool slot",
+    ["model", "outcome"],
+    buckets=NODE_BUCKETS
+)
+
+LLM_TOKENS = Counter(
+    "kmedtour_llm_tokens",
+    "LLM tokens reported by the provider",
+    ["model", "type"]
+)
+
+CHAT_TURNS = Counter(
+    "kmedtour_chat_turns",
+    "User messages routed through the agent graph",
+    ["first_turn"]
+)
+
+SAFETY_ACTIONS = Counter(
+    "kmedtour_safety_actions",
+    "MedicalSafetyLayer verdicts, once per violation type present (or 'none')",
+    ["action", "violation_type"]
+)
+
+SUPABASE_REQUEST_DURATION = Histogram(
+    "kmedtour_supabase_request_duration_seconds",
+    "Supabase REST latency (until response headers)",
+    ["client", "method", "table", "status"],
+    buckets=HTTP_BUCKETS
+)
+
+JOURNEY_STATE_CACHE = Counter(
+    "kmedtour_journey_state_cache",
+    "PatientJourneyStateMachine.get_state lookups served from memory or Supabase",
+    ["result"]
+)
+
+JOURNEY_EVENTS = Counter(
+    "kmedtour_journey_events",
+    "journey_events rows written, failed (batch retried later) or dropped by JourneyEventSink",
+    ["outcome"]
+)
+
+CONTEXT_TRUNCATIONS = Counter(
+    "kmedtour_context_truncations",
+    "LLM prompts that left out older messages not yet folded into the summary (a fold failed)"
+)
+
+# Published gpt-4o-mini prices (USD per 1M tokens), for /api/stats estimates
+TOKEN_PRICES_PER_1M = {"prompt": 0.15, "completion": 0.60}
+
+
+def timed_node(name: str, fn: Callable) -> Callable:
+    """Wrap an async graph node so its duration lands in GRAPH_NODE_DURATION"""
+    histogram = GRAPH_NODE_DURATION.labels(node=name)
+
+    # LangGraph passes `config` only to nodes that declare it
+    if "config" in inspect.signature(fn).parameters:
+        @functools.wraps(fn)
+        async def node_with_config(state, config):
+            start = time.perf_counter()
+            try:
+                return await fn(state, config)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return node_with_config
+
+    @functools.wraps(fn)
+    async def node(state):
+        start = time.perf_counter()
+        try:
+            return await fn(state)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return node
+
+
+def model_label(llm: Any) -> str:
+    """Model name of a chat model or a .bind()-wrapped one"""
+    target = getattr(llm, "bound", llm)
+    return getattr(target, "model_name", None) or getattr(target, "model", None) or type(target).__name__
+
+
+def record_llm_call(model: str, seconds: float, response: Any = None, error: bool = False) -> None:
+    LLM_REQUEST_DURATION.labels(model=model, outcome="error" if error else "ok").observe(seconds)
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("input_tokens"):
+        LLM_TOKENS.labels(model=model, type="prompt").inc(usage["input_tokens"])
+    if usage.get("output_tokens"):
+        LLM_TOKENS.labels(model=model, type="completion").inc(usage["output_tokens"])
+
+
+def record_safety_action(action: str, violations: List[Dict[str, Any]]) -> None:
+    types = {v["type"] for v in violations} or {"none"}
+    for violation_type in types:
+        SAFETY_ACTIONS.labels(action=action, violation_type=violation_type).inc()
+
+
+def _supabase_labels(client: str, request, status: str) -> Dict[str, str]:
+    path = request.url.path
+    table = path.split("/rest/v1/", 1)[1] if "/rest/v1/" in path else path
+    return {"client": client, "method": request.method, "table": table, "status": status}
+
+
+def supabase_event_hooks(
+    client: Union[str, Callable[[Any], str]],
+    is_async: bool = True
+) -> Dict[str, List[Callable]]:
+    """
+    httpx event hooks that time every Supabase request of a client.
+    `client` is the label, or a function of the request returning it (the
+    shared client in app.core.supabase_client labels requests per caller).
+
+    Usage:
+        httpx.AsyncClient(event_hooks=supabase_event_hooks("journey_state"))
+    """
+    def on_request(request):
+        request.extensions["kmedtour_start"] = time.perf_counter()
+
+    def on_response(response):
+        start = response.request.extensions.get("kmedtour_start")
+        if start is not None:
+            name = client(response.request) if callable(client) else client
+            labels = _supabase_labels(name, response.request, str(response.status_code))
+            SUPABASE_REQUEST_DURATION.labels(**labels).observe(time.perf_counter() - start)
+
+    if not is_async:
+        return {"request": [on_request], "response": [on_response]}
+
+    async def on_request_async(request):
+        on_request(request)
+
+    async def on_response_async(response):
+        on_response(response)
+
+    return {"request": [on_request_async], "response": [on_response_async]}
+
+
+def _registry() -> CollectorRegistry:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    return generate_latest(_registry())
+
+
+def sample_total(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    """Sum of a counter's samples in this process, optionally filtered by labels"""
+    total = 0.0
+    for metric in REGISTRY.collect():
+        for sample in metric.samples:
+            if sample.name != f"{name}_total":
+                continue
+            if labels and any(sample.labels.get(k) != v for k, v in labels.items()):
+                continue
+            total += sample.value
+    return total
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,106 @@
+"""
+Regex Engine Selection
+Compiles rule patterns on RE2 (linear time, no backtracking) when it can run
+them with exactly the same results as Python's re, and on re otherwise.
+
+re backtracks: "(jci|iso).*(accredited|certified)" against a long answer with
+many "iso" and no later "certified" is quadratic in the answer length, and a
+nested repeat like "(a+)+b" is exponential. RE2 runs every pattern in time
+linear in the text, so an editable rule pack (see app.core.safety_rules)
+can't turn a long LLM reply into a latency spike.
+
+A pattern goes to RE2 only if every construct has identical semantics there:
+    - no anchors or \\b/\\B (RE2's $ and \\b differ from re's), no lookarounds,
+      backreferences, atomic groups or possessive repeats (unsupported)
+    - \\d/\\D are rewritten to \\p{Nd}/\\P{Nd} (re's are Unicode, RE2's ASCII)
+    - no \\w/\\s classes and no IGNORECASE (Unicode rules differ)
+Everything else stays on re, so verdicts never depend on the engine.
+
+google-re2 provides RE2. Without it every pattern runs on re.
+"""
+
+import re
+from typing import Any, Optional, Tuple
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_constants
+    import sre_parse
+
+try:
+    import re2
+except ImportError:  # pragma: no cover - optional accelerator
+    re2 = None
+
+ENGINES = ("re", "re2")
+
+_SAFE_OPS = {
+    sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY,
+    sre_constants.IN, sre_constants.BRANCH, sre_constants.SUBPATTERN,
+    sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+}
+_SAFE_CATEGORIES = {sre_constants.CATEGORY_DIGIT, sre_constants.CATEGORY_NOT_DIGIT}
+_SAFE_FLAGS = sre_constants.SRE_FLAG_UNICODE
+
+# \d / \D not preceded by an odd number of backslashes
+_DIGIT_CLASS = re.compile(r"(?<!\\)((?:\\\\)*)\\([dD])")
+
+
+def re2_available() -> bool:
+    return re2 is not None
+
+
+def re2_source(pattern: str, flags: int = 0) -> Optional[str]:
+    """The pattern rewritten for RE2, or None if RE2 could match differently"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+    if parsed.state.flags & ~_SAFE_FLAGS or not _supported(parsed):
+        return None
+    return _DIGIT_CLASS.sub(lambda m: m.group(1) + ("\\p{Nd}" if m.group(2) == "d" else "\\P{Nd}"), pattern)
+
+
+def _supported(items) -> bool:
+    for op, av in items:
+        if op not in _SAFE_OPS:
+            return False
+        if op is sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op is sre_constants.CATEGORY and item_av not in _SAFE_CATEGORIES:
+                    return False
+        elif op is sre_constants.SUBPATTERN:
+            # (group, add_flags, del_flags, items): inline flags like (?i:...)
+            if av[1] or av[2] or not _supported(av[3]):
+                return False
+        elif op is sre_constants.BRANCH:
+            if not all(_supported(branch) for branch in av[1]):
+                return False
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            if not _supported(av[2]):
+                return False
+    return True
+
+
+def compile_regex(pattern: str, flags: int = 0, engine: str = "re") -> Tuple[Any, str]:
+    """
+    Compile a pattern on the requested engine.
+
+    Returns (compiled, engine actually used). Both expose search(text, pos)
+    and finditer(text, pos) with re-compatible match objects.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"unknown regex engine {engine!r} (expected one of {ENGINES})")
+
+    if engine == "re2" and re2 is not None:
+        source = re2_source(pattern, flags)
+        if source is not None:
+            options = re2.Options()
+            options.log_errors = False
+            try:
+                return re2.compile(source, options), "re2"
+            except re2.error:
+                pass  # e.g. a repeat count above RE2's limit of 1000
+
+    return re.compile(pattern, flags), "re"
@@ -0,0 +1,224 @@
+"""
+Safety Rule Packs
+Loads the MedicalSafetyLayer patterns from a JSON rule pack and compiles
+them into a SafetyRuleset: the KeywordMatcher over every pattern, the
+per-check severity table and the excerpt lookup table.
+
+A check's severity decides everything it does: HIGH blocks the response
+(violation action "block"), MEDIUM sends it to human review ("flag"), LOW
+only reports it ("verify"). The incremental scanner derives its early
+verdicts from the same table, so they always agree with the final one.
+
+A pack is validated before it can be used:
+    - known violation types and severities; no duplicate checks
+    - every pattern compiles
+    - every "match" example triggers its check and no "no_match" example does
+    - a scan of a synthetic 8 KB response, and of 8 KB of the rules' own
+      trigger literals (worst case for regex verification), stays under
+      SAFETY_RULES_MAX_SCAN_MS
+
+A ruleset is immutable once built. MedicalSafetyLayer swaps the whole object
+in one assignment, so a request in flight finishes on the ruleset it started
+with and the next one sees the new pack.
+
+Configuration (env):
+    SAFETY_RULES_PATH            - rule pack file (default: safety_rules.json next to this module)
+    SAFETY_RULES_RELOAD_INTERVAL - seconds between checks of the file's mtime (default: 30, 0 = never)
+    SAFETY_RULES_MAX_SCAN_MS     - load-time scan budget for an 8 KB response (default: 20)
+    SAFETY_REGEX_ENGINE          - "re2" (linear time where possible, see app.core.regex_engine)
+                                   or "re" (default: re2)
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.keyword_matcher import KeywordMatcher
+from app.core.regex_engine import ENGINES
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("safety_rules.json")
+
+VIOLATION_TYPES = {"medical_advice", "unverified_pricing", "accreditation_claim", "emergency_keyword"}
+SEVERITIES = {"HIGH", "MEDIUM", "LOW"}
+
+# Severity -> the violation's action, and the verdict a single hit forces
+SEVERITY_ACTIONS = {"HIGH": "block", "MEDIUM": "flag", "LOW": "verify"}
+SEVERITY_VERDICTS = {"HIGH": "block", "MEDIUM": "human_review", "LOW": None}
+
+# Patterns whose matches can't span a '.' and don't depend on where the
+# text starts/ends, so the sentence holding the match is the excerpt
+_SENTENCE_UNSAFE = re.compile(r"\.|\\[WSDbBAZ]|\[\^|(?<!\\)\^|(?<!\\)\$|\(\?[=!<]")
+
+# Responses are lowercased before matching, so uppercase literals never match
+_UPPERCASE_LITERAL = re.compile(r"[A-Z]")
+_ESCAPE = re.compile(r"\\.")
+
+_BENCH_TEXT = (
+    "Rhinoplasty recovery usually takes one to two weeks before most swelling settles. "
+    "Our coordinators can arrange airport pickup, accommodation and an interpreter. "
+) * 50
+
+# (violation type, patterns, severity, action derived from severity)
+Check = Tuple[str, List[str], str, str]
+
+
+class RulesetError(ValueError):
+    """Raised when a rule pack fails validation"""
+
+
+class SafetyRuleset:
+    """A validated, compiled rule pack"""
+
+    def __init__(
+        self,
+        version: str,
+        checks: List[Check],
+        advice_negation: str,
+        source: str,
+        digest: str,
+        engine: str = "re2"
+    ):
+        self.version = version
+        self.checks = checks
+        # Violation type -> verdict one hit forces (None for LOW)
+        self.verdicts = {kind: SEVERITY_VERDICTS[severity] for kind, _, severity, _ in checks}
+        self.advice_negation = advice_negation
+        self.source = source
+        self.digest = digest
+        self.loaded_at = time.time()
+
+        rules = [(kind, p) for kind, patterns, _, _ in checks for p in patterns]
+        rules.append(("advice_negation", advice_negation))
+
+        start = time.perf_counter()
+        self.matcher = KeywordMatcher(rules, lowercase=True, engine=engine)
+        self.compile_ms = (time.perf_counter() - start) * 1000
+        self.scan_ms = 0.0
+
+        self.sentence_local = {
+            pattern: not _SENTENCE_UNSAFE.search(pattern) for _, pattern in rules
+        }
+
+    def patterns(self, kind: str) -> List[str]:
+        for check_kind, patterns, _, _ in self.checks:
+            if check_kind == kind:
+                return patterns
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "digest": self.digest,
+            "source": self.source,
+            "patterns": sum(len(patterns) for _, patterns, _, _ in self.checks),
+            "engines": self.matcher.engines,
+            "compile_ms": round(self.compile_ms, 2),
+            "scan_ms_8kb": round(self.scan_ms, 3),
+            "loaded_at": self.loaded_at
+        }
+
+
+def compile_ruleset(pack: Dict[str, Any], source: str = "<memory>", digest: str = "") -> SafetyRuleset:
+    """Validate a parsed rule pack and compile it"""
+    version = pack.get("version")
+    if not isinstance(version, str) or not version.strip():
+        raise RulesetError("rule pack needs a non-empty 'version'")
+
+    checks: List[Check] = []
+    examples: Dict[str, Dict[str, List[str]]] = {}
+    for index, check in enumerate(pack.get("checks") or []):
+        kind = check.get("type")
+        where = f"checks[{index}] ({kind})"
+        if kind not in VIOLATION_TYPES:
+            raise RulesetError(f"{where}: unknown violation type")
+        if any(kind == seen for seen, _, _, _ in checks):
+            raise RulesetError(f"{where}: duplicate check")
+        if check.get("severity") not in SEVERITIES:
+            raise RulesetError(f"{where}: severity must be one of {sorted(SEVERITIES)}")
+        if "action" in check:
+            print(f"[SAFETY RULES] ⚠️ {where}: 'action' is ignored; the action follows severity")
+
+        patterns = check.get("patterns")
+        if not patterns or not all(isinstance(p, str) and p for p in patterns):
+            raise RulesetError(f"{where}: 'patterns' must be a non-empty list of strings")
+        for pattern in patterns:
+            _validate_pattern(pattern, where)
+
+        severity = check["severity"]
+        checks.append((kind, list(patterns), severity, SEVERITY_ACTIONS[severity]))
+        examples[kind] = check.get("examples") or {}
+
+    if not checks:
+        raise RulesetError("rule pack has no checks")
+
+    negation = pack.get("advice_negation")
+    if not isinstance(negation, str) or not negation:
+        raise RulesetError("rule pack needs an 'advice_negation' pattern")
+    _validate_pattern(negation, "advice_negation")
+
+    engine = os.getenv("SAFETY_REGEX_ENGINE", "re2")
+    if engine not in ENGINES:
+        raise RulesetError(f"SAFETY_REGEX_ENGINE must be one of {ENGINES}, not {engine!r}")
+
+    ruleset = SafetyRuleset(version.strip(), checks, negation, source, digest, engine)
+
+    for kind, cases in examples.items():
+        for text in cases.get("match", []):
+            if kind not in ruleset.matcher.categories(text):
+                raise RulesetError(f"{kind}: example {text!r} should match but doesn't")
+        for text in cases.get("no_match", []):
+            if kind in ruleset.matcher.categories(text):
+                raise RulesetError(f"{kind}: example {text!r} shouldn't match but does")
+
+    ruleset.scan_ms = _benchmark(ruleset)
+    budget_ms = float(os.getenv("SAFETY_RULES_MAX_SCAN_MS", "20"))
+    if ruleset.scan_ms > budget_ms:
+        raise RulesetError(
+            f"scanning an 8 KB response takes {ruleset.scan_ms:.1f}ms (budget {budget_ms:.0f}ms)"
+        )
+
+    return ruleset
+
+
+def load_ruleset(path: Optional[Path] = None) -> SafetyRuleset:
+    """Read, validate and compile a rule pack file"""
+    path = Path(path or os.getenv("SAFETY_RULES_PATH") or DEFAULT_RULES_PATH)
+    try:
+        raw = path.read_bytes()
+        pack = json.loads(raw)
+    except (OSError, ValueError) as e:
+        raise RulesetError(f"can't read rule pack {path}: {e}") from e
+
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    return compile_ruleset(pack, source=str(path), digest=digest)
+
+
+def _validate_pattern(pattern: str, where: str) -> None:
+    try:
+        re.compile(pattern)
+    except re.error as e:
+        raise RulesetError(f"{where}: invalid pattern {pattern!r}: {e}") from e
+
+    if _UPPERCASE_LITERAL.search(_ESCAPE.sub("", pattern)):
+        print(f"[SAFETY RULES] ⚠️ {where}: {pattern!r} has uppercase letters, "
+              f"which never match the lowercased response")
+
+
+def _benchmark(ruleset: SafetyRuleset, rounds: int = 5) -> float:
+    """Best-of-N milliseconds for one scan of an 8 KB response, worst of the two texts"""
+    triggers = " ".join(ruleset.matcher.anchors) or "x"
+    adversarial = (triggers + " ") * (len(_BENCH_TEXT) // (len(triggers) + 1) + 1)
+
+    worst = 0.0
+    for text in (_BENCH_TEXT, adversarial[:len(_BENCH_TEXT)]):
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            ruleset.matcher.first_matches(text)
+            best = min(best, (time.perf_counter() - start) * 1000)
+        worst = max(worst, best)
+    return worst
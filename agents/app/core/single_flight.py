@@ -0,0 +1,96 @@
+"""
+Single-Flight Request Coalescing
+When many users send the same first question at once (e.g. right after a
+campaign lands), only one LLM call is made; concurrent identical requests
+await that call and share its response. Each request still runs its own
+safety_check_node on the shared text, which is deterministic, so every
+caller gets the same safety-checked result.
+
+Works together with the answer cache: the cache serves repeats after the
+first answer is stored, single-flight covers the window while it is still
+being generated.
+
+The shared call runs as its own task. A caller that gives up (disconnect,
+deadline) stops waiting without cancelling it for the others; the call is
+only cancelled once nobody is waiting any more.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Usage:
+        response, shared = await faq_single_flight.do(key, lambda: call_llm(...))
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn() once per key among concurrent callers.
+
+        Returns (result, shared) where shared is True if this caller joined a
+        call started by someone else. Exceptions from fn() reach every caller.
+        `timeout` bounds only this caller's wait (raises TimeoutError).
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            if timeout is None:
+                result = await asyncio.shield(call.task)
+            else:
+                async with asyncio.timeout(timeout):
+                    result = await asyncio.shield(call.task)
+            return result, shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "llm_calls": self.leaders,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "coalesce_rate": (self.coalesced / total) if total else 0.0
+        }
+
+
+# Singleton instance (first-turn FAQ answers)
+faq_single_flight = SingleFlight()
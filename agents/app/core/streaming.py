@@ -0,0 +1,140 @@
+"""
+Server-Sent Events streaming for the LangGraph agent.
+
+Translates `agent_app.astream_events` into SSE frames so the client sees the
+first token as soon as the LLM emits it instead of waiting for the full
+completion. The graph runs unchanged (router -> agent -> safety_check), so the
+MedicalSafetyLayer verdict is always delivered as the final event.
+
+LLM tokens also go through an IncrementalSafetyScanner; once it is certain
+the answer will be blocked, the graph run is cancelled, so the LLM stops
+generating. The partial answer is then stored as the agent node's output and
+the graph resumes from there, so safety_check (and the review queue) still
+produce the verdict and the checkpoint, as for a completed answer.
+
+Event types:
+    route   - which agent the router selected
+    token   - incremental assistant text (LLM chunks or canned responses)
+    safety  - final safety verdict; carries replacement text when blocked
+    error   - unrecoverable error while running the graph
+    done    - end of stream; carries session_id and history_version
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+from langchain_core.messages import AIMessage
+
+from app.core.graph import safety_layer
+
+# Nodes whose chat model output is streamed token by token
+LLM_NODES = {"faq_agent", "medical_info_agent"}
+
+# Nodes that return a pre-written response in one piece
+CANNED_NODES = {"emergency", "human"}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def finish_blocked_turn(agent_app, config: Dict[str, Any], node: str, partial: str) -> None:
+    """
+    Complete a turn whose LLM node was cancelled on an early block: record
+    the partial answer as that node's output, then run the rest of the
+    graph (safety_check, human_review) from the checkpoint.
+    """
+    snapshot = await agent_app.aget_state(config)
+    messages = list(snapshot.values.get("messages", []))
+    await agent_app.aupdate_state(config, {"messages": messages + [AIMessage(content=partial)]}, as_node=node)
+    async for _ in agent_app.astream(None, config=config):
+        pass
+
+
+async def stream_agent_response(
+    agent_app,
+    inputs: Dict[str, Any],
+    config: Dict[str, Any],
+    session_id: str
+) -> AsyncIterator[str]:
+    """
+    Run the agent graph and yield SSE frames as it progresses.
+
+    Args:
+        agent_app: Compiled LangGraph application
+        inputs: Graph input (at least {"messages": [...]})
+        config: LangGraph config carrying the thread_id
+        session_id: Chat session identifier echoed back in the final frame
+    """
+    streamed_tokens = False
+    query_type = "faq"
+    scanner = None
+    blocked_node = None
+
+    try:
+        events = agent_app.astream_events(inputs, config=config, version="v2")
+        try:
+            async for event in events:
+                kind = event["event"]
+                name = event.get("name")
+                node = event.get("metadata", {}).get("langgraph_node")
+
+                if kind == "on_chat_model_stream" and node in LLM_NODES:
+                    content = event["data"]["chunk"].content
+                    if content:
+                        streamed_tokens = True
+                        if scanner is None:
+                            scanner = safety_layer.scanner(query_type)
+                        if scanner.feed(content) == "block":
+                            # Nothing more of this answer can be sent
+                            blocked_node = node
+                            break
+                        yield format_sse("token", {"content": content})
+
+                elif kind == "on_chain_end" and name == node:
+                    output = event["data"].get("output") or {}
+                    if not isinstance(output, dict):
+                        continue
+
+                    if node == "router":
+                        query_type = output.get("query_type") or query_type
+                        yield format_sse("route", {"agent": output.get("query_type")})
+
+                    elif node in CANNED_NODES and output.get("messages"):
+                        yield format_sse("token", {"content": output["messages"][-1].content})
+
+                    elif node in LLM_NODES and not streamed_tokens and output.get("messages"):
+                        # Answered without an LLM call (e.g. answer cache hit)
+                        yield format_sse("token", {"content": output["messages"][-1].content})
+        finally:
+            # Cancels the graph run, and with it the LLM call, if it hasn't finished
+            await events.aclose()
+
+        if blocked_node is not None:
+            await finish_blocked_turn(agent_app, config, blocked_node, scanner.text)
+
+        # The checkpoint holds the post-safety state for this thread
+        snapshot = await agent_app.aget_state(config)
+        final_state = snapshot.values
+        action = final_state.get("safety_action", "send")
+
+        verdict = {
+            "action": action,
+            "agent_used": final_state.get("query_type"),
+            "violations": final_state.get("safety_violations", []),
+            "requires_human_review": action != "send",
+            "ruleset_version": final_state.get("safety_ruleset_version"),
+        }
+        if action == "block":
+            verdict["replacement"] = final_state["messages"][-1].content
+
+        yield format_sse("safety", verdict)
+        yield format_sse("done", {
+            "session_id": session_id,
+            "history_version": len(final_state.get("messages", []))
+        })
+
+    except Exception as e:
+        print(f"❌ Error in chat stream: {str(e)}")
+        yield format_sse("error", {"detail": f"Internal server error: {str(e)}"})
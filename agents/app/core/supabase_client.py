@@ -0,0 +1,237 @@
+"""
+Shared Supabase HTTP Client
+One pooled httpx client per process for every Supabase REST call, instead of
+a new client (new TCP + TLS handshake) per request.
+
+Connections are kept alive and reused across requests, and multiplexed over
+HTTP/2 when the h2 package is installed. The FastAPI lifespan opens the pool
+at startup and closes it on shutdown; code running outside the app (scripts,
+tests) gets a client lazily on first use. An async pool belongs to one event
+loop: it is closed when that loop shuts down (asyncio.run finalizes async
+generators before closing the loop), so a script calling asyncio.run()
+repeatedly doesn't leave a pool of open connections behind per run.
+
+Callers take a named view so the Prometheus Supabase histogram keeps its
+per-caller `client` label:
+
+    journey = supabase_http.scoped("journey_state")
+    response = await journey.get(f"{url}/rest/v1/patient_journey_state", headers=..., params=...)
+
+    reviews = supabase_http.scoped("review_queue", sync=True)
+    response = reviews.patch(...)   # sync code, same pool settings
+
+Configuration (env):
+    SUPABASE_HTTP2              - multiplex over HTTP/2, needs h2 (default: 1)
+    SUPABASE_MAX_CONNECTIONS    - open connections per client (default: 50)
+    SUPABASE_MAX_KEEPALIVE      - idle connections kept for reuse (default: 20)
+    SUPABASE_KEEPALIVE_EXPIRY   - seconds an idle connection is kept (default: 30)
+    SUPABASE_TIMEOUT            - request timeout in seconds (default: 10)
+"""
+
+import asyncio
+import os
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+import httpx
+
+from app.core.metrics import supabase_event_hooks
+
+try:
+    import h2  # noqa: F401 - httpx needs it for http2=True
+    _H2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional
+    _H2_AVAILABLE = False
+
+# Request extension holding the caller name for the metrics hooks
+CLIENT_LABEL = "kmedtour_client"
+
+
+class SupabaseScope:
+    """
+    A named view on the shared client. Methods return what the underlying
+    client returns: a coroutine for the async pool, a Response for the sync one.
+    """
+
+    def __init__(self, http: "SupabaseHTTP", name: str, sync: bool = False):
+        self._http = http
+        self.name = name
+        self.sync = sync
+
+    def request(self, method: str, url: str, **kwargs):
+        client = self._http.sync_client() if self.sync else self._http.async_client()
+        kwargs["extensions"] = {**kwargs.get("extensions", {}), CLIENT_LABEL: self.name}
+        return client.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+class SupabaseHTTP:
+    """
+    Owns the pooled async and sync clients.
+
+    Usage:
+        await supabase_http.start()     # FastAPI lifespan startup
+        await supabase_http.aclose()    # FastAPI lifespan shutdown
+
+    Args:
+        transport: stand-in transport for both pools (e.g. httpx.MockTransport
+            in tests and benchmarks). The sync pool needs it to implement
+            httpx.BaseTransport as well; sync_client() raises TypeError
+            rather than silently going to the network.
+    """
+
+    def __init__(self, transport: Optional[Union[httpx.AsyncBaseTransport, httpx.BaseTransport]] = None):
+        self.http2 = os.getenv("SUPABASE_HTTP2", "1") == "1"
+        if self.http2 and not _H2_AVAILABLE:
+            print("[SUPABASE] ⚠️ SUPABASE_HTTP2=1 but h2 is not installed - using HTTP/1.1 keep-alive")
+            self.http2 = False
+
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50")),
+            max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+        )
+        self.timeout = httpx.Timeout(float(os.getenv("SUPABASE_TIMEOUT", "10")))
+        self._transport = transport
+
+        self._async: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Suspended async generator that closes the async pool at loop shutdown
+        self._async_closer: Optional[AsyncIterator[None]] = None
+        self._sync: Optional[httpx.Client] = None
+        self._sync_lock = threading.Lock()
+        self.clients_created = 0
+        self.clients_closed = 0
+
+    def scoped(self, name: str, sync: bool = False) -> SupabaseScope:
+        return SupabaseScope(self, name, sync)
+
+    def async_client(self) -> httpx.AsyncClient:
+        """The pooled async client of the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async is None or self._async.is_closed or self._async_loop is not loop:
+            # Pooled connections belong to one event loop; a script calling
+            # asyncio.run() repeatedly gets a fresh pool per loop
+            if self._async is not None and not self._async.is_closed:
+                self._release(self._async, self._async_loop)
+            self._async = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self._transport,
+                event_hooks=supabase_event_hooks(_label)
+            )
+            self._async_loop = loop
+            self._async_closer = self._close_at_loop_shutdown(self._async, loop)
+            self.clients_created += 1
+        return self._async
+
+    def _close_at_loop_shutdown(
+        self,
+        client: httpx.AsyncClient,
+        loop: asyncio.AbstractEventLoop
+    ) -> AsyncIterator[None]:
+        """
+        Park an async generator on the loop whose finally block closes the
+        client. The loop finalizes it in shutdown_asyncgens() (asyncio.run
+        does this before closing the loop), while the pool can still be
+        closed on the loop it belongs to. The caller keeps a reference, since
+        loops only track async generators weakly.
+        """
+        async def closer():
+            try:
+                yield
+            finally:
+                if not client.is_closed:
+                    await client.aclose()
+                    self.clients_closed += 1
+
+        async def park():
+            try:
+                await generator.__anext__()
+            except StopAsyncIteration:
+                pass  # aclose() got there first
+
+        generator = closer()
+        loop.create_task(park())
+        return generator
+
+    def _release(self, client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        """Close a pool left open on another event loop (not shut down via asyncio.run)"""
+        if loop is not None and loop.is_running():
+            # Loop alive in another thread: close it there
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            self.clients_closed += 1
+            return
+        print("[SUPABASE] ⚠️ Async pool left open by an event loop that ended without "
+              "shutting down async generators; its connections close when it is garbage collected")
+
+    def sync_client(self) -> httpx.Client:
+        """The pooled sync client (thread-safe, shared by every thread)"""
+        if self._sync is None:
+            if self._transport is not None and not isinstance(self._transport, httpx.BaseTransport):
+                raise TypeError(f"{type(self._transport).__name__} can't serve the sync Supabase pool")
+            with self._sync_lock:
+                if self._sync is None:
+                    self._sync = httpx.Client(
+                        http2=self.http2,
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        transport=self._transport,
+                        event_hooks=supabase_event_hooks(_label, is_async=False)
+                    )
+                    self.clients_created += 1
+        return self._sync
+
+    async def start(self) -> None:
+        """Open the async pool on the app's event loop"""
+        self.async_client()
+        print(f"[SUPABASE] ✅ Shared client ready (http2={self.http2}, "
+              f"max_connections={self.limits.max_connections})")
+
+    async def aclose(self) -> None:
+        """Close both pools; later calls lazily open new ones"""
+        if self._async is not None:
+            client, self._async = self._async, None
+            closer, self._async_closer = self._async_closer, None
+            self._async_loop = None
+            if not client.is_closed:
+                await client.aclose()
+                self.clients_closed += 1
+            if closer is not None:
+                await closer.aclose()
+        if self._sync is not None:
+            with self._sync_lock:
+                client, self._sync = self._sync, None
+            client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "async_open": self._async is not None and not self._async.is_closed,
+            "sync_open": self._sync is not None,
+            "clients_created": self.clients_created,
+            "clients_closed": self.clients_closed
+        }
+
+
+def _label(request: httpx.Request) -> str:
+    return request.extensions.get(CLIENT_LABEL, "supabase")
+
+
+# Singleton instance
+supabase_http = SupabaseHTTP()
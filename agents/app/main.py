@@ -8,12 +8,37 @@ Features:
 - Cost: ~$5-20/month with Gemini Flash
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional
-from app.core.graph import app as agent_app
+from langchain_core.messages import convert_to_messages
+from app.core.graph import app as agent_app, checkpointer, llm, safety_layer
+from app.core.safety_rules import RulesetError
+from app.core.metrics import (
+    render_metrics,
+    sample_total,
+    METRICS_CONTENT_TYPE,
+    TOKEN_PRICES_PER_1M
+)
+from app.admin.review_queue import review_queue
+from app.core.supabase_client import supabase_http
+from app.core.streaming import stream_agent_response
+from app.core.batch import run_batch, BATCH_MAX_ITEMS
+from app.core.answer_cache import answer_cache
+from app.core.single_flight import faq_single_flight
+from app.core.llm_pool import (
+    llm_limiter,
+    request_deadline,
+    run_until_disconnect,
+    LLMDeadlineExceeded,
+    ClientDisconnected
+)
 from app.routers.journey import router as journey_router
+from agents.src.core.state_machine import shutdown_state_machine
+from app.routers.review import router as review_router
 import uuid
 import os
 from dotenv import load_dotenv
@@ -21,15 +46,30 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled Supabase client for the journey state machine and review queue
+    await supabase_http.start()
+    # Review queue: replay the spool, then flush flagged responses in the background
+    await review_queue.start()
+    yield
+    await review_queue.stop()
+    # Buffered journey events (notes, assignments) go out before the pool closes
+    await shutdown_state_machine()
+    await supabase_http.aclose()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="KmedTour Medical Tourism OS API",
     description="Medical Tourism Operating System with AI agents, journey orchestration, and workflow automation",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # Include routers
 app.include_router(journey_router)
+app.include_router(review_router)
 
 # CORS configuration for Next.js frontend
 allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -50,14 +90,70 @@ class Message(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    messages: List[Message]
+    messages: List[Message] = []
     session_id: Optional[str] = None
+    # Delta mode: send only the new user turn; the server owns the history
+    message: Optional[Message] = None
+    history_version: Optional[int] = None
 
 
 class ChatResponse(BaseModel):
     session_id: str
     response: str
     agent_used: Optional[str] = None
+    history_version: Optional[int] = None
+
+
+class BatchChatItem(BaseModel):
+    id: Optional[str] = None
+    messages: List[Message]
+
+
+class BatchChatRequest(BaseModel):
+    items: List[BatchChatItem]
+    max_concurrency: Optional[int] = None
+    # Set False for safety regression runs so every answer comes from the LLM
+    use_answer_cache: bool = True
+
+
+def _to_graph_messages(messages: List[Message]):
+    """Convert request messages to LangChain message objects for the graph"""
+    return convert_to_messages(
+        [{"role": msg.role, "content": msg.content} for msg in messages]
+    )
+
+
+async def _build_graph_input(request: ChatRequest, config: dict) -> dict:
+    """
+    Build the graph input for either protocol mode.
+
+    Full mode (`messages`): the client's history replaces the thread state.
+    Delta mode (`message`): the new user turn is appended to the checkpointed
+    thread. `history_version` is the message count the client last received;
+    if it doesn't match the server's, the client must resync in full mode.
+    """
+    if request.message is None:
+        if not request.messages:
+            raise HTTPException(status_code=422, detail="Either `messages` or `message` is required")
+        return {"messages": _to_graph_messages(request.messages)}
+
+    if request.message.role != "user":
+        raise HTTPException(status_code=422, detail="Delta `message` must have role 'user'")
+
+    snapshot = await agent_app.aget_state(config)
+    history = snapshot.values.get("messages", []) if snapshot.values else []
+
+    if request.history_version is not None and request.history_version != len(history):
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "error": "history_diverged",
+                "history_version": len(history),
+                "message": "Resend the full conversation in `messages` to resync"
+            }
+        )
+
+    return {"messages": history + _to_graph_messages([request.message])}
 
 
 # API Endpoints
@@ -75,19 +171,42 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """
+    Detailed health check
+
+    LLM status is derived from recent real calls rather than a probe, so
+    health checks don't spend tokens. Always 200 while the API is serving;
+    inspect `status` for degradation.
+    """
+    llm_health = llm_limiter.health()
+    llm_health.update({
+        "provider": "openai",
+        "model": llm.model_name,
+        "configured": bool(os.getenv("OPENAI_API_KEY"))
+    })
+
+    degraded = llm_health["status"] == "failing" or not llm_health["configured"]
     return {
-        "status": "healthy",
+        "status": "degraded" if degraded else "healthy",
         "services": {
             "api": "running",
             "langgraph": "initialized",
-            "gemini": "connected"
-        }
+            "llm": llm_health,
+            "checkpointer": checkpointer.stats().get("backend"),
+            "review_queue": "supabase" if review_queue.enabled else "console_only"
+        },
+        "llm_pool": llm_limiter.stats()
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """
     Main chat endpoint - routes queries through LangGraph multi-agent system
 
@@ -97,18 +216,16 @@ async def chat(request: ChatRequest):
         # Generate or use existing session ID
         session_id = request.session_id or str(uuid.uuid4())
 
-        # Format messages for LangGraph
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
-
         # Call LangGraph agent (with persistent memory via session_id)
-        config = {"configurable": {"thread_id": session_id}}
+        config = {"configurable": {"thread_id": session_id, "deadline": request_deadline()}}
+
+        # Format messages for LangGraph (full history or delta on the thread)
+        inputs = await _build_graph_input(request, config)
 
-        result = await agent_app.ainvoke(
-            {"messages": messages},
-            config=config
+        # Cancel the graph (and free its LLM slot) if the client goes away
+        result = await run_until_disconnect(
+            http_request,
+            agent_app.ainvoke(inputs, config=config)
         )
 
         # Extract response
@@ -128,9 +245,16 @@ async def chat(request: ChatRequest):
         return ChatResponse(
             session_id=session_id,
             response=assistant_message.content,
-            agent_used=agent_used
+            agent_used=agent_used,
+            history_version=len(result["messages"])
         )
 
+    except HTTPException:
+        raise
+    except LLMDeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected")
     except Exception as e:
         print(f"❌ Error in chat endpoint: {str(e)}")
         raise HTTPException(
@@ -142,26 +266,122 @@ async def chat(request: ChatRequest):
 @app.post("/api/chat/stream")
 async def chat_stream(request: ChatRequest):
     """
-    Streaming chat endpoint (for real-time responses)
-    TODO: Implement streaming with LangGraph
+    Streaming chat endpoint (Server-Sent Events)
+
+    Runs the same graph as /api/chat (router -> agent -> safety_check) but
+    forwards LLM tokens as they are generated. The safety verdict is sent as
+    the final `safety` event; when it is `block`, clients must replace the
+    streamed text with the `replacement` field.
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Streaming not yet implemented. Use /api/chat for now."
+    session_id = request.session_id or str(uuid.uuid4())
+    config = {"configurable": {"thread_id": session_id, "deadline": request_deadline()}}
+    inputs = await _build_graph_input(request, config)
+
+    # StreamingResponse cancels the generator when the client disconnects,
+    # which cancels any in-flight LLM call inside the graph
+
+    return StreamingResponse(
+        stream_agent_response(agent_app, inputs, config, session_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+            "X-Session-Id": session_id
+        }
     )
 
 
+@app.post("/api/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Batch chat endpoint (NDJSON) for QA evals and bulk replay
+
+    Each item is an independent conversation run on a throwaway thread.
+    Results stream back one JSON object per line as items complete, with the
+    route, safety action, violations and latency of each; the last line is a
+    summary. Closing the connection cancels the remaining items.
+    """
+    if not request.items:
+        raise HTTPException(status_code=422, detail="`items` must not be empty")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.items)} items (max {BATCH_MAX_ITEMS})"
+        )
+    if any(not item.messages for item in request.items):
+        raise HTTPException(status_code=422, detail="Every item needs at least one message")
+
+    items = [
+        {"id": item.id, "inputs": {"messages": _to_graph_messages(item.messages)}}
+        for item in request.items
+    ]
+
+    return StreamingResponse(
+        run_batch(agent_app, items, request.max_concurrency, request.use_answer_cache),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/safety/rules")
+async def get_safety_rules():
+    """Active safety rule pack of this worker"""
+    return safety_layer.ruleset.stats()
+
+
+@app.post("/api/safety/rules/reload")
+async def reload_safety_rules():
+    """
+    Load the rule pack file again and swap it in without a restart.
+    Workers also pick up file changes on their own every
+    SAFETY_RULES_RELOAD_INTERVAL seconds; this applies it now on this worker.
+    """
+    try:
+        ruleset = safety_layer.reload()
+    except RulesetError as e:
+        raise HTTPException(status_code=422, detail={
+            "error": "invalid_ruleset",
+            "message": str(e),
+            "active_version": safety_layer.ruleset.version
+        })
+    return ruleset.stats()
+
+
 @app.get("/api/stats")
 async def get_stats():
     """
-    Get usage statistics (for monitoring costs)
-    TODO: Implement Redis-based stats tracking
+    Usage statistics for this worker since startup (for monitoring costs).
+    Prometheus on /metrics has the full breakdown.
     """
+    cache_stats = answer_cache.stats()
+    prompt_tokens = sample_total("kmedtour_llm_tokens", {"type": "prompt"})
+    completion_tokens = sample_total("kmedtour_llm_tokens", {"type": "completion"})
+    estimated_cost = (
+        prompt_tokens * TOKEN_PRICES_PER_1M["prompt"]
+        + completion_tokens * TOKEN_PRICES_PER_1M["completion"]
+    ) / 1_000_000
+    journey_hits = sample_total("kmedtour_journey_state_cache", {"result": "hit"})
+    journey_lookups = sample_total("kmedtour_journey_state_cache")
+
     return {
-        "total_conversations": 0,
-        "total_messages": 0,
-        "estimated_cost_today": "$0.00",
-        "cache_hit_rate": "0%"
+        "total_conversations": int(sample_total("kmedtour_chat_turns", {"first_turn": "true"})),
+        "total_messages": int(sample_total("kmedtour_chat_turns")),
+        "llm_tokens": {"prompt": int(prompt_tokens), "completion": int(completion_tokens)},
+        "estimated_cost_since_start": f"${estimated_cost:.4f}",
+        "cache_hit_rate": f"{cache_stats['hit_rate']:.0%}",
+        "answer_cache": cache_stats,
+        "single_flight": faq_single_flight.stats(),
+        "review_queue": review_queue.stats(),
+        "supabase_client": supabase_http.stats(),
+        "journey_state_cache": {
+            "lookups": int(journey_lookups),
+            "hit_rate": journey_hits / journey_lookups if journey_lookups else 0.0
+        },
+        "journey_events": {
+            outcome: int(sample_total("kmedtour_journey_events", {"outcome": outcome}))
+            for outcome in ("written", "failed", "dropped")
+        },
+        "checkpointer": checkpointer.stats()
     }
 
 
@@ -4,7 +4,7 @@ KmedTour Medical Tourism Operating System - Journey API Router
 FastAPI router for patient journey management:
 - Start/resume journeys
 - Get journey state and timeline
-- Manual state transitions (coordinator)
+- Manual state transitions (coordinator), one patient or in bulk
 - Process patient through agent workflow
 """
 
@@ -19,6 +19,7 @@ from agents.src.core.state_machine import (
     JourneyState,
     StateTransition,
     InvalidTransitionError,
+    TransitionConflictError,
     get_state_machine
 )
 
@@ -41,6 +42,10 @@ class TransitionRequest(BaseModel):
     to_state: str = Field(..., description="Target state (e.g., 'MATCHING', 'QUOTE')")
     reason: str = Field(..., description="Reason for manual transition")
     force: bool = Field(default=False, description="Force transition (bypass validation)")
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Version from /state; the transition fails with 409 if the journey changed since"
+    )
     coordinator_id: Optional[str] = None
     coordinator_name: Optional[str] = None
 
@@ -51,11 +56,38 @@ class AssignCoordinatorRequest(BaseModel):
     coordinator_name: str
 
 
+class BulkTransitionItem(BaseModel):
+    """One patient of a bulk transition"""
+    patient_id: str
+    to_state: str
+    expected_version: Optional[int] = None
+
+
+class BulkTransitionRequest(BaseModel):
+    """Request to transition many patients at once (for coordinators)"""
+    transitions: List[BulkTransitionItem] = Field(..., min_length=1, max_length=1000)
+    reason: str = Field(..., description="Reason for the batch transition")
+    force: bool = Field(default=False, description="Force transitions (bypass validation)")
+    coordinator_id: Optional[str] = None
+    coordinator_name: Optional[str] = None
+
+
+class BulkAssignCoordinatorRequest(BaseModel):
+    """Request to assign a coordinator to many patients"""
+    patient_ids: List[str] = Field(..., min_length=1, max_length=1000)
+    coordinator_id: str
+    coordinator_name: str
+
+
 class LogEventRequest(BaseModel):
     """Request to log a custom event"""
     event_type: str = Field(..., description="Event type (e.g., 'note', 'document_upload')")
     event_data: Dict[str, Any] = Field(default={})
     coordinator_name: Optional[str] = None
+    durable: Optional[bool] = Field(
+        default=None,
+        description="Write before responding (default: only for JOURNEY_EVENTS_SYNC_TYPES, others are batched)"
+    )
 
 
 class JourneyStateResponse(BaseModel):
@@ -68,6 +100,7 @@ class JourneyStateResponse(BaseModel):
     metadata: Dict[str, Any]
     assigned_coordinator: Optional[str]
     last_updated_at: str
+    version: int
 
 
 class TimelineEventResponse(BaseModel):
@@ -125,16 +158,25 @@ async def start_journey(
                 "message": f"Journey already exists at state: {existing.state.value}"
             }
 
-        # Create new journey
-        result = await sm.transition(
-            request.patient_id,
-            StateTransition(
-                from_state=None,
-                to_state=JourneyState.INQUIRY,
-                triggered_by="system",
-                event_data={"trigger": request.trigger, "documents_count": len(request.documents)}
+        # Create new journey (expected_version=0: only if nobody created it meanwhile)
+        try:
+            await sm.transition(
+                request.patient_id,
+                StateTransition(
+                    from_state=None,
+                    to_state=JourneyState.INQUIRY,
+                    triggered_by="system",
+                    event_data={"trigger": request.trigger, "documents_count": len(request.documents)},
+                    expected_version=0
+                )
             )
-        )
+        except TransitionConflictError as e:
+            return {
+                "status": "resumed",
+                "patient_id": request.patient_id,
+                "current_state": e.current.state.value if e.current else None,
+                "message": "Journey was started concurrently"
+            }
 
         # If documents provided, trigger processing in background
         if request.documents:
@@ -156,6 +198,81 @@ async def start_journey(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/bulk/transition")
+async def bulk_transition(request: BulkTransitionRequest):
+    """
+    Transition many patients in one request, e.g. every confirmed booking
+    to PRE_TRAVEL.
+
+    Transitions are validated in memory and applied in batched writes; the
+    response reports success or the error for each patient.
+    """
+    invalid_states = sorted({
+        item.to_state for item in request.transitions
+        if item.to_state not in JourneyState.__members__
+    })
+    if invalid_states:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid states: {invalid_states}. Valid states: {[s.value for s in JourneyState]}"
+        )
+
+    try:
+        sm = get_state_machine()
+        results = await sm.transition_many([
+            (
+                item.patient_id,
+                StateTransition(
+                    from_state=None,
+                    expected_version=item.expected_version,
+                    to_state=JourneyState(item.to_state),
+                    triggered_by="coordinator",
+                    coordinator_id=request.coordinator_id,
+                    coordinator_name=request.coordinator_name,
+                    event_data={"reason": request.reason, "manual": True, "bulk": True},
+                    force=request.force
+                )
+            )
+            for item in request.transitions
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    succeeded = sum(1 for r in results if r["success"])
+    return {
+        "requested": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
+
+
+@router.post("/bulk/assign-coordinator")
+async def bulk_assign_coordinator(request: BulkAssignCoordinatorRequest):
+    """
+    Assign a coordinator to many patients' journeys in one request.
+    """
+    try:
+        sm = get_state_machine()
+        assigned = await sm.assign_coordinator_many(
+            request.patient_ids,
+            request.coordinator_id,
+            request.coordinator_name
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {
+        "requested": len(assigned),
+        "succeeded": sum(assigned.values()),
+        "coordinator_name": request.coordinator_name,
+        "results": [
+            {"patient_id": patient_id, "success": ok, "error": None if ok else "not_found"}
+            for patient_id, ok in assigned.items()
+        ]
+    }
+
+
 @router.get("/{patient_id}/state", response_model=JourneyStateResponse)
 async def get_journey_state(patient_id: str):
     """
@@ -181,7 +298,8 @@ async def get_journey_state(patient_id: str):
             thread_id=record.thread_id,
             metadata=record.metadata,
             assigned_coordinator=record.assigned_coordinator_name,
-            last_updated_at=record.last_updated_at.isoformat()
+            last_updated_at=record.last_updated_at.isoformat(),
+            version=record.version
         )
 
     except HTTPException:
@@ -265,11 +383,13 @@ async def manual_transition(patient_id: str, request: TransitionRequest):
         if not current_record:
             raise HTTPException(status_code=404, detail=f"No journey found for patient: {patient_id}")
 
-        # Perform transition
+        # Perform transition; validated against the stored state in the same
+        # transaction, so the (possibly cached) record isn't used as from_state
         result = await sm.transition(
             patient_id,
             StateTransition(
-                from_state=current_record.state,
+                from_state=None,
+                expected_version=request.expected_version,
                 to_state=target_state,
                 triggered_by="coordinator",
                 coordinator_id=request.coordinator_id,
@@ -285,11 +405,14 @@ async def manual_transition(patient_id: str, request: TransitionRequest):
             "from_state": result["from_state"],
             "to_state": result["to_state"],
             "forced": result["forced"],
+            "version": result["version"],
             "message": f"Transitioned to {target_state.value}"
         }
 
     except InvalidTransitionError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except TransitionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -342,7 +465,8 @@ async def log_event(patient_id: str, request: LogEventRequest):
             event_type=request.event_type,
             triggered_by="coordinator" if request.coordinator_name else "system",
             coordinator_name=request.coordinator_name,
-            event_data=request.event_data
+            event_data=request.event_data,
+            durable=request.durable
         )
 
         return {
@@ -463,9 +587,8 @@ async def process_patient_documents(patient_id: str, document_urls: List[str]):
 
         config = {"configurable": {"thread_id": f"intake_{patient_id}"}}
 
-        # Execute workflow (this is synchronous in the current implementation)
-        # TODO: Make fully async when LangGraph supports it better
-        result = intake_workflow.invoke(initial_state, config=config)
+        # Execute workflow without blocking the event loop (sync nodes run in the executor)
+        result = await intake_workflow.ainvoke(initial_state, config=config)
 
         # Transition to SCREENING
         await sm.transition(
@@ -0,0 +1,97 @@
+"""
+KmedTour Medical Tourism Operating System - Review Queue API Router
+
+FastAPI router for reviewers of responses flagged by the Medical Safety Layer:
+- Page through the review feed with filters
+- Per-status and per-violation-type counts
+- Bulk status updates
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+
+from app.admin.review_queue import review_queue
+
+router = APIRouter(prefix="/api/review-queue", tags=["review"])
+
+
+# ============================================================================
+# Request/Response Models
+# ============================================================================
+
+class ReviewFeedResponse(BaseModel):
+    """One page of the review feed"""
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as ?cursor= for the next page")
+
+
+class BulkStatusRequest(BaseModel):
+    """Request to set the status of many review items"""
+    ids: List[str] = Field(..., min_length=1, max_length=1000, description="Review item UUIDs")
+    status: str = Field(..., description="'pending', 'approved', 'rejected' or 'escalated'")
+    reviewed_by: Optional[str] = None
+    review_notes: Optional[str] = None
+
+
+# ============================================================================
+# Endpoints
+# ============================================================================
+
+@router.get("", response_model=ReviewFeedResponse)
+def get_review_feed(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    status: Optional[str] = "pending",
+    violation_type: Optional[str] = None,
+    severity: Optional[str] = None,
+    query_type: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    Newest flagged responses first, one page at a time.
+
+    `fields` is a comma-separated column list (e.g. "status,violations,occurrence_count").
+    Use `status=` (empty) to list every status.
+    """
+    try:
+        return review_queue.get_reviews(
+            limit=limit,
+            cursor=cursor,
+            status=status or None,
+            violation_type=violation_type,
+            severity=severity,
+            query_type=query_type,
+            columns=[f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/counts", response_model=Dict[str, Any])
+def get_review_counts():
+    """Entries per status and per violation type (cached for a few seconds)"""
+    try:
+        return review_queue.review_counts()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/status", response_model=Dict[str, Any])
+def bulk_update_status(request: BulkStatusRequest):
+    """Approve, reject or escalate many review items at once"""
+    try:
+        updated = review_queue.update_review_statuses(
+            request.ids,
+            request.status,
+            reviewed_by=request.reviewed_by,
+            review_notes=request.review_notes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return {"requested": len(request.ids), "updated": updated, "status": request.status}
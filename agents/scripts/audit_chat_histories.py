@@ -0,0 +1,222 @@
+"""
+Offline Safety Audit for KmedTour chat_histories exports
+
+Re-runs MedicalSafetyLayer over every assistant message of a chat_histories
+export (JSONL or CSV, as exported from Supabase) after a rule change, and
+reports violation statistics per type and severity. With --baseline-rules
+every message is also checked against the previous rule pack and the
+messages whose verdict changed are written to --diff-out.
+
+The export is streamed: messages are read in chunks and handed to a process
+pool with a bounded number of chunks in flight, so memory stays flat
+whatever the export size. Each worker compiles the rule packs once.
+
+Usage:
+    python agents/scripts/audit_chat_histories.py chat_histories.jsonl
+    python agents/scripts/audit_chat_histories.py export.csv --workers 8 --chunk-size 2000
+    git show HEAD~1:agents/app/core/safety_rules.json > /tmp/old_rules.json
+    python agents/scripts/audit_chat_histories.py export.jsonl \\
+        --baseline-rules /tmp/old_rules.json --diff-out changed.jsonl --out report.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.medical_safety import MedicalSafetyLayer
+from app.core.safety_rules import RulesetError
+
+# (message id, session id, query type, content)
+Message = Tuple[str, str, str, str]
+
+_layers: Dict[str, MedicalSafetyLayer] = {}
+
+
+def read_export(path: Path, default_query_type: str) -> Iterator[Message]:
+    """Assistant messages of a chat_histories export, one at a time"""
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix == ".csv":
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for number, row in enumerate(rows, start=1):
+            if row.get("role") != "assistant" or not row.get("content"):
+                continue
+            metadata = row.get("metadata") or {}
+            if isinstance(metadata, str):
+                try:
+                    metadata = json.loads(metadata) if metadata.strip() else {}
+                except ValueError:
+                    metadata = {}
+            query_type = metadata.get("query_type") or default_query_type
+            yield str(row.get("id") or number), str(row.get("session_id") or ""), query_type, row["content"]
+
+
+def _init_worker(rules_path: Optional[str], baseline_path: Optional[str]) -> None:
+    os.environ["SAFETY_RULES_RELOAD_INTERVAL"] = "0"
+    _layers["current"] = MedicalSafetyLayer(rules_path)
+    if baseline_path:
+        _layers["baseline"] = MedicalSafetyLayer(baseline_path)
+
+
+def audit_chunk(messages: List[Message]) -> Dict[str, Any]:
+    """Aggregates for one chunk, plus the messages whose verdict changed"""
+    current = _layers["current"]
+    baseline = _layers.get("baseline")
+
+    actions: Counter = Counter()
+    violations: Counter = Counter()
+    transitions: Counter = Counter()
+    changed = []
+
+    for message_id, session_id, query_type, content in messages:
+        result = current.check_response(content, query_type)
+        actions[result["action"]] += 1
+        for violation in result["violations"]:
+            violations[f"{violation['type']}|{violation['severity']}"] += 1
+
+        if baseline is None:
+            continue
+        previous = baseline.check_response(content, query_type)
+        if previous["action"] != result["action"] or previous["violations"] != result["violations"]:
+            transitions[f"{previous['action']}->{result['action']}"] += 1
+            changed.append({
+                "id": message_id,
+                "session_id": session_id,
+                "baseline_action": previous["action"],
+                "action": result["action"],
+                "added": sorted({v["type"] for v in result["violations"]} - {v["type"] for v in previous["violations"]}),
+                "removed": sorted({v["type"] for v in previous["violations"]} - {v["type"] for v in result["violations"]}),
+                "excerpt": content[:200]
+            })
+
+    return {
+        "messages": len(messages),
+        "actions": actions,
+        "violations": violations,
+        "transitions": transitions,
+        "changed": changed
+    }
+
+
+def chunked(messages: Iterator[Message], size: int) -> Iterator[List[Message]]:
+    while True:
+        chunk = list(islice(messages, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-audit a chat_histories export with MedicalSafetyLayer")
+    parser.add_argument("export", type=Path, help="chat_histories export (.jsonl or .csv)")
+    parser.add_argument("--rules", default=None, help="Rule pack to audit with (default: SAFETY_RULES_PATH / shipped pack)")
+    parser.add_argument("--baseline-rules", default=None, help="Previous rule pack to diff verdicts against")
+    parser.add_argument("--diff-out", type=Path, default=Path("audit_changed.jsonl"))
+    parser.add_argument("--out", type=Path, default=None, help="Write the summary as JSON")
+    parser.add_argument("--query-type", default="faq", help="Query type when metadata has none")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    if not args.export.exists():
+        print(f"❌ Export not found: {args.export}")
+        sys.exit(1)
+
+    # Fail on a broken rule pack here rather than in every worker
+    try:
+        versions = {"current": MedicalSafetyLayer(args.rules).ruleset.version}
+        if args.baseline_rules:
+            versions["baseline"] = MedicalSafetyLayer(args.baseline_rules).ruleset.version
+    except RulesetError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    totals = {"chunks": 0, "messages": 0, "actions": Counter(), "violations": Counter(), "transitions": Counter(), "changed": 0}
+    max_in_flight = args.workers * 2
+    start = time.perf_counter()
+
+    diff_file = args.diff_out.open("w", encoding="utf-8") if args.baseline_rules else None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.rules, args.baseline_rules)
+        ) as pool:
+            chunks = chunked(read_export(args.export, args.query_type), args.chunk_size)
+            pending = set()
+
+            def collect(done):
+                for future in done:
+                    result = future.result()
+                    totals["messages"] += result["messages"]
+                    for key in ("actions", "violations", "transitions"):
+                        totals[key].update(result[key])
+                    totals["changed"] += len(result["changed"])
+                    for record in result["changed"]:
+                        diff_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+                    totals["chunks"] += 1
+                    if totals["chunks"] % 100 == 0:
+                        rate = totals["messages"] / (time.perf_counter() - start)
+                        print(f"  {totals['messages']:,} messages ({rate:,.0f}/s)")
+
+            # Bounded window of chunks in flight keeps memory flat
+            for chunk in chunks:
+                pending.add(pool.submit(audit_chunk, chunk))
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(pending)
+    finally:
+        if diff_file:
+            diff_file.close()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "export": str(args.export),
+        "ruleset_version": versions["current"],
+        "baseline_ruleset_version": versions.get("baseline"),
+        "messages": totals["messages"],
+        "actions": dict(totals["actions"]),
+        "violations": [
+            {"type": key.split("|")[0], "severity": key.split("|")[1], "count": count}
+            for key, count in totals["violations"].most_common()
+        ],
+        "elapsed_s": round(elapsed, 1),
+        "messages_per_s": round(totals["messages"] / elapsed) if elapsed else None
+    }
+    if args.baseline_rules:
+        summary["changed"] = totals["changed"]
+        summary["transitions"] = dict(totals["transitions"])
+
+    print("\n" + "=" * 50)
+    print(f"AUDIT ({summary['messages']:,} assistant messages, ruleset {versions['current']})")
+    print("=" * 50)
+    print(f"  Actions: {summary['actions']}")
+    for row in summary["violations"]:
+        print(f"    {row['type']:<22} {row['severity']:<7} {row['count']:>10,}")
+    if args.baseline_rules:
+        print(f"\n  vs {versions['baseline']}: {totals['changed']:,} verdicts changed -> {args.diff_out}")
+        for transition, count in totals["transitions"].most_common():
+            print(f"    {transition:<26} {count:>10,}")
+    print(f"\n  {elapsed:.1f}s ({summary['messages_per_s']:,} messages/s on {args.workers} workers)")
+
+    if args.out:
+        args.out.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
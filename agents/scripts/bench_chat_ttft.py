@@ -0,0 +1,103 @@
+"""
+Chat Time-To-First-Token Benchmark for KmedTour
+
+Compares time-to-first-token (TTFT) of the SSE endpoint /api/chat/stream
+against the blocking /api/chat endpoint, where the first byte only arrives
+once the whole completion (and safety check) is done.
+
+Usage:
+    python agents/scripts/bench_chat_ttft.py
+    python agents/scripts/bench_chat_ttft.py --url http://localhost:8000 --runs 20
+
+Requires a running agent server (python -m app.main).
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+import httpx
+
+PROMPTS = [
+    "What is rhinoplasty?",
+    "How does hair transplant surgery work?",
+    "Do I need a visa to travel to Korea for treatment?",
+    "What is the recovery process after LASIK?",
+    "Which hospitals in Seoul have international patient centers?",
+]
+
+TTFT_TARGET_MS = 500
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure_blocking(client: httpx.Client, url: str, prompt: str):
+    """Blocking endpoint: first byte == full response"""
+    payload = {"messages": [{"role": "user", "content": prompt}], "session_id": str(uuid.uuid4())}
+    start = time.perf_counter()
+    response = client.post(f"{url}/api/chat", json=payload)
+    total = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+    return total, total
+
+
+def measure_stream(client: httpx.Client, url: str, prompt: str):
+    """SSE endpoint: TTFT is the first `token` event"""
+    payload = {"messages": [{"role": "user", "content": prompt}], "session_id": str(uuid.uuid4())}
+    start = time.perf_counter()
+    ttft = None
+
+    with client.stream("POST", f"{url}/api/chat/stream", json=payload) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if ttft is None and line == "event: token":
+                ttft = (time.perf_counter() - start) * 1000
+
+    total = (time.perf_counter() - start) * 1000
+    return ttft if ttft is not None else total, total
+
+
+def report(name, samples):
+    ttfts = [s[0] for s in samples]
+    totals = [s[1] for s in samples]
+    print(f"  {name:<10} TTFT p50={statistics.median(ttfts):7.0f}ms  p95={percentile(ttfts, 95):7.0f}ms  "
+          f"| total p50={statistics.median(totals):7.0f}ms  p95={percentile(totals, 95):7.0f}ms")
+    return percentile(ttfts, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat TTFT: SSE vs blocking")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--runs", type=int, default=10, help="Requests per prompt and endpoint")
+    args = parser.parse_args()
+
+    blocking, streaming = [], []
+
+    with httpx.Client(timeout=120.0) as client:
+        for run in range(args.runs):
+            for prompt in PROMPTS:
+                blocking.append(measure_blocking(client, args.url, prompt))
+                streaming.append(measure_stream(client, args.url, prompt))
+            print(f"  run {run + 1}/{args.runs} done")
+
+    print("\n" + "=" * 50)
+    print(f"RESULTS ({len(streaming)} requests per endpoint)")
+    print("=" * 50)
+    report("/api/chat", blocking)
+    stream_p95 = report("stream", streaming)
+
+    if stream_p95 > TTFT_TARGET_MS:
+        print(f"\nFAIL: stream TTFT p95 {stream_p95:.0f}ms exceeds {TTFT_TARGET_MS}ms target")
+        sys.exit(1)
+
+    print(f"\nOK: stream TTFT p95 within {TTFT_TARGET_MS}ms target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Conversation Context Window Benchmark for KmedTour
+
+Drives a long chat session through the agent graph and records, per turn,
+the estimated prompt tokens sent to the answering LLM and the turn latency.
+The LLM is simulated (latency grows with prompt size), so this runs offline
+and isolates the effect of windowing + rolling summaries.
+
+Usage:
+    python agents/scripts/bench_context_window.py
+    python agents/scripts/bench_context_window.py --turns 80 --ms-per-1k-tokens 150
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["CHECKPOINT_BACKEND"] = "memory"
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import app.core.graph as graph
+from app.core.context_window import estimate_tokens
+
+QUESTIONS = [
+    "What is the typical recovery time after rhinoplasty in Seoul?",
+    "How long should I plan to stay in Korea after the procedure?",
+    "Do hospitals provide interpreters for English speakers?",
+    "What documents should I bring to my first consultation?",
+    "Can you explain how airport pickup works?",
+]
+
+ANSWER = (
+    "Recovery usually takes one to two weeks before most swelling settles, and "
+    "patients often stay about ten days so the clinic can remove splints and check "
+    "healing. Many international centers provide interpreters and help with "
+    "transport, accommodation and paperwork. Our coordinators can share details."
+)
+
+
+class SimulatedChatModel(BaseChatModel):
+    """Fixed answers; latency = base + cost per 1k prompt tokens"""
+
+    base_ms: float = 50.0
+    ms_per_1k_tokens: float = 100.0
+    prompt_tokens: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError("Graph nodes are async")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any) -> ChatResult:
+        tokens = sum(estimate_tokens(m) for m in messages)
+        is_summary = "max_tokens" in kwargs
+        if not is_summary:
+            self.prompt_tokens.append(tokens)
+        await asyncio.sleep((self.base_ms + self.ms_per_1k_tokens * tokens / 1000) / 1000)
+        text = "Patient asked about rhinoplasty recovery, stay length and logistics." if is_summary else ANSWER
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+async def run_session(turns: int, model: SimulatedChatModel):
+    config = {"configurable": {"thread_id": f"bench-{time.time()}"}}
+    messages: List[BaseMessage] = []
+    rows = []
+
+    for turn in range(1, turns + 1):
+        # Full-history client: resend the whole conversation each turn
+        messages = messages + [HumanMessage(content=f"{QUESTIONS[turn % len(QUESTIONS)]} (turn {turn})")]
+        start = time.perf_counter()
+        result = await graph.app.ainvoke({"messages": messages}, config=config)
+        latency = (time.perf_counter() - start) * 1000
+        messages = result["messages"]
+
+        full_history = sum(estimate_tokens(m) for m in messages[:-1]) + estimate_tokens(graph.MEDICAL_INFO_SYSTEM_PROMPT)
+        rows.append((turn, model.prompt_tokens[-1], full_history, latency))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt size and latency vs. turn count")
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=100.0)
+    args = parser.parse_args()
+
+    model = SimulatedChatModel(ms_per_1k_tokens=args.ms_per_1k_tokens, prompt_tokens=[])
+    graph.llm = model
+
+    rows = asyncio.run(run_session(args.turns, model))
+
+    print(f"{'TURN':>5} | {'PROMPT TOKENS':>13} | {'FULL HISTORY':>12} | {'LATENCY':>9}")
+    print("-" * 50)
+    for turn, prompt, full, latency in rows:
+        if turn == 1 or turn % 10 == 0 or turn == len(rows):
+            print(f"{turn:>5} | {prompt:>13} | {full:>12} | {latency:>7.0f}ms")
+
+    tail = rows[len(rows) // 2:]
+    print("\n" + "=" * 50)
+    print(f"Prompt tokens (2nd half): min={min(r[1] for r in tail)} max={max(r[1] for r in tail)}")
+    print(f"Latency (2nd half):       min={min(r[3] for r in tail):.0f}ms max={max(r[3] for r in tail):.0f}ms")
+    print(f"Full history at turn {rows[-1][0]}: {rows[-1][2]} tokens")
+
+
+if __name__ == "__main__":
+    main()
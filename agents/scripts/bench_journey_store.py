@@ -0,0 +1,130 @@
+"""
+Journey Store Benchmark for KmedTour
+
+Runs the same workload through PatientJourneyStateMachine on each storage
+backend (src/core/journey_store.py) and reports throughput and latency:
+
+    transition - every patient walks the full journey, INQUIRY → COMPLETED
+                 (10 transitions, each with its state_change event)
+    timeline   - get_timeline(limit=20) of random patients, after a few
+                 buffered notes per patient
+
+The supabase backend talks to NEXT_PUBLIC_SUPABASE_URL, so only point it at
+a disposable project; SQLite runs on a temporary file.
+
+Usage:
+    python agents/scripts/bench_journey_store.py
+    python agents/scripts/bench_journey_store.py --patients 500 --concurrency 1 20 --backends memory sqlite
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+from agents.src.core.state_machine import (
+    JourneyState,
+    PatientJourneyStateMachine,
+    StateTransition,
+    create_journey_store,
+)
+
+HAPPY_PATH = [
+    JourneyState.INQUIRY, JourneyState.SCREENING, JourneyState.MATCHING, JourneyState.QUOTE,
+    JourneyState.BOOKING, JourneyState.PRE_TRAVEL, JourneyState.TREATMENT, JourneyState.POST_CARE,
+    JourneyState.FOLLOWUP, JourneyState.COMPLETED,
+]
+NOTES_PER_PATIENT = 5
+
+
+async def run(tasks, concurrency: int):
+    """Await the coroutine factories, concurrency at a time; returns per-call ms and total seconds"""
+    latencies = []
+    queue = list(tasks)
+
+    async def worker():
+        while queue:
+            task = queue.pop()
+            start = time.perf_counter()
+            await task()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start
+
+
+async def walk(sm: PatientJourneyStateMachine, patient_id: str):
+    for from_state, to_state in zip([None] + HAPPY_PATH, HAPPY_PATH):
+        await sm.transition(
+            patient_id,
+            StateTransition(from_state=from_state, to_state=to_state, triggered_by="system")
+        )
+
+
+async def measure(backend: str, path: str, patients: int, reads: int, concurrency: int):
+    kwargs = {"path": path} if backend == "sqlite" else {}
+    sm = PatientJourneyStateMachine(store=create_journey_store(backend, **kwargs))
+    ids = [str(uuid.uuid4()) for _ in range(patients)]
+    results = {}
+    try:
+        # Transition: one timed call per patient walk, reported per transition
+        latencies, elapsed = await run([lambda p=p: walk(sm, p) for p in ids], concurrency)
+        results["transition"] = ([ms / len(HAPPY_PATH) for ms in latencies], patients * len(HAPPY_PATH) / elapsed)
+
+        for patient_id in ids:
+            for n in range(NOTES_PER_PATIENT):
+                await sm._log_event(patient_id=patient_id, event_type="note", triggered_by="system",
+                                    event_data={"n": n})
+        await sm.events.flush()
+
+        rng = random.Random(2026)
+        sample = [rng.choice(ids) for _ in range(reads)]
+        latencies, elapsed = await run([lambda p=p: sm.get_timeline(p, limit=20) for p in sample], concurrency)
+        results["timeline"] = (latencies, reads / elapsed)
+    finally:
+        await sm.events.close()
+        await sm.store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Journey transition and timeline throughput per storage backend")
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"],
+                        help="memory, sqlite and/or supabase")
+    parser.add_argument("--patients", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    print(f"{args.patients} patients x {len(HAPPY_PATH)} transitions, {args.reads} timeline reads\n")
+    print(f"{'BACKEND':<9} | {'OP':<10} | {'CONC':>4} | {'P50':>8} | {'P95':>8} | {'OPS/S':>9}")
+    print("-" * 64)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in args.backends:
+            for concurrency in args.concurrency:
+                path = os.path.join(tmp, f"journeys-{concurrency}.sqlite")
+                results = asyncio.run(measure(backend, path, args.patients, args.reads, concurrency))
+                for op, (latencies, throughput) in results.items():
+                    latencies.sort()
+                    print(
+                        f"{backend:<9} | {op:<10} | {concurrency:>4} | "
+                        f"{statistics.median(latencies):>6.2f}ms | "
+                        f"{latencies[max(int(len(latencies) * 0.95) - 1, 0)]:>6.2f}ms | {throughput:>9,.0f}"
+                    )
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Keyword Matcher Microbenchmark for KmedTour
+Compares the shared single-pass KeywordMatcher against the per-keyword loops
+it replaced, at realistic text lengths:
+
+    route_query      - patient questions, ~60 / ~250 chars
+    check_response   - agent answers, ~500 B / 2 KB / 8 KB
+    voice FastRouter - short transcribed utterances, ~40 chars
+
+Before timing, every sample is checked to give identical results on both
+paths. Runs offline.
+
+Usage:
+    python agents/scripts/bench_keyword_matcher.py
+    python agents/scripts/bench_keyword_matcher.py --iterations 5000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(AGENTS_DIR))
+sys.path.insert(0, str(AGENTS_DIR.parent))
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["CHECKPOINT_BACKEND"] = "memory"
+
+from langchain_core.messages import HumanMessage
+
+from app.core import keyword_matcher
+from app.core.graph import ROUTE_KEYWORDS, route_matcher, route_query
+from app.core.medical_safety import MedicalSafetyLayer
+from agents.src.voice.routers.fast_router import FastRouter
+
+FILLER = (
+    "our coordinators can arrange airport pickup and an interpreter for your consultation "
+    "at partner clinics in seoul and busan most patients stay about ten days and recovery "
+    "depends on the procedure please bring your passport and recent medical records"
+).split()
+
+SAFETY_PHRASES = [
+    "the price is $2,400 for the package.", "i recommend booking early.",
+    "i cannot recommend a specific dosage.", "this is the best clinic in gangnam.",
+    "call us if you notice severe bleeding.", "the hospital is internationally accredited.",
+]
+
+QUESTION_PHRASES = [
+    "how does the surgery work", "what is recovery like", "should i get a consult",
+    "i have chest pain", "how much is lasik", "do you help with visas",
+]
+
+UTTERANCES = [
+    "hello there", "what time do you open", "where is the clinic", "how much is it",
+    "can i speak to a human please", "i want to book an appointment", "my tooth hurts",
+    "thanks that is all", "i think i am dying",
+]
+
+
+def legacy_route(text):
+    query = text.lower()
+    for category in ("emergency", "human", "medical_info"):
+        if any(keyword in query for keyword in ROUTE_KEYWORDS[category]):
+            return category
+    return "faq"
+
+
+def legacy_safety_hits(layer, text):
+    """Pattern loop of the previous check_response (detection only)"""
+    lower = text.lower()
+    patterns = (
+        layer.EMERGENCY_PATTERNS + layer.MEDICAL_ADVICE_PATTERNS
+        + layer.PRICING_PATTERNS + layer.ACCREDITATION_PATTERNS
+        + [layer.ADVICE_NEGATION_PATTERN]
+    )
+    return {pattern for pattern in patterns if re.search(pattern, lower)}
+
+
+LEGACY_VOICE = [(re.compile(pattern, re.IGNORECASE), intent) for pattern, intent in FastRouter.PATTERNS]
+
+
+def legacy_voice(text):
+    for pattern, intent in LEGACY_VOICE:
+        if pattern.search(text.strip()):
+            return intent
+    return None
+
+
+def make_text(rng, length, phrases):
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        if rng.random() < 0.03:
+            words.append(rng.choice(phrases))
+        else:
+            words.append(rng.choice(FILLER))
+    return " ".join(words)
+
+
+def timeit(fn, samples, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(samples[i % len(samples)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared keyword matcher vs. legacy loops")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    layer = MedicalSafetyLayer()
+    voice_matcher = FastRouter._matcher
+
+    def new_safety_hits(text):
+        return {pattern for _, pattern in layer._matcher.matched_patterns(text)}
+
+    def new_route(text):
+        return route_matcher.first_category(text) or "faq"
+
+    # route_query is a thin wrapper over route_matcher
+    assert route_query({"messages": [HumanMessage(content="I have chest pain")]}) == "emergency"
+
+    cases = [
+        ("route_query", 60, QUESTION_PHRASES, legacy_route, new_route),
+        ("route_query", 250, QUESTION_PHRASES, legacy_route, new_route),
+        ("check_response", 500, SAFETY_PHRASES, lambda t: legacy_safety_hits(layer, t), new_safety_hits),
+        ("check_response", 2048, SAFETY_PHRASES, lambda t: legacy_safety_hits(layer, t), new_safety_hits),
+        ("check_response", 8192, SAFETY_PHRASES, lambda t: legacy_safety_hits(layer, t), new_safety_hits),
+        ("voice route", 40, UTTERANCES, legacy_voice, lambda t: voice_matcher.first_category(t.strip())),
+    ]
+
+    backend = "pyahocorasick" if keyword_matcher.ahocorasick else "str.find fallback"
+    print(f"Literal pass: {backend}\n")
+    print(f"{'CASE':<16} | {'CHARS':>6} | {'LEGACY':>10} | {'MATCHER':>10} | {'SPEEDUP':>7}")
+    print("-" * 62)
+
+    for name, length, phrases, legacy, new in cases:
+        if name == "voice route":
+            samples = [rng.choice(UTTERANCES) for _ in range(200)]
+        else:
+            samples = [make_text(rng, length, phrases) for _ in range(200)]
+
+        for sample in samples:
+            if legacy(sample) != new(sample):
+                print(f"❌ Result mismatch in {name}: {sample[:80]!r}")
+                sys.exit(1)
+
+        legacy_us = timeit(legacy, samples, args.iterations)
+        new_us = timeit(new, samples, args.iterations)
+        print(f"{name:<16} | {length:>6} | {legacy_us:>8.1f}us | {new_us:>8.1f}us | {legacy_us / new_us:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Regex Engine Benchmark for KmedTour (adversarial inputs)
+
+Times the safety rules on inputs built to make a backtracking engine do as
+much work as possible, at growing sizes, on re and on RE2 (see
+app/core/regex_engine.py). With re the worst case grows quadratically with
+the answer length; with RE2 it stays linear, so doubling the size should
+roughly double the time.
+
+Patterns are the shipped rule pack with the uppercase literals lowercased
+(JCI/KAHF/ISO, KRW/USD/EUR), i.e. as they would run once those rules match
+the lowercased response.
+
+Usage:
+    python agents/scripts/bench_regex_engine.py
+    python agents/scripts/bench_regex_engine.py --sizes 2048 8192 32768 --iterations 5
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core import regex_engine
+from app.core.regex_engine import compile_regex
+from app.core.safety_rules import DEFAULT_RULES_PATH, compile_ruleset
+
+# (name, pattern, builder(size) -> adversarial text)
+CASES = [
+    (
+        "accreditation .* span",
+        r"(jci|kahf|iso).*(accredited|certified|approved)",
+        lambda n: "accredited " + ("iso " * (n // 4)),
+    ),
+    (
+        "pricing comma groups",
+        r"\d{1,3}(,\d{3})* (krw|usd|eur)",
+        lambda n: "krw " + ("1,000" * (n // 5)) + "x",
+    ),
+    (
+        "dosage digits",
+        r"take \d+ (mg|ml|pills)",
+        lambda n: ("take " + "1" * 20 + " ") * (n // 26),
+    ),
+]
+
+
+def best_of(fn, iterations):
+    best = float("inf")
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def fixed_pack():
+    pack = copy.deepcopy(json.loads(DEFAULT_RULES_PATH.read_text(encoding="utf-8")))
+    for check in pack["checks"]:
+        check["patterns"] = [p.replace("KRW|USD|EUR", "krw|usd|eur").replace("JCI|KAHF|ISO", "jci|kahf|iso")
+                             for p in check["patterns"]]
+    return pack
+
+
+def layer_for(engine, pack):
+    from app.core.medical_safety import MedicalSafetyLayer
+
+    os.environ["SAFETY_REGEX_ENGINE"] = engine
+    os.environ["SAFETY_RULES_MAX_SCAN_MS"] = "1000000"
+    layer = MedicalSafetyLayer()
+    layer.reload_interval = 0
+    layer.ruleset = compile_ruleset(pack, source=f"<bench {engine}>")
+    return layer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adversarial-input benchmark: re vs RE2")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 8192, 32768])
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    if not regex_engine.re2_available():
+        print("❌ google-re2 is not installed (pip install google-re2)")
+        sys.exit(1)
+
+    sizes = sorted(args.sizes)
+    growth = sizes[-1] / sizes[0]
+
+    print(f"{'CASE':<24} | {'SIZE':>6} | {'re':>10} | {'RE2':>10}")
+    print("-" * 60)
+    for name, pattern, build in CASES:
+        backtracking, _ = compile_regex(pattern, engine="re")
+        linear, engine = compile_regex(pattern, engine="re2")
+        assert engine == "re2", pattern
+
+        times = []
+        for size in sizes:
+            text = build(size)
+            assert [m.span() for m in backtracking.finditer(text)] == [m.span() for m in linear.finditer(text)]
+            re_ms = best_of(lambda: backtracking.search(text), args.iterations)
+            re2_ms = best_of(lambda: linear.search(text), args.iterations)
+            times.append((re_ms, re2_ms))
+            print(f"{name:<24} | {size:>6} | {re_ms:>8.2f}ms | {re2_ms:>8.3f}ms")
+
+        re_growth = times[-1][0] / max(times[0][0], 1e-6)
+        re2_growth = times[-1][1] / max(times[0][1], 1e-6)
+        print(f"{'':<24} | x{growth:<5.0f} | x{re_growth:<9.0f} | x{re2_growth:<9.0f}")
+
+    # Whole check_response on the worst input, per engine
+    pack = fixed_pack()
+    layers = {engine: layer_for(engine, pack) for engine in ("re", "re2")}
+    print(f"\n{'check_response':<24} | {'SIZE':>6} | {'re':>10} | {'RE2':>10}")
+    print("-" * 60)
+    for size in sizes:
+        text = " ".join(build(size // len(CASES)) for _, _, build in CASES)
+        verdicts = {engine: layer.check_response(text, "medical_info") for engine, layer in layers.items()}
+        assert verdicts["re"] == verdicts["re2"], "engines disagree"
+        re_ms = best_of(lambda: layers["re"].check_response(text, "medical_info"), args.iterations)
+        re2_ms = best_of(lambda: layers["re2"].check_response(text, "medical_info"), args.iterations)
+        print(f"{'':<24} | {len(text):>6} | {re_ms:>8.2f}ms | {re2_ms:>8.3f}ms")
+
+    print("\nMatches and verdicts identical on both engines")
+
+
+if __name__ == "__main__":
+    main()
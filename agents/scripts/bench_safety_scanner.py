@@ -0,0 +1,132 @@
+"""
+Safety Scanner Benchmark for KmedTour
+
+Times MedicalSafetyLayer.check_response against the original implementation
+(four pattern loops of uncompiled re.search, plus a split-and-research of the
+whole text for every excerpt) on synthetic 2-8 KB agent responses, and checks
+that both return identical verdicts (action, violations and excerpts).
+
+Usage:
+    python agents/scripts/bench_safety_scanner.py
+    python agents/scripts/bench_safety_scanner.py --iterations 500 --sizes 2048 4096 8192
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.medical_safety import MedicalSafetyLayer
+
+SENTENCES = [
+    "Rhinoplasty recovery usually takes one to two weeks before most swelling settles",
+    "Our coordinators can arrange airport pickup, accommodation and an interpreter",
+    "Most partner hospitals in Gangnam have dedicated international patient centers",
+    "Please bring your passport, recent medical records and a list of current medications",
+    "The surgeon will review your goals and explain the technique during the consultation",
+    "Follow-up appointments are typically scheduled on day three and day seven",
+]
+
+# Sentences that trigger rules, mixed in at a low rate like real answers
+FLAGGED = [
+    "The price is $2,400 including the consultation",
+    "This is the best clinic in Seoul for revision surgery",
+    "I cannot recommend a specific dosage without a doctor",
+    "I recommend booking at least a month in advance",
+    "Seek care immediately if you notice severe bleeding",
+]
+
+
+class LegacyMedicalSafetyLayer(MedicalSafetyLayer):
+    """check_response as it was before the single-pass scanner"""
+
+    def check_response(self, response, query_type):
+        violations = []
+        response_lower = response.lower()
+
+        if query_type == "emergency":
+            return {"safe": True, "violations": [], "action": "send"}
+
+        for pattern in self.EMERGENCY_PATTERNS:
+            if re.search(pattern, response_lower):
+                violations.append({"type": "emergency_keyword", "severity": "HIGH",
+                                   "excerpt": self._extract_violation(response, pattern), "action": "block"})
+
+        for pattern in self.MEDICAL_ADVICE_PATTERNS:
+            if re.search(pattern, response_lower):
+                if "cannot" in response_lower or "not" in response_lower:
+                    if re.search(r"(cannot|not) (recommend|suggest|advise)", response_lower):
+                        continue
+                violations.append({"type": "medical_advice", "severity": "HIGH",
+                                   "excerpt": self._extract_violation(response, pattern), "action": "block"})
+
+        for pattern in self.PRICING_PATTERNS:
+            if re.search(pattern, response_lower):
+                violations.append({"type": "unverified_pricing", "severity": "MEDIUM",
+                                   "excerpt": self._extract_violation(response, pattern), "action": "flag"})
+
+        for pattern in self.ACCREDITATION_PATTERNS:
+            if re.search(pattern, response_lower):
+                violations.append({"type": "accreditation_claim", "severity": "MEDIUM",
+                                   "excerpt": self._extract_violation(response, pattern), "action": "flag"})
+
+        if any(v["severity"] == "HIGH" for v in violations):
+            return {"safe": False, "violations": violations, "action": "block"}
+        if any(v["severity"] == "MEDIUM" for v in violations):
+            return {"safe": True, "violations": violations, "action": "human_review"}
+        return {"safe": True, "violations": [], "action": "send"}
+
+
+def make_response(rng, size, flag_rate):
+    parts = []
+    while sum(len(p) + 2 for p in parts) < size:
+        pool = FLAGGED if rng.random() < flag_rate else SENTENCES
+        parts.append(rng.choice(pool))
+    return ". ".join(parts) + "."
+
+
+def timeit(layer, samples, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        layer.check_response(samples[i % len(samples)], "medical_info")
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MedicalSafetyLayer.check_response")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 4096, 8192])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    legacy = LegacyMedicalSafetyLayer()
+    scanner = MedicalSafetyLayer()
+
+    print(f"{'SIZE':>6} | {'FLAGS':<8} | {'LEGACY':>10} | {'SCANNER':>10} | {'SPEEDUP':>7}")
+    print("-" * 54)
+
+    for size in args.sizes:
+        for label, flag_rate in (("clean", 0.0), ("flagged", 0.05)):
+            samples = [make_response(rng, size, flag_rate) for _ in range(50)]
+
+            for sample in samples:
+                verdict = scanner.check_response(sample, "medical_info")
+                verdict.pop("ruleset_version")
+                if legacy.check_response(sample, "medical_info") != verdict:
+                    print(f"❌ Verdict mismatch at {size} bytes: {sample[:80]!r}")
+                    sys.exit(1)
+
+            legacy_us = timeit(legacy, samples, args.iterations)
+            scanner_us = timeit(scanner, samples, args.iterations)
+            print(f"{size:>6} | {label:<8} | {legacy_us:>8.0f}us | {scanner_us:>8.0f}us | {legacy_us / scanner_us:>6.1f}x")
+
+    print("\nVerdicts identical on all samples")
+
+
+if __name__ == "__main__":
+    main()
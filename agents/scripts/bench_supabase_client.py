@@ -0,0 +1,154 @@
+"""
+Supabase Client Benchmark for KmedTour (local stand-in server)
+
+Compares the old pattern, a new httpx client per call, with the shared
+pooled client (app/core/supabase_client.py) against a local HTTP server
+that answers like PostgREST. Reports latency per round trip and the number
+of TCP connections the server accepted.
+
+On localhost a connection costs almost nothing, so --handshake-ms delays
+every new connection to stand in for the TCP + TLS handshake to a remote
+Supabase (2-3 RTTs; ~30-90ms from a non-co-located region). Reused
+connections skip it, which is where the pool saves time.
+
+Usage:
+    python agents/scripts/bench_supabase_client.py
+    python agents/scripts/bench_supabase_client.py --requests 300 --concurrency 20 --handshake-ms 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+import httpx
+
+from app.core.supabase_client import SupabaseHTTP
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handshake_ms: float):
+        super().__init__(("127.0.0.1", 0), PostgRESTHandler)
+        self.handshake_s = handshake_ms / 1000
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class PostgRESTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def setup(self):
+        with self.server._lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake_s)
+        super().setup()
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        body = json.dumps([{"patient_id": "p", "state": "inquiry"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+async def fresh_client_call(url: str):
+    # What PatientJourneyStateMachine and ReviewQueue did before
+    async with httpx.AsyncClient() as client:
+        await client.get(f"{url}/rest/v1/patient_journey_state", params={"patient_id": "eq.p"})
+
+
+def pooled_call(http: SupabaseHTTP):
+    scope = http.scoped("bench")
+
+    async def call(url: str):
+        await scope.get(f"{url}/rest/v1/patient_journey_state", params={"patient_id": "eq.p"})
+    return call
+
+
+async def run(call, url: str, requests: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fresh httpx client per call vs shared Supabase pool")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--handshake-ms", type=float, default=30.0,
+                        help="Delay per new connection, standing in for TCP+TLS setup")
+    args = parser.parse_args()
+
+    os.environ["SUPABASE_HTTP2"] = "0"  # the stand-in server speaks HTTP/1.1 only
+    server = StandInServer(args.handshake_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"Stand-in PostgREST at {server.url}, {args.handshake_ms:.0f}ms per new connection\n")
+    print(f"{'CLIENT':<14} | {'CONC':>4} | {'MEAN':>8} | {'P50':>8} | {'P95':>8} | {'REQ/S':>7} | CONNECTIONS")
+    print("-" * 78)
+
+    for concurrency in args.concurrency:
+        results = {}
+        for name in ("fresh client", "shared pool"):
+            http = SupabaseHTTP()
+            call = fresh_client_call if name == "fresh client" else pooled_call(http)
+
+            async def measure():
+                await run(call, server.url, min(concurrency, args.requests), concurrency)  # warm-up
+                before = server.connections
+                latencies, elapsed = await run(call, server.url, args.requests, concurrency)
+                await http.aclose()
+                return latencies, elapsed, server.connections - before
+
+            latencies, elapsed, connections = asyncio.run(measure())
+            latencies.sort()
+            results[name] = statistics.mean(latencies)
+            print(
+                f"{name:<14} | {concurrency:>4} | {results[name]:>6.2f}ms | "
+                f"{statistics.median(latencies):>6.2f}ms | {latencies[int(len(latencies) * 0.95) - 1]:>6.2f}ms | "
+                f"{args.requests / elapsed:>7,.0f} | {connections}"
+            )
+        saved = results["fresh client"] - results["shared pool"]
+        print(f"{'':<14} | {'':>4} | saved {saved:.2f}ms per round trip "
+              f"({saved / results['fresh client']:.0%})\n")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Batch Eval Runner for KmedTour
+
+Sends a prompt set to /api/chat/batch in one request and writes the NDJSON
+results (route, safety action, violations, latency per prompt) to a file as
+they stream back. Replaces looping over /api/chat one request at a time.
+
+Input is JSONL ({"id": ..., "prompt": ...} or {"id": ..., "messages": [...]})
+or plain text with one prompt per line.
+
+Usage:
+    python agents/scripts/run_batch_eval.py prompts.jsonl
+    python agents/scripts/run_batch_eval.py prompts.txt --out results.ndjson --concurrency 16 --no-cache
+
+Requires a running agent server (python -m app.main).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import httpx
+
+
+def load_items(path: Path):
+    items = []
+    for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if path.suffix == ".jsonl":
+            record = json.loads(line)
+            messages = record.get("messages") or [{"role": "user", "content": record["prompt"]}]
+            items.append({"id": str(record.get("id", number)), "messages": messages})
+        else:
+            items.append({"id": str(number), "messages": [{"role": "user", "content": line}]})
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a prompt set through /api/chat/batch")
+    parser.add_argument("prompts", type=Path, help="JSONL or text file of prompts")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--out", type=Path, default=Path("batch_results.ndjson"))
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the FAQ answer cache")
+    args = parser.parse_args()
+
+    items = load_items(args.prompts)
+    if not items:
+        print("❌ No prompts found")
+        sys.exit(1)
+
+    payload = {"items": items, "max_concurrency": args.concurrency, "use_answer_cache": not args.no_cache}
+    summary = None
+    done = 0
+
+    with httpx.Client(timeout=None) as client, args.out.open("w", encoding="utf-8") as out:
+        with client.stream("POST", f"{args.url}/api/chat/batch", json=payload) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                out.write(line + "\n")
+                record = json.loads(line)
+                if record.get("type") == "summary":
+                    summary = record
+                    continue
+                done += 1
+                if done % 50 == 0:
+                    print(f"  {done}/{len(items)} done")
+
+    if summary is None:
+        print("❌ Stream ended without a summary (server error or disconnect)")
+        sys.exit(1)
+
+    print("\n" + "=" * 50)
+    print(f"RESULTS ({summary['items']} prompts, {summary['errors']} errors) -> {args.out}")
+    print("=" * 50)
+    print(f"  Routes:         {summary['routes']}")
+    print(f"  Safety actions: {summary['safety_actions']}")
+    print(f"  Latency p50={summary['latency_ms_p50']}ms  p95={summary['latency_ms_p95']}ms")
+    print(f"  Wall time:      {summary['elapsed_ms'] / 1000:.1f}s")
+
+    if summary["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+KmedTour Medical Tourism Operating System - Journey Event Sink
+
+Buffers journey_events rows in memory and writes them to the journey store
+(see journey_store.py) as batch inserts, by size (JOURNEY_EVENTS_BATCH_SIZE) or time
+(JOURNEY_EVENTS_FLUSH_INTERVAL), instead of one POST per event on the
+request path.
+
+- Event types in JOURNEY_EVENTS_SYNC_TYPES (default: state_change) are
+  written before emit() returns, and a failed write raises, so the caller
+  never reports an audit event that wasn't stored.
+- Every row carries a client-generated id and created_at (the time it was
+  emitted, so the timeline keeps emit order), and inserts ignore duplicate
+  ids, so a retried batch is stored once.
+- A batch that fails every attempt goes back to the front of the buffer
+  and is retried on the next flush. A batch the store rejects (e.g. a 4xx for an
+  unknown patient_id) is retried row by row so one bad event doesn't block
+  the rest; rejected rows are dropped. Events are also dropped when the
+  buffer is over JOURNEY_EVENTS_MAX_PENDING or the final flush at shutdown
+  fails. Every drop is logged and counted.
+- The flusher starts on the first buffered event; the FastAPI lifespan
+  flushes what's left on shutdown (shutdown_state_machine).
+
+Outcomes are counted in kmedtour_journey_events_total{outcome}.
+
+Configuration (env):
+    JOURNEY_EVENTS_BATCH_SIZE     - events per insert (default: 100)
+    JOURNEY_EVENTS_FLUSH_INTERVAL - seconds between flushes (default: 0.5)
+    JOURNEY_EVENTS_MAX_RETRIES    - attempts per batch and flush (default: 3)
+    JOURNEY_EVENTS_MAX_PENDING    - buffered events before the oldest are dropped (default: 10000)
+    JOURNEY_EVENTS_SYNC_TYPES     - comma-separated event types written synchronously (default: state_change)
+"""
+
+import asyncio
+import os
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.metrics import JOURNEY_EVENTS
+
+from .journey_store import JourneyStore, JourneyStoreError, utc_timestamp
+
+
+class JourneyEventSink:
+    """
+    Write-behind buffer for journey_events.
+
+    Usage:
+        sink = JourneyEventSink(store)
+        await sink.emit({"patient_id": ..., "event_type": "note", ...})
+        await sink.emit(state_change_row)        # written before returning
+        await sink.close()                        # shutdown: flush the rest
+    """
+
+    def __init__(self, store: JourneyStore):
+        self.store = store
+
+        self.batch_size = int(os.getenv("JOURNEY_EVENTS_BATCH_SIZE", "100"))
+        self.flush_interval = float(os.getenv("JOURNEY_EVENTS_FLUSH_INTERVAL", "0.5"))
+        self.max_retries = int(os.getenv("JOURNEY_EVENTS_MAX_RETRIES", "3"))
+        self.max_pending = int(os.getenv("JOURNEY_EVENTS_MAX_PENDING", "10000"))
+        self.sync_types = {
+            t.strip() for t in os.getenv("JOURNEY_EVENTS_SYNC_TYPES", "state_change").split(",") if t.strip()
+        }
+
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._flusher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+        self.written = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    async def emit(self, event: Dict[str, Any], durable: Optional[bool] = None) -> None:
+        """
+        Queue one journey_events row.
+
+        Args:
+            event: Row without id/created_at (filled in here)
+            durable: Write before returning; default: event type in JOURNEY_EVENTS_SYNC_TYPES
+
+        Raises:
+            Exception: a durable write failed
+        """
+        row = {
+            "id": str(uuid.uuid4()),
+            "created_at": utc_timestamp(),
+            **event
+        }
+        if durable is None:
+            durable = row.get("event_type") in self.sync_types
+
+        if durable:
+            if await self._insert([row], self.max_retries) != "ok":
+                self._record_drop(1)
+                raise Exception(f"Failed to log {row.get('event_type')} event: {self.last_error}")
+            return
+
+        self._ensure_flusher()
+        self._pending.append(row)
+        if len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self._record_drop(1)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> bool:
+        """Write everything buffered; False if a batch failed (it stays buffered)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            while self._pending:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                try:
+                    result = await self._insert(batch, self.max_retries)
+                except asyncio.CancelledError:
+                    # Flusher stopped mid-insert (shutdown): close() writes it
+                    self._pending.extendleft(reversed(batch))
+                    raise
+                if result == "rejected":
+                    await self._insert_rows(batch)
+                elif result != "ok":
+                    self.failed_batches += 1
+                    JOURNEY_EVENTS.labels(outcome="failed").inc(len(batch))
+                    self._pending.extendleft(reversed(batch))
+                    return False
+        return True
+
+    async def close(self) -> None:
+        """Stop the flusher and write what's left (shutdown)"""
+        if self._flusher is not None:
+            flusher, self._flusher = self._flusher, None
+            # Wake it rather than cancel it: on Python 3.11 a cancel racing a
+            # wake-up inside wait_for() can leave the task waiting forever
+            if not flusher.done() and flusher.get_loop() is asyncio.get_running_loop():
+                self._stopping = True
+                self._wake.set()
+                try:
+                    await flusher
+                finally:
+                    self._stopping = False
+
+        if self._pending and not await self.flush():
+            lost = len(self._pending)
+            self._pending.clear()
+            self._record_drop(lost)
+            print(f"[JOURNEY EVENTS] ❌ Lost {lost} events at shutdown: {self.last_error}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "dropped": self.dropped,
+            "last_error": self.last_error
+        }
+
+    def _ensure_flusher(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._flusher is not None and not self._flusher.done() and self._flusher.get_loop() is loop:
+            return
+        # First event, or a new event loop (scripts calling asyncio.run repeatedly)
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                return  # close() writes the rest
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[JOURNEY EVENTS] ❌ Flusher error: {str(e)}")
+
+    async def _insert_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert a rejected batch one row at a time, dropping the rows that are rejected again"""
+        for row in rows:
+            if await self._insert([row], self.max_retries) != "ok":
+                self._record_drop(1)
+                print(f"[JOURNEY EVENTS] ❌ Dropped {row.get('event_type')} event for {row.get('patient_id')}: {self.last_error}")
+
+    async def _insert(self, rows: List[Dict[str, Any]], retries: int) -> str:
+        """
+        One batch insert, with exponential backoff between attempts.
+
+        Returns "ok", "rejected" (retrying won't help, e.g. a 4xx) or "failed".
+        """
+        for attempt in range(max(retries, 1)):
+            if attempt:
+                await asyncio.sleep(min(0.25 * 2 ** (attempt - 1), 5.0))
+            try:
+                await self.store.insert_events(rows)
+            except JourneyStoreError as e:
+                self.last_error = str(e)
+                print(f"[JOURNEY EVENTS] ❌ Failed to write {len(rows)} events: {self.last_error}")
+                if not e.retryable:
+                    return "rejected"
+                continue
+            self.written += len(rows)
+            JOURNEY_EVENTS.labels(outcome="written").inc(len(rows))
+            return "ok"
+        return "failed"
+
+    def _record_drop(self, count: int) -> None:
+        self.dropped += count
+        JOURNEY_EVENTS.labels(outcome="dropped").inc(count)
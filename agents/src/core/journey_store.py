@@ -0,0 +1,548 @@
+"""
+KmedTour Medical Tourism Operating System - Journey Storage Backends
+
+Where PatientJourneyStateMachine keeps journeys and their event timeline:
+
+    supabase - PostgREST; transitions are the journey_transition() /
+               journey_transition_many() Postgres functions (production)
+    sqlite   - local file in WAL mode (laptop, CI, load tests)
+    memory   - dicts in this process (unit tests, benchmarks)
+
+Rows are dicts shaped like the Supabase tables (patient_journey_state,
+journey_events) and transitions return what journey_transition() returns,
+so the state machine, its cache and the event sink work the same on every
+backend. The local stores apply the transition rules of
+supabase/migrations/20261018_journey_atomic_transition.sql and
+20261018_journey_bulk_transition.sql in Python, in one transaction per call.
+
+Configuration (env):
+    JOURNEY_STORE       - supabase | sqlite | memory (default: supabase)
+    JOURNEY_SQLITE_PATH - SQLite file (default: data/journeys.sqlite)
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.core.supabase_client import supabase_http
+
+EVENT_COLUMNS = [
+    "id", "patient_id", "event_type", "from_state", "to_state", "triggered_by", "agent_id",
+    "coordinator_id", "coordinator_name", "event_data", "error_message", "created_at"
+]
+STATE_COLUMNS = [
+    "patient_id", "state", "previous_state", "state_entered_at", "thread_id", "current_stage", "metadata",
+    "assigned_coordinator_id", "assigned_coordinator_name", "last_updated_at", "version"
+]
+
+
+def utc_timestamp() -> str:
+    """ISO 8601 UTC timestamp with fixed-width microseconds, so timestamps sort as text"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+class JourneyStoreError(Exception):
+    """A storage call failed; retryable is False when repeating it can't succeed (bad request, unknown patient)"""
+    def __init__(self, message: str, retryable: bool = True, status_code: Optional[int] = None):
+        self.retryable = retryable
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class JourneyStore:
+    """
+    Storage interface of the journey state machine.
+
+    transition items: {"patient_id", "to_state", "triggered_by", "expected_state",
+    "expected_version", "force", "agent_id", "coordinator_id", "coordinator_name",
+    "event_data"}. Outcomes: {"patient_id", "status": "ok" | "conflict" |
+    "invalid" | "not_found", "from_state", "to_state", "state": row or None}.
+    """
+
+    name = "base"
+
+    async def get_states(self, patient_ids: List[str]) -> List[Dict[str, Any]]:
+        """patient_journey_state rows of the patients that have a journey"""
+        raise NotImplementedError
+
+    async def transition(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply one transition and log its state_change event; creates the journey if missing"""
+        raise NotImplementedError
+
+    async def transition_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Apply a batch of transitions to existing journeys (missing ones are "not_found")"""
+        raise NotImplementedError
+
+    async def assign_coordinator(
+        self,
+        patient_ids: List[str],
+        coordinator_id: str,
+        coordinator_name: str
+    ) -> List[Dict[str, Any]]:
+        """Set the coordinator of existing journeys; returns the updated rows"""
+        raise NotImplementedError
+
+    async def insert_events(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert journey_events rows; rows whose id already exists are skipped"""
+        raise NotImplementedError
+
+    async def get_events(
+        self,
+        patient_id: str,
+        limit: int = 50,
+        event_types: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        """A patient's events, newest first"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+# ============================================================================
+# Supabase (PostgREST)
+# ============================================================================
+
+class PostgrestJourneyStore(JourneyStore):
+    """Supabase REST over the shared connection pool (app.core.supabase_client)"""
+
+    name = "supabase"
+
+    def __init__(self, supabase_url: str = None, supabase_key: str = None):
+        self.supabase_url = supabase_url or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+        self.supabase_key = supabase_key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+        if not self.supabase_url or not self.supabase_key:
+            raise ValueError(
+                "Supabase URL and service role key are required "
+                "(or set JOURNEY_STORE=sqlite to run without Supabase)"
+            )
+
+        self.headers = {
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}",
+            "Content-Type": "application/json",
+            "Prefer": "return=representation"
+        }
+        self._http = supabase_http.scoped("journey_state")
+
+    async def _call(self, method: str, path: str, action: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self._http.request(
+                method, f"{self.supabase_url}/rest/v1/{path}", headers=kwargs.pop("headers", self.headers), **kwargs
+            )
+        except httpx.HTTPError as e:
+            raise JourneyStoreError(f"Failed to {action}: {str(e)}")
+
+        if response.status_code not in [200, 201, 204]:
+            raise JourneyStoreError(
+                f"Failed to {action}: {response.status_code} - {response.text[:200]}",
+                retryable=response.status_code >= 500 or response.status_code == 429,
+                status_code=response.status_code
+            )
+        return response
+
+    async def get_states(self, patient_ids: List[str]) -> List[Dict[str, Any]]:
+        if len(patient_ids) == 1:
+            params = {"patient_id": f"eq.{patient_ids[0]}", "select": "*"}
+        else:
+            params = {"patient_id": f"in.({','.join(patient_ids)})", "select": "*"}
+        response = await self._call("GET", "patient_journey_state", "get state", params=params)
+        return response.json()
+
+    async def transition(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._call(
+            "POST", "rpc/journey_transition", "update state",
+            json={f"p_{key}": value for key, value in item.items()}
+        )
+        return {"patient_id": item["patient_id"], **response.json()}
+
+    async def transition_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        response = await self._call("POST", "rpc/journey_transition_many", "update states", json={"p_items": items})
+        return response.json()
+
+    async def assign_coordinator(
+        self,
+        patient_ids: List[str],
+        coordinator_id: str,
+        coordinator_name: str
+    ) -> List[Dict[str, Any]]:
+        response = await self._call(
+            "PATCH", "patient_journey_state", "assign coordinator",
+            params={"patient_id": f"in.({','.join(patient_ids)})"},
+            json={
+                "assigned_coordinator_id": coordinator_id,
+                "assigned_coordinator_name": coordinator_name,
+                "last_updated_at": utc_timestamp()
+            }
+        )
+        return response.json()
+
+    async def insert_events(self, rows: List[Dict[str, Any]]) -> None:
+        await self._call(
+            "POST", "journey_events", "write events",
+            headers={**self.headers, "Prefer": "return=minimal,resolution=ignore-duplicates"},
+            params={"on_conflict": "id"},
+            json=rows
+        )
+
+    async def get_events(
+        self,
+        patient_id: str,
+        limit: int = 50,
+        event_types: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        params = {
+            "patient_id": f"eq.{patient_id}",
+            "order": "created_at.desc",
+            "limit": str(limit)
+        }
+        if event_types:
+            params["event_type"] = f"in.({','.join(event_types)})"
+
+        response = await self._call("GET", "journey_events", "get timeline", params=params)
+        return response.json()
+
+
+# ============================================================================
+# Local stores
+# ============================================================================
+
+class LocalJourneyStore(JourneyStore):
+    """
+    The journey_transition() rules in Python, for stores in this process.
+
+    Subclasses provide _transaction (run a function atomically) and the
+    row primitives it calls: _load, _save, _append_events.
+    """
+
+    def __init__(self, allowed_transitions: Dict[str, List[str]]):
+        # Same as STATE_TRANSITIONS, by state value
+        self.allowed_transitions = allowed_transitions
+
+    async def _transaction(self, fn: Callable[[], Any], write: bool = True) -> Any:
+        raise NotImplementedError
+
+    def _load(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _save(self, row: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _append_events(self, rows: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    async def get_states(self, patient_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._transaction(lambda: list(self._load(patient_ids).values()))
+
+    async def transition(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._transaction(lambda: self._apply(item, create=True))
+
+    async def transition_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self._transaction(lambda: [self._apply(item, create=False) for item in items])
+
+    async def assign_coordinator(
+        self,
+        patient_ids: List[str],
+        coordinator_id: str,
+        coordinator_name: str
+    ) -> List[Dict[str, Any]]:
+        def assign():
+            now = utc_timestamp()
+            rows = []
+            for row in self._load(patient_ids).values():
+                row.update(
+                    assigned_coordinator_id=coordinator_id,
+                    assigned_coordinator_name=coordinator_name,
+                    last_updated_at=now
+                )
+                self._save(row)
+                rows.append(row)
+            return rows
+
+        return await self._transaction(assign)
+
+    async def insert_events(self, rows: List[Dict[str, Any]]) -> None:
+        await self._transaction(lambda: self._append_events(rows))
+
+    def _apply(self, item: Dict[str, Any], create: bool) -> Dict[str, Any]:
+        patient_id = item["patient_id"]
+        to_state = item["to_state"]
+        row = self._load([patient_id]).get(patient_id)
+        outcome = {"patient_id": patient_id, "from_state": None, "to_state": to_state, "state": row}
+        now = utc_timestamp()
+
+        if row is None:
+            if not create:
+                return {**outcome, "status": "not_found"}
+            if item.get("expected_state") is not None or (item.get("expected_version") or 0) != 0:
+                return {**outcome, "status": "conflict"}
+            if not item.get("force") and to_state != "INQUIRY":
+                return {**outcome, "status": "invalid"}
+            row = {
+                "patient_id": patient_id,
+                "state": to_state,
+                "previous_state": None,
+                "state_entered_at": now,
+                "thread_id": f"thread_{patient_id}",
+                "current_stage": to_state,  # Legacy field
+                "metadata": {"created_by": item.get("triggered_by"), "agent_id": item.get("agent_id")},
+                "assigned_coordinator_id": None,
+                "assigned_coordinator_name": None,
+                "last_updated_at": now,
+                "version": 1
+            }
+        else:
+            from_state = row["state"]
+            outcome["from_state"] = from_state
+            if (item.get("expected_state") is not None and item["expected_state"] != from_state) \
+                    or (item.get("expected_version") is not None and item["expected_version"] != row["version"]):
+                return {**outcome, "status": "conflict"}
+            if not item.get("force") and to_state not in self.allowed_transitions.get(from_state, []):
+                return {**outcome, "status": "invalid"}
+
+            row = {
+                **row,
+                "state": to_state,
+                "previous_state": from_state,
+                "state_entered_at": now,
+                "last_updated_at": now,
+                "current_stage": to_state,
+                "version": row["version"] + 1,
+                "metadata": {
+                    **(row.get("metadata") or {}),
+                    "last_transition": {
+                        "from": from_state,
+                        "to": to_state,
+                        "triggered_by": item.get("triggered_by") or "system",
+                        "agent_id": item.get("agent_id"),
+                        "at": now
+                    }
+                }
+            }
+
+        self._save(row)
+        self._append_events([{
+            "id": str(uuid.uuid4()),
+            "patient_id": patient_id,
+            "event_type": "state_change",
+            "from_state": outcome["from_state"],
+            "to_state": to_state,
+            "triggered_by": item.get("triggered_by") or "system",
+            "agent_id": item.get("agent_id"),
+            "coordinator_id": item.get("coordinator_id"),
+            "coordinator_name": item.get("coordinator_name"),
+            "event_data": item.get("event_data") or {},
+            "error_message": None,
+            "created_at": now
+        }])
+        return {**outcome, "status": "ok", "state": row}
+
+
+class MemoryJourneyStore(LocalJourneyStore):
+    """Journeys in this process only; lost on restart and not shared between workers"""
+
+    name = "memory"
+
+    def __init__(self, allowed_transitions: Dict[str, List[str]]):
+        super().__init__(allowed_transitions)
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, List[Dict[str, Any]]] = {}  # patient_id -> events, in insert order
+        self._event_ids = set()
+        self._lock = threading.Lock()
+
+    async def _transaction(self, fn: Callable[[], Any], write: bool = True) -> Any:
+        with self._lock:
+            return fn()
+
+    @staticmethod
+    def _copy(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {**row, "metadata": dict(row.get("metadata") or {})}
+
+    def _load(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {
+            patient_id: self._copy(self._states[patient_id])
+            for patient_id in patient_ids if patient_id in self._states
+        }
+
+    def _save(self, row: Dict[str, Any]) -> None:
+        self._states[row["patient_id"]] = self._copy(row)
+
+    def _append_events(self, rows: List[Dict[str, Any]]) -> None:
+        for row in rows:
+            if row["id"] in self._event_ids:
+                continue
+            self._event_ids.add(row["id"])
+            self._events.setdefault(row["patient_id"], []).append(
+                {**{column: None for column in EVENT_COLUMNS}, **row}
+            )
+
+    async def get_events(
+        self,
+        patient_id: str,
+        limit: int = 50,
+        event_types: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            events = [
+                event for event in reversed(self._events.get(patient_id, []))
+                if not event_types or event["event_type"] in event_types
+            ]
+        # Stable: events with the same timestamp stay newest-inserted first
+        events.sort(key=lambda event: event["created_at"], reverse=True)
+        return [dict(event) for event in events[:limit]]
+
+
+class SQLiteJourneyStore(LocalJourneyStore):
+    """
+    Journeys in a SQLite file (WAL mode), one connection per store.
+
+    Calls run in a worker thread, serialized by a lock; each write is one
+    BEGIN IMMEDIATE transaction, so a transition's state and event commit
+    together.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = [
+        """
+        CREATE TABLE IF NOT EXISTS patient_journey_state (
+            patient_id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            previous_state TEXT,
+            state_entered_at TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            current_stage TEXT,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            assigned_coordinator_id TEXT,
+            assigned_coordinator_name TEXT,
+            last_updated_at TEXT NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS journey_events (
+            id TEXT PRIMARY KEY,
+            patient_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            from_state TEXT,
+            to_state TEXT,
+            triggered_by TEXT NOT NULL,
+            agent_id TEXT,
+            coordinator_id TEXT,
+            coordinator_name TEXT,
+            event_data TEXT NOT NULL DEFAULT '{}',
+            error_message TEXT,
+            created_at TEXT NOT NULL
+        )
+        """,
+        # Timeline: WHERE patient_id = ? ORDER BY created_at DESC LIMIT ?
+        """
+        CREATE INDEX IF NOT EXISTS idx_journey_events_patient_created
+            ON journey_events (patient_id, created_at DESC)
+        """,
+    ]
+
+    # Bound parameters per IN (...) query, under SQLite's default limit of 999
+    MAX_PARAMS = 500
+
+    def __init__(self, allowed_transitions: Dict[str, List[str]], path: str = None):
+        super().__init__(allowed_transitions)
+        path = path or os.getenv("JOURNEY_SQLITE_PATH", "data/journeys.sqlite")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in self.SCHEMA:
+            self.conn.execute(statement)
+        self._lock = threading.Lock()
+
+    async def _transaction(self, fn: Callable[[], Any], write: bool = True) -> Any:
+        return await asyncio.to_thread(self._run, fn, write)
+
+    def _run(self, fn: Callable[[], Any], write: bool) -> Any:
+        with self._lock:
+            try:
+                if not write:
+                    return fn()
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = fn()
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+                self.conn.execute("COMMIT")
+                return result
+            except sqlite3.Error as e:
+                raise JourneyStoreError(f"SQLite error: {str(e)}", retryable=isinstance(e, sqlite3.OperationalError))
+
+    def _load(self, patient_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        rows = {}
+        for offset in range(0, len(patient_ids), self.MAX_PARAMS):
+            chunk = patient_ids[offset:offset + self.MAX_PARAMS]
+            cursor = self.conn.execute(
+                f"SELECT {', '.join(STATE_COLUMNS)} FROM patient_journey_state "
+                f"WHERE patient_id IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            for values in cursor:
+                row = dict(zip(STATE_COLUMNS, values))
+                row["metadata"] = json.loads(row["metadata"])
+                rows[row["patient_id"]] = row
+        return rows
+
+    def _save(self, row: Dict[str, Any]) -> None:
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO patient_journey_state ({', '.join(STATE_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(STATE_COLUMNS))})",
+            [json.dumps(row.get(c) or {}) if c == "metadata" else row.get(c) for c in STATE_COLUMNS]
+        )
+
+    def _append_events(self, rows: List[Dict[str, Any]]) -> None:
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO journey_events ({', '.join(EVENT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(EVENT_COLUMNS))})",
+            [
+                [json.dumps(row.get(c) or {}) if c == "event_data" else row.get(c) for c in EVENT_COLUMNS]
+                for row in rows
+            ]
+        )
+
+    async def get_states(self, patient_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._transaction(lambda: list(self._load(patient_ids).values()), write=False)
+
+    async def get_events(
+        self,
+        patient_id: str,
+        limit: int = 50,
+        event_types: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        def read():
+            sql = f"SELECT {', '.join(EVENT_COLUMNS)} FROM journey_events WHERE patient_id = ?"
+            params: List[Any] = [patient_id]
+            if event_types:
+                sql += f" AND event_type IN ({', '.join('?' * len(event_types))})"
+                params.extend(event_types)
+            sql += " ORDER BY created_at DESC, rowid DESC LIMIT ?"
+            params.append(limit)
+
+            events = []
+            for values in self.conn.execute(sql, params):
+                event = dict(zip(EVENT_COLUMNS, values))
+                event["event_data"] = json.loads(event["event_data"])
+                events.append(event)
+            return events
+
+        return await self._transaction(read, write=False)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.conn.close)
@@ -3,25 +3,67 @@ KmedTour Medical Tourism Operating System - State Machine
 
 This module provides the core patient journey state machine with:
 - State transition validation
-- Persistent state storage via Supabase
+- Persistent state storage via Supabase, each transition one atomic
+  journey_transition() call with optimistic concurrency (version column),
+  or a local SQLite / in-memory store (see journey_store.py, JOURNEY_STORE)
 - Event logging for audit trail
 - Crash recovery support
 
 Journey States:
     INQUIRY → SCREENING → MATCHING → QUOTE → BOOKING →
     PRE_TRAVEL → TREATMENT → POST_CARE → FOLLOWUP → COMPLETED
+
+get_state is read-through cached per process for a few seconds, so a
+coordinator dashboard polling /state, or an endpoint that reads the state
+and then transitions, doesn't pay a Supabase round trip each time. Writes
+made through this class refresh the cached record. Writes from another
+worker or outside the app can be seen up to JOURNEY_STATE_CACHE_TTL late.
+
+Audit events (notes, assignments, recovery attempts) go through a
+write-behind JourneyEventSink (see event_sink.py) and are inserted in
+batches; state_change events are written before the call returns.
+
+Configuration (env):
+    JOURNEY_STORE                   - supabase | sqlite | memory (default: supabase)
+    JOURNEY_STATE_CACHE_TTL         - seconds a state is served from memory (default: 5, 0 = off)
+    JOURNEY_STATE_CACHE_MAX_ENTRIES - patients cached per process (default: 10000)
 """
 
+from collections import OrderedDict
 from enum import Enum
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 import os
-import httpx
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
 
+# Same module path as app.main so metrics and the client pool are shared
+from app.core.metrics import JOURNEY_STATE_CACHE
+from .event_sink import JourneyEventSink
+from .journey_store import (
+    JourneyStore,
+    JourneyStoreError,
+    MemoryJourneyStore,
+    PostgrestJourneyStore,
+    SQLiteJourneyStore,
+)
+
 load_dotenv()
 
+# Patients per bulk request (keeps patient_id=in.(...) URLs short)
+BULK_CHUNK = 200
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
 
 class JourneyState(str, Enum):
     """Patient journey states matching database enum"""
@@ -56,12 +98,31 @@ STATE_TRANSITIONS: Dict[JourneyState, List[JourneyState]] = {
 
 class InvalidTransitionError(Exception):
     """Raised when an invalid state transition is attempted"""
-    def __init__(self, from_state: JourneyState, to_state: JourneyState):
+    def __init__(self, from_state: Optional[JourneyState], to_state: JourneyState):
         self.from_state = from_state
         self.to_state = to_state
+        if from_state is None:
+            message = f"A new journey must start at {JourneyState.INQUIRY.value}, not {to_state.value}"
+        else:
+            message = (
+                f"Invalid state transition from {from_state.value} to {to_state.value}. "
+                f"Valid transitions: {[s.value for s in STATE_TRANSITIONS.get(from_state, [])]}"
+            )
+        super().__init__(message)
+
+
+class TransitionConflictError(Exception):
+    """Raised when the journey changed between reading it and transitioning"""
+    def __init__(self, patient_id: str, transition: "StateTransition", current: Optional["JourneyStateRecord"]):
+        self.patient_id = patient_id
+        self.transition = transition
+        self.current = current
+        expected = transition.from_state.value if transition.from_state else "any state"
+        found = f"{current.state.value} (version {current.version})" if current else "no journey"
         super().__init__(
-            f"Invalid state transition from {from_state.value} to {to_state.value}. "
-            f"Valid transitions: {[s.value for s in STATE_TRANSITIONS.get(from_state, [])]}"
+            f"Journey of {patient_id} changed concurrently: expected {expected}"
+            + (f" at version {transition.expected_version}" if transition.expected_version is not None else "")
+            + f", found {found}"
         )
 
 
@@ -76,6 +137,7 @@ class StateTransition:
     coordinator_name: Optional[str] = None
     event_data: Dict[str, Any] = field(default_factory=dict)
     force: bool = False  # Allow coordinators to bypass validation
+    expected_version: Optional[int] = None  # Optimistic lock: 0 = journey must not exist yet
 
 
 @dataclass
@@ -89,11 +151,27 @@ class JourneyStateRecord:
     metadata: Dict[str, Any]
     assigned_coordinator_name: Optional[str]
     last_updated_at: datetime
+    version: int = 0  # Bumped on every state change
+
+
+def create_journey_store(backend: str = None, **kwargs) -> JourneyStore:
+    """Build the journey store selected by JOURNEY_STORE"""
+    backend = (backend or os.getenv("JOURNEY_STORE", "supabase")).lower()
+    allowed = {state.value: [to.value for to in targets] for state, targets in STATE_TRANSITIONS.items()}
+
+    if backend == "supabase":
+        return PostgrestJourneyStore(**kwargs)
+    if backend == "sqlite":
+        return SQLiteJourneyStore(allowed, **kwargs)
+    if backend == "memory":
+        return MemoryJourneyStore(allowed)
+
+    raise ValueError(f"Unknown JOURNEY_STORE: {backend}")
 
 
 class PatientJourneyStateMachine:
     """
-    Manages patient journey state transitions with Supabase persistence.
+    Manages patient journey state transitions with Supabase (or local) persistence.
 
     Usage:
         sm = PatientJourneyStateMachine()
@@ -113,47 +191,86 @@ class PatientJourneyStateMachine:
         )
     """
 
-    def __init__(self, supabase_url: str = None, supabase_key: str = None):
-        self.supabase_url = supabase_url or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-        self.supabase_key = supabase_key or os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    def __init__(self, supabase_url: str = None, supabase_key: str = None, store: JourneyStore = None):
+        if store is None:
+            if supabase_url or supabase_key:
+                store = PostgrestJourneyStore(supabase_url, supabase_key)
+            else:
+                store = create_journey_store()
+        self.store = store
+        self.events = JourneyEventSink(self.store)
+
+        self.cache_ttl = float(os.getenv("JOURNEY_STATE_CACHE_TTL", "5"))
+        self.cache_max_entries = int(os.getenv("JOURNEY_STATE_CACHE_MAX_ENTRIES", "10000"))
+        # patient_id -> (expires at, record or None for "no journey")
+        self._cache: "OrderedDict[str, Tuple[float, Optional[JourneyStateRecord]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    async def get_state(self, patient_id: str, use_cache: bool = True) -> Optional[JourneyStateRecord]:
+        """
+        Get the current journey state for a patient.
 
-        if not self.supabase_url or not self.supabase_key:
-            raise ValueError("Supabase URL and service role key are required")
+        Served from the per-process cache when fresh; use_cache=False always
+        reads the store (and refreshes the cache).
+        """
+        if use_cache and self.cache_ttl > 0:
+            with self._cache_lock:
+                cached = self._cache.get(patient_id)
+                if cached is not None and cached[0] > time.monotonic():
+                    self._cache.move_to_end(patient_id)
+                    self.cache_hits += 1
+                    JOURNEY_STATE_CACHE.labels(result="hit").inc()
+                    return cached[1]
+            self.cache_misses += 1
+            JOURNEY_STATE_CACHE.labels(result="miss").inc()
+
+        rows = await self.store.get_states([patient_id])
+        record = self._to_record(rows[0]) if rows else None
+        self._cache_put(patient_id, record)
+        return record
 
-        self.headers = {
-            "apikey": self.supabase_key,
-            "Authorization": f"Bearer {self.supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
+    # --- State cache ---
+
+    def _cache_put(self, patient_id: str, record: Optional[JourneyStateRecord]) -> None:
+        if self.cache_ttl <= 0:
+            return
+        with self._cache_lock:
+            self._cache[patient_id] = (time.monotonic() + self.cache_ttl, record)
+            self._cache.move_to_end(patient_id)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, patient_id: str) -> None:
+        """Drop a patient's cached state (e.g. after a write made elsewhere)"""
+        with self._cache_lock:
+            self._cache.pop(patient_id, None)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "store": self.store.name,
+            "entries": len(self._cache),
+            "ttl_seconds": self.cache_ttl,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0
         }
 
-    async def get_state(self, patient_id: str) -> Optional[JourneyStateRecord]:
-        """Get the current journey state for a patient"""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.supabase_url}/rest/v1/patient_journey_state",
-                headers=self.headers,
-                params={"patient_id": f"eq.{patient_id}", "select": "*"}
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to get state: {response.text}")
-
-            data = response.json()
-            if not data:
-                return None
-
-            record = data[0]
-            return JourneyStateRecord(
-                patient_id=record["patient_id"],
-                state=JourneyState(record["state"]),
-                previous_state=JourneyState(record["previous_state"]) if record.get("previous_state") else None,
-                state_entered_at=datetime.fromisoformat(record["state_entered_at"].replace("Z", "+00:00")),
-                thread_id=record["thread_id"],
-                metadata=record.get("metadata", {}),
-                assigned_coordinator_name=record.get("assigned_coordinator_name"),
-                last_updated_at=datetime.fromisoformat(record["last_updated_at"].replace("Z", "+00:00"))
-            )
+    @staticmethod
+    def _to_record(record: Dict[str, Any]) -> JourneyStateRecord:
+        return JourneyStateRecord(
+            patient_id=record["patient_id"],
+            state=JourneyState(record["state"]),
+            previous_state=JourneyState(record["previous_state"]) if record.get("previous_state") else None,
+            state_entered_at=datetime.fromisoformat(record["state_entered_at"].replace("Z", "+00:00")),
+            thread_id=record["thread_id"],
+            metadata=record.get("metadata", {}),
+            assigned_coordinator_name=record.get("assigned_coordinator_name"),
+            last_updated_at=datetime.fromisoformat(record["last_updated_at"].replace("Z", "+00:00")),
+            version=record.get("version") or 0
+        )
 
     def validate_transition(
         self,
@@ -194,91 +311,187 @@ class PatientJourneyStateMachine:
         """
         Transition a patient to a new state.
 
-        This method:
-        1. Validates the transition (unless forced)
-        2. Updates the state in Supabase
-        3. Logs the event to journey_events
+        One store call (on Supabase, the journey_transition() Postgres
+        function), which in a single transaction, holding the row lock:
+        1. Checks the expected state/version (compare-and-swap)
+        2. Validates the transition (unless forced)
+        3. Creates or updates the state
+        4. Logs the state_change event to journey_events
 
         Args:
             patient_id: The patient's UUID
-            transition: StateTransition object with details
+            transition: StateTransition object with details. from_state and
+                expected_version, when set, must match the stored journey.
 
         Returns:
             Dict with success status and new state info
+
+        Raises:
+            InvalidTransitionError: not allowed from the current state
+            TransitionConflictError: the journey changed since the caller read it
         """
-        # Get current state
-        current_record = await self.get_state(patient_id)
-        current_state = current_record.state if current_record else None
-
-        # Validate transition
-        self.validate_transition(current_state, transition.to_state, transition.force)
-
-        async with httpx.AsyncClient() as client:
-            if current_record is None:
-                # Create new state record
-                response = await client.post(
-                    f"{self.supabase_url}/rest/v1/patient_journey_state",
-                    headers=self.headers,
-                    json={
-                        "patient_id": patient_id,
-                        "state": transition.to_state.value,
-                        "previous_state": None,
-                        "thread_id": f"thread_{patient_id}",
-                        "current_stage": transition.to_state.value,  # Legacy field
-                        "metadata": {
-                            "created_by": transition.triggered_by,
-                            "agent_id": transition.agent_id
-                        }
-                    }
-                )
-            else:
-                # Update existing state
-                response = await client.patch(
-                    f"{self.supabase_url}/rest/v1/patient_journey_state",
-                    headers=self.headers,
-                    params={"patient_id": f"eq.{patient_id}"},
-                    json={
-                        "state": transition.to_state.value,
-                        "previous_state": current_state.value if current_state else None,
-                        "state_entered_at": datetime.utcnow().isoformat(),
-                        "last_updated_at": datetime.utcnow().isoformat(),
-                        "current_stage": transition.to_state.value,  # Legacy field
-                        "metadata": {
-                            **(current_record.metadata if current_record else {}),
-                            "last_transition": {
-                                "from": current_state.value if current_state else None,
-                                "to": transition.to_state.value,
-                                "triggered_by": transition.triggered_by,
-                                "agent_id": transition.agent_id,
-                                "at": datetime.utcnow().isoformat()
-                            }
-                        }
-                    }
-                )
+        try:
+            result = await self.store.transition({
+                "patient_id": patient_id,
+                "to_state": transition.to_state.value,
+                "triggered_by": transition.triggered_by,
+                "expected_state": transition.from_state.value if transition.from_state else None,
+                "expected_version": transition.expected_version,
+                "force": transition.force,
+                "agent_id": transition.agent_id,
+                "coordinator_id": transition.coordinator_id,
+                "coordinator_name": transition.coordinator_name,
+                "event_data": transition.event_data or {}
+            })
+        except JourneyStoreError:
+            self.invalidate(patient_id)
+            raise
+
+        record = self._to_record(result["state"]) if result.get("state") else None
+        self._cache_put(patient_id, record)
+        from_state = JourneyState(result["from_state"]) if result.get("from_state") else None
+
+        if result["status"] == "invalid":
+            raise InvalidTransitionError(from_state, transition.to_state)
+        if result["status"] == "conflict":
+            raise TransitionConflictError(patient_id, transition, record)
+
+        return {
+            "success": True,
+            "patient_id": patient_id,
+            "from_state": from_state.value if from_state else None,
+            "to_state": transition.to_state.value,
+            "forced": transition.force,
+            "version": record.version if record else None
+        }
 
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Failed to update state: {response.text}")
+    async def get_states(
+        self,
+        patient_ids: List[str],
+        use_cache: bool = True
+    ) -> Dict[str, Optional[JourneyStateRecord]]:
+        """Current states of many patients, reading the cache misses in one request per BULK_CHUNK ids"""
+        states: Dict[str, Optional[JourneyStateRecord]] = {}
+        missing = []
+        now = time.monotonic()
+        with self._cache_lock:
+            for patient_id in dict.fromkeys(patient_ids):
+                cached = self._cache.get(patient_id) if use_cache and self.cache_ttl > 0 else None
+                if cached is not None and cached[0] > now:
+                    states[patient_id] = cached[1]
+                else:
+                    missing.append(patient_id)
+
+        for offset in range(0, len(missing), BULK_CHUNK):
+            chunk = missing[offset:offset + BULK_CHUNK]
+            rows = await self.store.get_states(chunk)
+            found = {row["patient_id"]: self._to_record(row) for row in rows}
+            for patient_id in chunk:
+                states[patient_id] = found.get(patient_id)
+                self._cache_put(patient_id, states[patient_id])
+        return states
+
+    async def transition_many(self, transitions: List[Tuple[str, StateTransition]]) -> List[Dict[str, Any]]:
+        """
+        Transition many patients at once (coordinator batch operations).
 
-            # Log the event
-            await self._log_event(
-                patient_id=patient_id,
-                event_type="state_change",
-                from_state=current_state,
-                to_state=transition.to_state,
-                triggered_by=transition.triggered_by,
-                agent_id=transition.agent_id,
-                coordinator_id=transition.coordinator_id,
-                coordinator_name=transition.coordinator_name,
-                event_data=transition.event_data
-            )
+        Reads the current states in one request, validates every transition
+        against STATE_TRANSITIONS in memory, then applies the valid ones with
+        one store call per BULK_CHUNK patients (on Supabase,
+        journey_transition_many(): one UPDATE plus one bulk insert of the
+        state_change events). Each applied transition
+        is checked again against the state it was validated on, so a journey
+        changed in between is reported as a conflict, not overwritten.
 
-            return {
-                "success": True,
+        Args:
+            transitions: (patient_id, StateTransition) pairs, one per patient
+
+        Returns:
+            One result per pair, in order (patient_id in canonical UUID
+            form): {"patient_id", "success",
+            "from_state", "to_state", "version", "error"}; error is one of
+            "invalid_patient_id", "duplicate", "not_found",
+            "invalid_transition", "conflict"
+        """
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        for patient_id, transition in transitions:
+            if _is_uuid(patient_id):
+                patient_id = str(uuid.UUID(patient_id))  # as PostgREST returns it
+            result = {
                 "patient_id": patient_id,
-                "from_state": current_state.value if current_state else None,
+                "success": False,
+                "from_state": None,
                 "to_state": transition.to_state.value,
-                "forced": transition.force
+                "version": None,
+                "error": None
             }
+            if not _is_uuid(patient_id):
+                result["error"] = "invalid_patient_id"
+            elif patient_id in seen:
+                result["error"] = "duplicate"
+            seen.add(patient_id)
+            results.append(result)
+
+        pending = [(result, transition) for result, (_, transition) in zip(results, transitions) if not result["error"]]
+        states = await self.get_states([result["patient_id"] for result, _ in pending], use_cache=False)
+
+        items = []
+        for result, transition in pending:
+            record = states.get(result["patient_id"])
+            if record is None:
+                result["error"] = "not_found"
+                continue
+            result["from_state"] = record.state.value
+            result["version"] = record.version
+            if transition.from_state is not None and transition.from_state != record.state:
+                result["error"] = "conflict"
+                continue
+            if transition.expected_version is not None and transition.expected_version != record.version:
+                result["error"] = "conflict"
+                continue
+            try:
+                self.validate_transition(record.state, transition.to_state, transition.force)
+            except InvalidTransitionError:
+                result["error"] = "invalid_transition"
+                continue
+
+            items.append((result, {
+                "patient_id": result["patient_id"],
+                "to_state": transition.to_state.value,
+                "triggered_by": transition.triggered_by,
+                "expected_state": record.state.value,
+                "expected_version": record.version,
+                "force": transition.force,
+                "agent_id": transition.agent_id,
+                "coordinator_id": transition.coordinator_id,
+                "coordinator_name": transition.coordinator_name,
+                "event_data": transition.event_data or {}
+            }))
+
+        for offset in range(0, len(items), BULK_CHUNK):
+            chunk = items[offset:offset + BULK_CHUNK]
+            try:
+                outcomes = await self.store.transition_many([item for _, item in chunk])
+            except JourneyStoreError as e:
+                for result, _ in chunk:
+                    self.invalidate(result["patient_id"])
+                    result["error"] = f"write_failed: {e.status_code or e}"
+                continue
+
+            outcomes = {outcome["patient_id"]: outcome for outcome in outcomes}
+            for result, _ in chunk:
+                outcome = outcomes.get(result["patient_id"], {"status": "not_found", "state": None})
+                record = self._to_record(outcome["state"]) if outcome.get("state") else None
+                self._cache_put(result["patient_id"], record)
+                if record is not None:
+                    result["version"] = record.version
+                if outcome["status"] == "ok":
+                    result["success"] = True
+                else:
+                    result["error"] = "invalid_transition" if outcome["status"] == "invalid" else outcome["status"]
+
+        return results
 
     async def _log_event(
         self,
@@ -291,26 +504,28 @@ class PatientJourneyStateMachine:
         agent_id: str = None,
         coordinator_id: str = None,
         coordinator_name: str = None,
-        error_message: str = None
+        error_message: str = None,
+        durable: Optional[bool] = None
     ):
-        """Log an event to the journey_events table"""
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                f"{self.supabase_url}/rest/v1/journey_events",
-                headers=self.headers,
-                json={
-                    "patient_id": patient_id,
-                    "event_type": event_type,
-                    "from_state": from_state.value if from_state else None,
-                    "to_state": to_state.value if to_state else None,
-                    "triggered_by": triggered_by,
-                    "agent_id": agent_id,
-                    "coordinator_id": coordinator_id,
-                    "coordinator_name": coordinator_name,
-                    "event_data": event_data or {},
-                    "error_message": error_message
-                }
-            )
+        """
+        Log an event to the journey_events table.
+
+        Buffered and batch-inserted in the background unless durable (default:
+        event types in JOURNEY_EVENTS_SYNC_TYPES), which writes it before
+        returning and raises if that fails.
+        """
+        await self.events.emit({
+            "patient_id": patient_id,
+            "event_type": event_type,
+            "from_state": from_state.value if from_state else None,
+            "to_state": to_state.value if to_state else None,
+            "triggered_by": triggered_by,
+            "agent_id": agent_id,
+            "coordinator_id": coordinator_id,
+            "coordinator_name": coordinator_name,
+            "event_data": event_data or {},
+            "error_message": error_message
+        }, durable=durable)
 
     async def get_timeline(
         self,
@@ -319,26 +534,10 @@ class PatientJourneyStateMachine:
         event_types: List[str] = None
     ) -> List[Dict[str, Any]]:
         """Get the event timeline for a patient"""
-        async with httpx.AsyncClient() as client:
-            params = {
-                "patient_id": f"eq.{patient_id}",
-                "order": "created_at.desc",
-                "limit": str(limit)
-            }
-
-            if event_types:
-                params["event_type"] = f"in.({','.join(event_types)})"
+        # Include this process's buffered events
+        await self.events.flush()
 
-            response = await client.get(
-                f"{self.supabase_url}/rest/v1/journey_events",
-                headers=self.headers,
-                params=params
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to get timeline: {response.text}")
-
-            return response.json()
+        return await self.store.get_events(patient_id, limit=limit, event_types=event_types)
 
     async def recover_from_crash(self, patient_id: str) -> Optional[JourneyStateRecord]:
         """
@@ -372,31 +571,70 @@ class PatientJourneyStateMachine:
         coordinator_name: str
     ) -> bool:
         """Assign a coordinator to a patient journey"""
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{self.supabase_url}/rest/v1/patient_journey_state",
-                headers=self.headers,
-                params={"patient_id": f"eq.{patient_id}"},
-                json={
-                    "assigned_coordinator_id": coordinator_id,
-                    "assigned_coordinator_name": coordinator_name,
-                    "last_updated_at": datetime.utcnow().isoformat()
-                }
+        try:
+            rows = await self.store.assign_coordinator([patient_id], coordinator_id, coordinator_name)
+        except JourneyStoreError:
+            self.invalidate(patient_id)
+            return False
+
+        if rows:
+            self._cache_put(patient_id, self._to_record(rows[0]))
+            await self._log_event(
+                patient_id=patient_id,
+                event_type="assignment",
+                triggered_by="system",
+                coordinator_id=coordinator_id,
+                coordinator_name=coordinator_name,
+                event_data={"action": "coordinator_assigned"}
             )
+            return True
+
+        return False
 
-            if response.status_code == 200:
+    async def assign_coordinator_many(
+        self,
+        patient_ids: List[str],
+        coordinator_id: str,
+        coordinator_name: str
+    ) -> Dict[str, bool]:
+        """
+        Assign one coordinator to many patient journeys: one store update
+        per BULK_CHUNK patients (a PATCH with patient_id=in.(...) on
+        Supabase); the assignment events are batched by the event sink.
+
+        Returns:
+            patient_id (canonical UUID form) -> whether the journey exists
+            and was assigned
+        """
+        ids = list(dict.fromkeys(str(uuid.UUID(p)) if _is_uuid(p) else p for p in patient_ids))
+        assigned = {patient_id: False for patient_id in ids}
+        valid = [patient_id for patient_id in ids if _is_uuid(patient_id)]
+
+        for offset in range(0, len(valid), BULK_CHUNK):
+            chunk = valid[offset:offset + BULK_CHUNK]
+            try:
+                rows = await self.store.assign_coordinator(chunk, coordinator_id, coordinator_name)
+            except JourneyStoreError:
+                for patient_id in chunk:
+                    self.invalidate(patient_id)
+                continue
+
+            for row in rows:
+                assigned[row["patient_id"]] = True
+                self._cache_put(row["patient_id"], self._to_record(row))
+
+            # Buffered, so they go out as one batch insert
+            for row in rows:
                 await self._log_event(
-                    patient_id=patient_id,
+                    patient_id=row["patient_id"],
                     event_type="assignment",
                     triggered_by="system",
                     coordinator_id=coordinator_id,
                     coordinator_name=coordinator_name,
-                    event_data={"action": "coordinator_assigned"}
+                    event_data={"action": "coordinator_assigned", "bulk": True}
                 )
-                return True
-
-            return False
 
+        return assigned
 
 # Singleton instance
 _state_machine: Optional[PatientJourneyStateMachine] = None
@@ -408,3 +646,12 @@ def get_state_machine() -> PatientJourneyStateMachine:
     if _state_machine is None:
         _state_machine = PatientJourneyStateMachine()
     return _state_machine
+
+
+async def shutdown_state_machine() -> None:
+    """Write buffered journey events and close the store (FastAPI lifespan shutdown)"""
+    global _state_machine
+    if _state_machine is not None:
+        await _state_machine.events.close()
+        await _state_machine.store.close()
+        _state_machine = None
@@ -3,6 +3,8 @@ from typing import Optional, Dict, List
 import re
 from datetime import datetime, timedelta
 
+from app.core.keyword_matcher import KeywordMatcher
+
 # Import existing state machine
 # Adjust import path based on actual structure
 try:
@@ -87,16 +89,18 @@ class FastRouter:
     """
     
     PATTERNS = [
-        (r"(?i)(hello|hi|hey|good morning)", VoiceIntent.GREETING),
-        (r"(?i)(hours|open|close|time)", VoiceIntent.HOURS),
-        (r"(?i)(where|location|address|map)", VoiceIntent.LOCATION),
-        (r"(?i)(cost|price|expensive|how much)", VoiceIntent.PRICING_GENERAL),
-        (r"(?i)(human|person|agent|speak to someone)", VoiceIntent.HUMAN_HANDOFF),
-        (r"(?i)(chest pain|heart attack|dying|emergency|bleed)", VoiceIntent.EMERGENCY),
+        (r"(hello|hi|hey|good morning)", VoiceIntent.GREETING),
+        (r"(hours|open|close|time)", VoiceIntent.HOURS),
+        (r"(where|location|address|map)", VoiceIntent.LOCATION),
+        (r"(cost|price|expensive|how much)", VoiceIntent.PRICING_GENERAL),
+        (r"(human|person|agent|speak to someone)", VoiceIntent.HUMAN_HANDOFF),
+        (r"(chest pain|heart attack|dying|emergency|bleed)", VoiceIntent.EMERGENCY),
     ]
 
+    _matcher = KeywordMatcher(((intent, pattern) for pattern, intent in PATTERNS), flags=re.IGNORECASE)
+
     def route(self, text: str) -> VoiceIntent:
-        for pattern, intent in self.PATTERNS:
-            if re.search(pattern, text):
-                return intent
+        intent = self._matcher.first_category(text)
+        if intent is not None:
+            return intent
         return VoiceIntent.MEDICAL_QUERY  # Default to LLM if unknown
@@ -1,6 +1,7 @@
 import re
 from typing import Optional, Tuple
 from ..compliance.medical_compliance import VoiceIntent
+from app.core.keyword_matcher import KeywordMatcher
 
 class FastRouter:
     """
@@ -8,30 +9,30 @@ class FastRouter:
     Handles high-frequency, low-complexity queries locally.
     """
 
-    # Compiled patterns for O(1) matching
+    # Patterns in priority order, compiled once into a single-pass matcher
     PATTERNS = [
-        (re.compile(r"(?i)\b(emergency|die|dying|chest pain|bleed|heart attack|stroke|ambulance|911)\b"), VoiceIntent.EMERGENCY),
-        (re.compile(r"(?i)\b(speak.*human|talk.*person|agent|representative|operator)\b"), VoiceIntent.HUMAN_HANDOFF),
-        (re.compile(r"(?i)\b(hello|hi|hey|good morning|afternoon|evening)\b"), VoiceIntent.GREETING),
-        (re.compile(r"(?i)\b(hours|open|close|time|when)\b"), VoiceIntent.HOURS),
-        (re.compile(r"(?i)\b(where|location|address|map|directions|parking)\b"), VoiceIntent.LOCATION),
-        (re.compile(r"(?i)\b(cost|price|expensive|much|quote|estimate)\b"), VoiceIntent.PRICING_GENERAL),
-        (re.compile(r"(?i)\b(schedule|book|appointment|calendar|visit|meet)\b"), VoiceIntent.SCHEDULING),
+        (r"\b(emergency|die|dying|chest pain|bleed|heart attack|stroke|ambulance|911)\b", VoiceIntent.EMERGENCY),
+        (r"\b(speak.*human|talk.*person|agent|representative|operator)\b", VoiceIntent.HUMAN_HANDOFF),
+        (r"\b(hello|hi|hey|good morning|afternoon|evening)\b", VoiceIntent.GREETING),
+        (r"\b(hours|open|close|time|when)\b", VoiceIntent.HOURS),
+        (r"\b(where|location|address|map|directions|parking)\b", VoiceIntent.LOCATION),
+        (r"\b(cost|price|expensive|much|quote|estimate)\b", VoiceIntent.PRICING_GENERAL),
+        (r"\b(schedule|book|appointment|calendar|visit|meet)\b", VoiceIntent.SCHEDULING),
         # Medical keywords that trigger LLM but mark as query
-        (re.compile(r"(?i)\b(symptom|pain|sick|hurt|surgery|implant|consult|doctor|dr)\b"), VoiceIntent.MEDICAL_QUERY),
+        (r"\b(symptom|pain|sick|hurt|surgery|implant|consult|doctor|dr)\b", VoiceIntent.MEDICAL_QUERY),
     ]
 
+    _matcher = KeywordMatcher(((intent, pattern) for pattern, intent in PATTERNS), flags=re.IGNORECASE)
+
     def route(self, text: str) -> Tuple[VoiceIntent, float]:
         """
         Route text to intent.
         Returns (Intent, Confidence). 
         Regex is always confidence 1.0 if matched.
         """
-        clean_text = text.strip()
-        
-        for pattern, intent in self.PATTERNS:
-            if pattern.search(clean_text):
-                return intent, 1.0
+        intent = self._matcher.first_category(text.strip())
+        if intent is not None:
+            return intent, 1.0
                 
         return VoiceIntent.UNKNOWN, 0.0
 
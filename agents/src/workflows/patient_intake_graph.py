@@ -1,6 +1,6 @@
 from typing import TypedDict, Annotated, List, Dict, Any
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from agents.app.core.checkpointer import create_checkpointer
 
 # Import our stubbed agents
 from agents.src.intake.document_processor import process_documents
@@ -70,5 +70,5 @@ workflow.add_edge("triage", "matching")
 workflow.add_edge("matching", "quote")
 workflow.add_edge("quote", END)
 
-# Compile with memory persistence
-app = workflow.compile(checkpointer=MemorySaver())
+# Compile with bounded, durable persistence
+app = workflow.compile(checkpointer=create_checkpointer())
@@ -64,7 +64,8 @@ try:
     print("\n   📝 Sending test query: 'What is rhinoplasty?'")
     print("   ⏳ Waiting for response (may take 2-5 seconds)...\n")
 
-    result = agent_app.invoke(test_input, config=config)
+    import asyncio
+    result = asyncio.run(agent_app.ainvoke(test_input, config=config))
     response_text = result["messages"][-1].content
 
     print("   ✅ Agent Response:")
@@ -0,0 +1,136 @@
+"""
+Checkpointer suite: TieredCheckpointSaver (app/core/checkpointer.py) over a
+temporary SQLite store - round trip, hot-tier eviction, and two savers
+(workers) sharing one store.
+
+Run: python test_checkpointer.py   (or pytest test_checkpointer.py)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+from langgraph.checkpoint.base import empty_checkpoint
+
+from app.core.checkpointer import HotCheckpointCache, SQLCheckpointStore, TieredCheckpointSaver
+
+
+def thread(thread_id, checkpoint_id=None):
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+def save(saver, config, turn):
+    """Store the next checkpoint of a thread, with the turn number in its state"""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"turn": turn}
+    return saver.put(config, checkpoint, {"source": "loop", "step": turn}, {})
+
+
+def turn(saver, thread_id):
+    result = saver.get_tuple(thread(thread_id))
+    return result.checkpoint["channel_values"]["turn"] if result else None
+
+
+def test_round_trip_through_sqlite():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.sqlite")
+        saver = TieredCheckpointSaver(SQLCheckpointStore.sqlite(path))
+        first = save(saver, thread("t1"), 1)
+        second = save(saver, first, 2)
+        saver.put_writes(second, [("messages", "hello")], task_id="task-1")
+
+        hits = saver.hot.hits
+        result = saver.get_tuple(thread("t1"))
+        assert result.checkpoint["channel_values"] == {"turn": 2}
+        assert result.metadata["step"] == 2
+        assert result.parent_config["configurable"]["checkpoint_id"] == first["configurable"]["checkpoint_id"]
+        assert result.pending_writes == [("task-1", "messages", "hello")]
+        assert saver.hot.hits == hits + 1
+
+        history = list(saver.list(thread("t1")))
+        assert [h.metadata["step"] for h in history] == [2, 1]
+        assert saver.get_tuple(first).checkpoint["channel_values"] == {"turn": 1}
+
+        # A new process reads the same history from disk
+        restarted = TieredCheckpointSaver(SQLCheckpointStore.sqlite(path))
+        result = asyncio.run(restarted.aget_tuple(thread("t1")))
+        assert result.checkpoint["channel_values"] == {"turn": 2}
+        assert result.pending_writes == [("task-1", "messages", "hello")]
+
+        saver.delete_thread("t1")
+        assert saver.get_tuple(thread("t1")) is None
+
+
+def test_hot_tier_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLCheckpointStore.sqlite(os.path.join(tmp, "checkpoints.sqlite"))
+        saver = TieredCheckpointSaver(store, HotCheckpointCache(max_threads=2))
+        for thread_id in ("t1", "t2", "t3"):
+            save(saver, thread(thread_id), 1)
+
+        stats = saver.hot.stats()
+        assert stats["threads"] == 2 and stats["evictions"] == 1
+        assert saver.hot.get("t1", "") is None
+
+        # The evicted thread is read back from the store and re-warmed
+        assert turn(saver, "t1") == 1
+        assert saver.hot.get("t1", "") is not None
+
+    # Without a store an evicted thread starts over
+    saver = TieredCheckpointSaver(hot=HotCheckpointCache(max_threads=1))
+    save(saver, thread("t1"), 1)
+    save(saver, thread("t2"), 1)
+    assert turn(saver, "t1") is None and turn(saver, "t2") == 1
+
+
+def test_savers_sharing_a_store_never_resume_stale_checkpoints():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoints.sqlite")
+        worker_a = TieredCheckpointSaver(SQLCheckpointStore.sqlite(path))
+        worker_b = TieredCheckpointSaver(SQLCheckpointStore.sqlite(path))
+
+        # Turn 1 on A, turn 2 on B, turn 3 back on A
+        save(worker_a, thread("t1"), 1)
+        assert turn(worker_b, "t1") == 1
+        save(worker_b, worker_b.get_tuple(thread("t1")).config, 2)
+
+        latest = asyncio.run(worker_a.aget_tuple(thread("t1")))
+        assert latest.checkpoint["channel_values"] == {"turn": 2}
+        assert worker_a.hot.stale == 1
+        save(worker_a, latest.config, 3)
+        assert turn(worker_b, "t1") == 3
+        assert [h.metadata["step"] for h in worker_b.list(thread("t1"))] == [3, 2, 1]
+
+        # Pending writes another worker added to the latest checkpoint
+        worker_b.put_writes(worker_b.get_tuple(thread("t1")).config, [("messages", "hi")], task_id="task-1")
+        assert worker_a.get_tuple(thread("t1")).pending_writes == [("task-1", "messages", "hi")]
+
+        # An up-to-date hot entry is still served from memory
+        hits = worker_a.hot.hits
+        assert turn(worker_a, "t1") == 3
+        assert worker_a.hot.hits == hits + 1 and worker_a.hot.stale == 2
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test in (
+        test_round_trip_through_sqlite,
+        test_hot_tier_eviction,
+        test_savers_sharing_a_store_never_resume_stale_checkpoints,
+    ):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,163 @@
+"""
+Property test: IncrementalSafetyScanner vs MedicalSafetyLayer.check_response
+
+For random responses built from rule fragments and random chunkings
+(including one character per chunk, so patterns are split between chunks):
+    1. no status returned by feed() is stricter than check_response on the
+       full text: an early "block" always ends in block, an early
+       "human_review" in human_review or block
+    2. the same holds whatever text follows: a status is never stricter than
+       check_response on that prefix plus a random continuation
+    3. the scanner keeps the text exactly as fed
+    4. the status after the last chunk doesn't depend on how the text was
+       chunked (split patterns are still caught)
+
+Run: python test_incremental_safety.py   (or pytest test_incremental_safety.py)
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+
+from app.core.medical_safety import MedicalSafetyLayer
+from app.core.safety_rules import DEFAULT_RULES_PATH
+
+FRAGMENTS = [
+    "suicide", "kill myself", "chest pain", "Severe Bleeding", "heart attack", "stroke",
+    "you should take", "I recommend", "I cannot recommend", "not advise", "cure your",
+    "dosage", "take 20 mg", "diagnosis", "you have", "$1500", "₩2,000,000", "1,200 USD",
+    "cost is", "price is", "JCI accredited", "internationally recognized", "best hospital",
+    "guaranteed results", "Seoul", "recovery takes two weeks", "our coordinators", "İstanbul",
+    ".", ". ", ",", " ", "\n", "the clinic", "5", "bleeding",
+]
+
+QUERY_TYPES = ["faq", "medical_info", "human", "emergency"]
+RANK = {"pending": 0, "send": 0, "human_review": 1, "block": 2}
+
+
+def random_text(rng: random.Random) -> str:
+    parts = [rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 40))]
+    return rng.choice(["", " "]).join(parts)
+
+
+def random_chunks(rng: random.Random, text: str):
+    mode = rng.random()
+    if mode < 0.2:
+        return list(text)
+    if mode < 0.3:
+        return [text]
+    chunks, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 12)
+        chunks.append(text[position:position + size])
+        position += size
+    return chunks
+
+
+def feed_all(layer, query_type, chunks):
+    scanner = layer.scanner(query_type)
+    statuses = [scanner.feed(chunk) for chunk in chunks]
+    return scanner, statuses
+
+
+def test_early_statuses_never_stricter_than_check_response(cases: int = 3000, seed: int = 12):
+    rng = random.Random(seed)
+    layer = MedicalSafetyLayer()
+
+    for _ in range(cases):
+        text = random_text(rng)
+        query_type = rng.choice(QUERY_TYPES)
+        chunks = random_chunks(rng, text)
+
+        scanner, statuses = feed_all(layer, query_type, chunks)
+        expected = layer.check_response(text, query_type=query_type)["action"]
+
+        # 1. Early verdicts are never contradicted by the non-streaming check
+        for status in statuses:
+            assert RANK[status] <= RANK[expected], (text, chunks, status, expected)
+
+        # 2. ... nor by any other ending of the stream
+        if chunks:
+            cut = rng.randint(1, len(chunks))
+            other = "".join(chunks[:cut]) + random_text(rng)
+            verdict = layer.check_response(other, query_type=query_type)["action"]
+            assert RANK[statuses[cut - 1]] <= RANK[verdict], (chunks[:cut], other, statuses[cut - 1], verdict)
+
+        # 3. What finish() and a blocked stream's partial answer are built from
+        assert scanner.text == text, (text, chunks)
+
+        # 4. Chunking doesn't change what was detected
+        whole, _ = feed_all(layer, query_type, [text])
+        assert scanner.status == whole.status, (text, chunks, scanner.status, whole.status)
+        if scanner.status != "block":  # scanning stops once blocked
+            assert scanner.advice_pending == whole.advice_pending, (text, chunks)
+
+
+def test_emergency_split_across_chunks_blocks_early():
+    layer = MedicalSafetyLayer()
+    scanner = layer.scanner("faq")
+
+    assert scanner.feed("If you have chest ") == "pending"
+    assert scanner.feed("pa") == "pending"
+    assert scanner.feed("in, call 119.") == "block"
+    assert scanner.finish()["action"] == "block"
+
+
+def test_advice_is_provisional_until_negation():
+    layer = MedicalSafetyLayer()
+    scanner = layer.scanner("medical_info")
+
+    scanner.feed("I recommend rest. ")
+    assert scanner.status == "pending" and scanner.advice_pending
+    scanner.feed("However, I cannot recommend any medication.")
+    assert not scanner.advice_pending
+    assert scanner.finish()["action"] == "send"
+
+
+def test_early_verdicts_follow_pack_severity(cases: int = 1000, seed: int = 13):
+    pack = json.loads(DEFAULT_RULES_PATH.read_text(encoding="utf-8"))
+    pack["version"] = "test-severities"
+    severities = {"emergency_keyword": "MEDIUM", "unverified_pricing": "LOW", "accreditation_claim": "HIGH"}
+    for check in pack["checks"]:
+        check["severity"] = severities.get(check["type"], check["severity"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(pack, f)
+        layer = MedicalSafetyLayer(rules_path=path)
+
+    scanner, statuses = feed_all(layer, "faq", ["Chest pain after surg", "ery is rare."])
+    assert statuses[-1] == "human_review" and scanner.finish()["action"] == "human_review"
+    scanner, statuses = feed_all(layer, "faq", ["The cost is about 5 million."])
+    assert statuses[-1] == "pending" and scanner.finish()["action"] == "send"
+
+    rng = random.Random(seed)
+    for _ in range(cases):
+        text = random_text(rng)
+        query_type = rng.choice(QUERY_TYPES)
+        chunks = random_chunks(rng, text)
+        scanner, statuses = feed_all(layer, query_type, chunks)
+        final = scanner.finish()
+        for status in statuses:
+            assert RANK[status] <= RANK[final["action"]], (text, chunks, status, final)
+
+
+if __name__ == "__main__":
+    tests = [
+        test_early_statuses_never_stricter_than_check_response,
+        test_emergency_split_across_chunks_blocks_early,
+        test_advice_is_provisional_until_negation,
+        test_early_verdicts_follow_pack_severity,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {str(e)[:300]}")
+    sys.exit(1 if failed else 0)
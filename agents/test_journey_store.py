@@ -0,0 +1,248 @@
+"""
+Journey store behavior suite: every backend of PatientJourneyStateMachine
+(src/core/journey_store.py) must pass the same transition, concurrency,
+timeline and bulk tests.
+
+Run: python test_journey_store.py   (or pytest test_journey_store.py)
+
+Configuration (env):
+    JOURNEY_STORE_TEST_BACKENDS - comma-separated backends (default: memory,sqlite).
+                                  supabase uses NEXT_PUBLIC_SUPABASE_URL; use a
+                                  disposable project whose journey tables don't
+                                  enforce the patient_intakes foreign key.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+import pytest
+
+from agents.src.core.state_machine import (
+    InvalidTransitionError,
+    JourneyState,
+    PatientJourneyStateMachine,
+    StateTransition,
+    TransitionConflictError,
+    create_journey_store,
+)
+
+BACKENDS = [b.strip() for b in os.getenv("JOURNEY_STORE_TEST_BACKENDS", "memory,sqlite").split(",") if b.strip()]
+
+
+@pytest.fixture(autouse=True)
+def uncached_states(monkeypatch):
+    # Read the store on every call, not the per-process cache
+    monkeypatch.setenv("JOURNEY_STATE_CACHE_TTL", "0")
+
+
+def run_with_machine(backend, scenario):
+    """Run scenario(sm) against a fresh store of the given backend"""
+    with tempfile.TemporaryDirectory() as tmp:
+        kwargs = {"path": os.path.join(tmp, "journeys.sqlite")} if backend == "sqlite" else {}
+
+        async def main():
+            sm = PatientJourneyStateMachine(store=create_journey_store(backend, **kwargs))
+            try:
+                await scenario(sm)
+            finally:
+                await sm.events.close()
+                await sm.store.close()
+
+        asyncio.run(main())
+
+
+def step(to_state, **kwargs):
+    return StateTransition(from_state=kwargs.pop("from_state", None), to_state=to_state, triggered_by="system", **kwargs)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_transitions_create_and_advance_journey(backend):
+    async def scenario(sm):
+        patient_id = str(uuid.uuid4())
+        assert await sm.get_state(patient_id) is None
+
+        result = await sm.transition(patient_id, step(JourneyState.INQUIRY, expected_version=0))
+        assert result["from_state"] is None and result["version"] == 1
+
+        result = await sm.transition(patient_id, step(JourneyState.SCREENING, from_state=JourneyState.INQUIRY))
+        assert result["from_state"] == "INQUIRY" and result["version"] == 2
+
+        record = await sm.get_state(patient_id)
+        assert record.state == JourneyState.SCREENING
+        assert record.previous_state == JourneyState.INQUIRY
+        assert record.version == 2
+
+        with pytest.raises(InvalidTransitionError):
+            await sm.transition(patient_id, step(JourneyState.TREATMENT))
+        assert (await sm.get_state(patient_id)).state == JourneyState.SCREENING
+
+        result = await sm.transition(patient_id, step(JourneyState.TREATMENT, force=True))
+        assert result["forced"] and (await sm.get_state(patient_id)).state == JourneyState.TREATMENT
+
+    run_with_machine(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_new_journey_starts_at_inquiry_unless_forced(backend):
+    async def scenario(sm):
+        patient_id = str(uuid.uuid4())
+        with pytest.raises(InvalidTransitionError) as invalid:
+            await sm.transition(patient_id, step(JourneyState.BOOKING))
+        assert invalid.value.from_state is None
+        assert await sm.get_state(patient_id) is None
+        assert await sm.get_timeline(patient_id) == []
+
+        result = await sm.transition(patient_id, step(JourneyState.BOOKING, force=True))
+        assert result["from_state"] is None and result["forced"]
+        assert (await sm.get_state(patient_id)).state == JourneyState.BOOKING
+
+    run_with_machine(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stale_expectations_conflict(backend):
+    async def scenario(sm):
+        patient_id = str(uuid.uuid4())
+        await sm.transition(patient_id, step(JourneyState.INQUIRY, expected_version=0))
+
+        # Journey already exists
+        with pytest.raises(TransitionConflictError):
+            await sm.transition(patient_id, step(JourneyState.INQUIRY, expected_version=0))
+        with pytest.raises(TransitionConflictError):
+            await sm.transition(patient_id, step(JourneyState.SCREENING, expected_version=7))
+        with pytest.raises(TransitionConflictError) as conflict:
+            await sm.transition(patient_id, step(JourneyState.CANCELLED, from_state=JourneyState.QUOTE))
+        assert conflict.value.current.state == JourneyState.INQUIRY
+
+        record = await sm.get_state(patient_id)
+        assert record.state == JourneyState.INQUIRY and record.version == 1
+
+    run_with_machine(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_timeline_orders_filters_and_includes_buffered_events(backend):
+    async def scenario(sm):
+        patient_id = str(uuid.uuid4())
+        await sm.transition(patient_id, step(JourneyState.INQUIRY))
+        await sm._log_event(patient_id=patient_id, event_type="note", triggered_by="coordinator",
+                            event_data={"text": "called patient"})
+        await sm.transition(patient_id, step(JourneyState.SCREENING))
+        await sm._log_event(patient_id=patient_id, event_type="note", triggered_by="coordinator")
+
+        timeline = await sm.get_timeline(patient_id)
+        assert [e["event_type"] for e in timeline] == ["note", "state_change", "note", "state_change"]
+        assert timeline[1]["from_state"] == "INQUIRY" and timeline[1]["to_state"] == "SCREENING"
+        assert timeline[2]["event_data"] == {"text": "called patient"}
+
+        changes = await sm.get_timeline(patient_id, event_types=["state_change"])
+        assert [e["to_state"] for e in changes] == ["SCREENING", "INQUIRY"]
+        assert len(await sm.get_timeline(patient_id, limit=1)) == 1
+        assert await sm.get_timeline(str(uuid.uuid4())) == []
+
+    run_with_machine(backend, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_bulk_transition_and_coordinator_assignment(backend):
+    async def scenario(sm):
+        booked, inquiry, stale = (str(uuid.uuid4()) for _ in range(3))
+        missing = str(uuid.uuid4())
+        for patient_id, path in ((booked, ["INQUIRY", "BOOKING"]), (inquiry, ["INQUIRY"]), (stale, ["INQUIRY", "BOOKING"])):
+            for state in path:
+                await sm.transition(patient_id, step(JourneyState(state), force=True))
+
+        results = await sm.transition_many([
+            (booked, step(JourneyState.PRE_TRAVEL)),
+            (inquiry, step(JourneyState.PRE_TRAVEL)),
+            (stale, step(JourneyState.PRE_TRAVEL, expected_version=1)),
+            (missing, step(JourneyState.PRE_TRAVEL)),
+            ("not-a-uuid", step(JourneyState.PRE_TRAVEL)),
+            (booked, step(JourneyState.CANCELLED)),
+        ])
+        assert [r["error"] for r in results] == [
+            None, "invalid_transition", "conflict", "not_found", "invalid_patient_id", "duplicate"
+        ]
+        assert results[0]["success"] and results[0]["version"] == 3
+
+        states = await sm.get_states([booked, inquiry, missing])
+        assert states[booked].state == JourneyState.PRE_TRAVEL
+        assert states[inquiry].state == JourneyState.INQUIRY
+        assert states[missing] is None
+
+        coordinator_id = str(uuid.uuid4())
+        assigned = await sm.assign_coordinator_many([booked, inquiry, missing], coordinator_id, "Kim")
+        assert assigned == {booked: True, inquiry: True, missing: False}
+        assert await sm.assign_coordinator(stale, coordinator_id, "Lee")
+        assert not await sm.assign_coordinator(missing, coordinator_id, "Lee")
+        assert (await sm.get_state(booked)).assigned_coordinator_name == "Kim"
+        assert (await sm.get_state(stale)).assigned_coordinator_name == "Lee"
+        assert [e["event_type"] for e in await sm.get_timeline(booked, limit=2)] == ["assignment", "state_change"]
+
+    run_with_machine(backend, scenario)
+
+
+def test_sqlite_store_persists_in_wal_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "journeys.sqlite")
+        patient_id = str(uuid.uuid4())
+
+        async def write():
+            sm = PatientJourneyStateMachine(store=create_journey_store("sqlite", path=path))
+            await sm.transition(patient_id, step(JourneyState.INQUIRY))
+            await sm._log_event(patient_id=patient_id, event_type="note", triggered_by="system")
+            await sm.events.close()
+            await sm.store.close()
+
+        async def read():
+            sm = PatientJourneyStateMachine(store=create_journey_store("sqlite", path=path))
+            try:
+                return await sm.get_state(patient_id), await sm.get_timeline(patient_id)
+            finally:
+                await sm.store.close()
+
+        asyncio.run(write())
+        record, timeline = asyncio.run(read())
+        assert record.state == JourneyState.INQUIRY and len(timeline) == 2
+
+        conn = sqlite3.connect(path)
+        try:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(journey_events)")}
+            assert "idx_journey_events_patient_created" in indexes
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    os.environ["JOURNEY_STATE_CACHE_TTL"] = "0"
+    tests = [
+        (test, backend)
+        for test in (
+            test_transitions_create_and_advance_journey,
+            test_new_journey_starts_at_inquiry_unless_forced,
+            test_stale_expectations_conflict,
+            test_timeline_orders_filters_and_includes_buffered_events,
+            test_bulk_transition_and_coordinator_assignment,
+        )
+        for backend in BACKENDS
+    ] + [(test_sqlite_store_persists_in_wal_mode, None)]
+    failed = 0
+    for test, backend in tests:
+        label = f"{test.__name__}[{backend}]" if backend else test.__name__
+        try:
+            test(backend) if backend else test()
+            print(f"✅ {label}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {label}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)
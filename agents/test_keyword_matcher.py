@@ -0,0 +1,108 @@
+"""
+KeywordMatcher routing vs the plain re.search loops it replaced.
+
+For the voice FastRouters (IGNORECASE on the original text) and the chat
+route_query (lowercased literals), with prefixes of characters whose
+lowercase form is longer than the character ("İ" -> "i̇"), so the literal
+pass and the regex pass see texts of different lengths.
+
+Run: python test_keyword_matcher.py   (or pytest test_keyword_matcher.py)
+"""
+
+import os
+import random
+import re
+import sys
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agents.src.voice import core_logic
+from agents.src.voice.compliance.medical_compliance import VoiceIntent
+from agents.src.voice.routers.fast_router import FastRouter
+
+PREFIXES = ["İ", "İstanbul ", "İİ ", "İ i̇ ", "Ａ", "ß"]
+PHRASES = [
+    "chest pain", "I think I am dying", "can I speak to a human", "hello there",
+    "what time do you open", "where is the clinic", "how much is it",
+    "book an appointment", "my tooth hurts", "how does the surgery work",
+    "should i get a consult", "heart attack", "thanks",
+]
+
+
+def legacy_route(patterns, text, default):
+    for pattern, intent in patterns:
+        if re.search(pattern, text, re.IGNORECASE):
+            return intent
+    return default
+
+
+def legacy_route_query(keywords, text):
+    lowered = text.lower()
+    for category, words in keywords.items():
+        if any(word in lowered for word in words):
+            return category
+    return "faq"
+
+
+def texts(seed: int = 7, cases: int = 300):
+    rng = random.Random(seed)
+    for phrase in PHRASES:
+        for count in (1, 3, 40):
+            yield "İ" * count + " " + phrase
+    for _ in range(cases):
+        prefix = "".join(rng.choice(PREFIXES) for _ in range(rng.randint(1, 30)))
+        yield prefix + " " + " ".join(rng.sample(PHRASES, rng.randint(1, 2)))
+
+
+@pytest.fixture(scope="module")
+def graph():
+    with pytest.MonkeyPatch.context() as mp:
+        if not os.getenv("OPENAI_API_KEY"):
+            mp.setenv("OPENAI_API_KEY", "test-placeholder")
+        mp.setenv("CHECKPOINT_BACKEND", "memory")
+        from app.core import graph as module
+    return module
+
+
+def test_voice_routers_survive_case_folding_prefixes():
+    router = FastRouter()
+    legacy = core_logic.FastRouter()
+
+    assert router.route("İ" * 40 + " chest pain") == (VoiceIntent.EMERGENCY, 1.0)
+    for text in texts():
+        expected = legacy_route(FastRouter.PATTERNS, text.strip(), VoiceIntent.UNKNOWN)
+        assert router.route(text)[0] == expected, text
+        expected = legacy_route(core_logic.FastRouter.PATTERNS, text, core_logic.VoiceIntent.MEDICAL_QUERY)
+        assert legacy.route(text) == expected, text
+
+
+def test_route_query_survives_case_folding_prefixes(graph):
+    assert graph.route_query({"messages": [HumanMessage(content="İ" * 40 + " chest pain")]}) == "emergency"
+    for text in texts():
+        expected = legacy_route_query(graph.ROUTE_KEYWORDS, text)
+        assert graph.route_query({"messages": [HumanMessage(content=text)]}) == expected, text
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("OPENAI_API_KEY", "test-placeholder")
+    os.environ["CHECKPOINT_BACKEND"] = "memory"
+    from app.core import graph as graph_module
+
+    failed = 0
+    for test, args in (
+        (test_voice_routers_survive_case_folding_prefixes, ()),
+        (test_route_query_survives_case_folding_prefixes, (graph_module,)),
+    ):
+        try:
+            test(*args)
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {type(e).__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,263 @@
+"""
+Performance regression suite (offline, no LLM calls)
+
+Times the deterministic hot paths on a fixed synthetic corpus and fails when
+throughput drops more than PERF_REGRESSION_THRESHOLD below perf_baseline.json:
+
+    check_response      - short, long (6-8 KB), adversarial and multilingual answers
+    route_query         - patient questions, short / long / multilingual
+    voice FastRouter    - src/voice/routers/fast_router.py and src/voice/core_logic.py
+
+Throughput is stored relative to a pure-Python calibration loop timed in
+alternation with each benchmark, so a baseline recorded on one machine is
+usable on another and background load mostly cancels out.
+
+Run:
+    python test_performance.py                    # table + pass/fail
+    python test_performance.py --update-baseline  # after an intended change
+    pytest test_performance.py
+
+Configuration (env):
+    PERF_REGRESSION_THRESHOLD - allowed relative drop (default: 0.30)
+    PERF_MIN_TIME             - seconds per timing round (default: 0.2)
+
+The code under test is imported and built with BENCHMARK_ENV set (in-memory
+checkpoints, no rule pack polling); under pytest the variables are restored
+afterwards, so other test modules don't see them.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+AGENTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(AGENTS_DIR.parent))
+sys.path.insert(0, str(AGENTS_DIR))
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+BENCHMARK_ENV = {"CHECKPOINT_BACKEND": "memory", "SAFETY_RULES_RELOAD_INTERVAL": "0"}
+BASELINE_PATH = AGENTS_DIR / "perf_baseline.json"
+THRESHOLD = float(os.getenv("PERF_REGRESSION_THRESHOLD", "0.30"))
+MIN_TIME = float(os.getenv("PERF_MIN_TIME", "0.2"))
+ROUNDS = 7
+SEED = 2026
+
+# --- CORPUS ---
+
+FILLER = (
+    "our coordinators can arrange airport pickup and an interpreter for your consultation "
+    "at partner clinics in seoul and busan most patients stay about ten days and recovery "
+    "depends on the procedure please bring your passport and recent medical records"
+).split()
+
+FLAGGED = [
+    "The price is $2,400 for the package.", "I recommend booking early.",
+    "I cannot recommend a specific dosage.", "This is the best clinic in Gangnam.",
+    "Call us if you notice severe bleeding.", "The hospital is internationally accredited.",
+]
+
+# Trigger literals without a full match: every regex rule has to run
+ADVERSARIAL = [
+    "take 1111111111 tablets", "you should", "i cannot", "cure", "$", "₩", "best", "guaranteed",
+    "internationally", "not", "price", "cost", "1,000,000,000 won", "take", "your",
+]
+
+MULTILINGUAL = [
+    "회복 기간은 보통 1~2주입니다.", "수술 비용은 상담 후 안내해 드립니다.",
+    "術後の腫れは通常2週間で引きます。", "Восстановление занимает около двух недель.",
+    "يستغرق التعافي عادة أسبوعين.", "İstanbul'dan gelen hastalar için tercüman var.",
+    "La récupération prend environ deux semaines.", "🏥 Our clinic is in Gangnam 😊",
+]
+
+QUESTIONS = [
+    "how does the surgery work", "what is recovery like", "should i get a consult",
+    "i have chest pain", "how much is lasik", "do you help with visas",
+    "can i talk to a coordinator", "is it safe to fly after rhinoplasty",
+]
+
+UTTERANCES = [
+    "hello there", "what time do you open", "where is the clinic", "how much is it",
+    "can i speak to a human please", "i want to book an appointment", "my tooth hurts",
+    "thanks that is all", "i think i am dying", "안녕하세요 예약하고 싶어요", "¿dónde está la clínica?",
+]
+
+
+def _text(rng, length, phrases, rate):
+    parts = []
+    size = 0
+    while size < length:
+        part = rng.choice(phrases) if rng.random() < rate else rng.choice(FILLER)
+        parts.append(part)
+        size += len(part) + 1
+    return " ".join(parts)
+
+
+def build_corpus(seed: int = SEED):
+    rng = random.Random(seed)
+    return {
+        "responses_short": [_text(rng, 80, FLAGGED, 0.1) for _ in range(200)],
+        "responses_long": [_text(rng, rng.randint(6000, 8000), FLAGGED, 0.02) for _ in range(20)],
+        "responses_adversarial": [_text(rng, 8000, ADVERSARIAL, 0.6) for _ in range(10)],
+        "responses_multilingual": [_text(rng, 1500, MULTILINGUAL + FLAGGED, 0.4) for _ in range(40)],
+        "questions_short": [_text(rng, 60, QUESTIONS, 0.3) for _ in range(300)],
+        "questions_long": [_text(rng, 250, QUESTIONS, 0.1) for _ in range(200)],
+        "questions_multilingual": [_text(rng, 80, MULTILINGUAL + QUESTIONS, 0.5) for _ in range(200)],
+        "utterances": [rng.choice(UTTERANCES) for _ in range(500)],
+    }
+
+
+# --- BENCHMARKS ---
+
+BENCHMARK_NAMES = sorted([
+    "check_response/short", "check_response/long", "check_response/adversarial",
+    "check_response/multilingual", "route_query/short", "route_query/long",
+    "route_query/multilingual", "voice_fast_router/route", "voice_core_logic/route",
+])
+
+
+def build_benchmarks():
+    """
+    name -> (samples, fn); throughput is counted in samples per second.
+    Imports the code under test, so call it with BENCHMARK_ENV set.
+    """
+    from app.core.graph import route_query
+    from app.core.medical_safety import MedicalSafetyLayer
+    from agents.src.voice import core_logic
+    from agents.src.voice.routers.fast_router import FastRouter
+
+    corpus = build_corpus()
+    layer = MedicalSafetyLayer()
+    router = FastRouter()
+    legacy_router = core_logic.FastRouter()
+
+    def check(text):
+        return layer.check_response(text, "medical_info")
+
+    def route(text):
+        return route_query({"messages": [HumanMessage(content=text)]})
+
+    return {
+        "check_response/short": (corpus["responses_short"], check),
+        "check_response/long": (corpus["responses_long"], check),
+        "check_response/adversarial": (corpus["responses_adversarial"], check),
+        "check_response/multilingual": (corpus["responses_multilingual"], check),
+        "route_query/short": (corpus["questions_short"], route),
+        "route_query/long": (corpus["questions_long"], route),
+        "route_query/multilingual": (corpus["questions_multilingual"], route),
+        "voice_fast_router/route": (corpus["utterances"], router.route),
+        "voice_core_logic/route": (corpus["utterances"], legacy_router.route),
+    }
+
+
+def _calibration_pass(samples):
+    # String and dict work comparable to the code under test, without it
+    seen = {}
+    for text in samples:
+        lowered = text.lower()
+        seen[lowered[:8]] = lowered.find("clinic") + len(lowered.split())
+
+
+def _round(samples, fn) -> float:
+    """samples/second over one round of at least MIN_TIME"""
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for sample in samples:
+            fn(sample)
+        count += len(samples)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_TIME:
+            return count / elapsed
+
+
+_CALIBRATION_SAMPLES = [build_corpus()["responses_long"]]
+
+
+def measure(samples, fn):
+    """
+    Best throughput over ROUNDS rounds, each paired with a calibration round
+    so machine speed and load drift cancel out of `relative`.
+    """
+    best = calibration = 0.0
+    for _ in range(ROUNDS):
+        calibration = max(calibration, _round(_CALIBRATION_SAMPLES, _calibration_pass))
+        best = max(best, _round(samples, fn))
+    return {"ops_per_s": round(best, 1), "relative": best / calibration, "calibration": calibration}
+
+
+def load_baseline():
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))["benchmarks"]
+
+
+@pytest.fixture(scope="module")
+def benchmarks():
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in BENCHMARK_ENV.items():
+            mp.setenv(name, value)
+        if not os.getenv("OPENAI_API_KEY"):
+            mp.setenv("OPENAI_API_KEY", "benchmark-placeholder")
+        built = build_benchmarks()
+    assert sorted(built) == BENCHMARK_NAMES
+    return built
+
+
+@pytest.mark.parametrize("name", BENCHMARK_NAMES)
+def test_throughput_has_not_regressed(name, benchmarks):
+    baseline = load_baseline().get(name)
+    if baseline is None:
+        pytest.skip(f"no baseline for {name} (run: python test_performance.py --update-baseline)")
+
+    result = measure(*benchmarks[name])
+    floor = baseline["relative"] * (1 - THRESHOLD)
+    assert result["relative"] >= floor, (
+        f"{name}: {result['ops_per_s']:,.0f}/s is {1 - result['relative'] / baseline['relative']:.0%} "
+        f"below baseline (allowed {THRESHOLD:.0%})"
+    )
+
+
+def main():
+    update = "--update-baseline" in sys.argv
+    os.environ.update(BENCHMARK_ENV)
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+    benchmarks = build_benchmarks()
+    baseline = load_baseline()
+    results = {}
+    failed = 0
+
+    print(f"{'BENCHMARK':<30} | {'OPS/S':>10} | {'VS BASELINE':>11} | RESULT")
+    print("-" * 68)
+    for name in BENCHMARK_NAMES:
+        result = results[name] = measure(*benchmarks[name])
+        reference = baseline.get(name)
+        if reference is None or update:
+            status, change = "—", ""
+        else:
+            ratio = result["relative"] / reference["relative"]
+            change = f"{ratio - 1:+.0%}"
+            status = "✅" if ratio >= 1 - THRESHOLD else "❌"
+            failed += status == "❌"
+        print(f"{name:<30} | {result['ops_per_s']:>10,.0f} | {change:>11} | {status}")
+
+    if update:
+        BASELINE_PATH.write_text(json.dumps({
+            "calibration_passes_per_s": round(max(r["calibration"] for r in results.values()), 1),
+            "python": sys.version.split()[0],
+            "benchmarks": {
+                name: {"ops_per_s": r["ops_per_s"], "relative": round(r["relative"], 6)}
+                for name, r in results.items()
+            }
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written to {BASELINE_PATH.name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Safety rule pack tests: validation, atomic hot reload and version recording.
+
+Run: python test_safety_rules.py   (or pytest test_safety_rules.py)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from app.core.medical_safety import MedicalSafetyLayer
+from app.core.safety_rules import DEFAULT_RULES_PATH, RulesetError, compile_ruleset
+
+
+def default_pack():
+    return json.loads(DEFAULT_RULES_PATH.read_text(encoding="utf-8"))
+
+
+def write_pack(path, pack):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pack, f)
+
+
+def test_invalid_packs_are_rejected():
+    broken = [
+        lambda p: p.update(version=""),
+        lambda p: p["checks"][0].update(type="unknown"),
+        lambda p: p["checks"][0].update(severity="CRITICAL"),
+        lambda p: p["checks"][1]["patterns"].append("(unclosed"),
+        lambda p: p["checks"][0]["examples"]["match"].append("a perfectly calm answer"),
+        lambda p: p["checks"].append(dict(p["checks"][0])),
+    ]
+    for mutate in broken:
+        pack = default_pack()
+        mutate(pack)
+        try:
+            compile_ruleset(pack)
+        except RulesetError:
+            continue
+        raise AssertionError(f"pack should have been rejected: {pack}")
+
+
+def test_reload_swaps_ruleset_and_records_version():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        pack = default_pack()
+        write_pack(path, pack)
+
+        layer = MedicalSafetyLayer(rules_path=path)
+        old_version = layer.ruleset.version
+        assert layer.check_response("Recovery takes a week.", "faq")["ruleset_version"] == old_version
+
+        # A stream started before the reload keeps its ruleset
+        scanner = layer.scanner("faq")
+        scanner.feed("Our recovery suite has a sauna.")
+
+        pack["version"] = "test-2"
+        pack["checks"][0]["patterns"].append("sauna")
+        write_pack(path, pack)
+        layer.reload()
+
+        result = layer.check_response("Our recovery suite has a sauna.", "faq")
+        assert result["action"] == "block" and result["ruleset_version"] == "test-2"
+        assert scanner.finish()["ruleset_version"] == old_version
+        assert scanner.finish()["action"] == "send"
+
+
+def test_edited_pack_is_reloaded_off_the_request_path():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        pack = default_pack()
+        write_pack(path, pack)
+        layer = MedicalSafetyLayer(rules_path=path)
+        old_version = layer.ruleset.version
+
+        pack["version"] = "test-3"
+        write_pack(path, pack)
+        os.utime(path, (layer._rules_mtime + 10, layer._rules_mtime + 10))
+        layer._next_poll = 0
+
+        reload, reloaded_on = layer.reload, []
+        layer.reload = lambda: (reloaded_on.append(threading.current_thread()), reload())[1]
+
+        # The request that notices the edit doesn't compile the new pack itself
+        assert layer.check_response("Recovery takes a week.", "faq")["ruleset_version"] in (old_version, "test-3")
+        layer._poller.join(timeout=10)
+        assert reloaded_on and reloaded_on[0] is not threading.current_thread()
+        assert layer.check_response("Recovery takes a week.", "faq")["ruleset_version"] == "test-3"
+
+
+def test_failed_reload_keeps_current_ruleset():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rules.json")
+        write_pack(path, default_pack())
+        layer = MedicalSafetyLayer(rules_path=path)
+        active = layer.ruleset
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        try:
+            layer.reload()
+            raise AssertionError("reload of a broken pack should raise")
+        except RulesetError:
+            pass
+        assert layer.ruleset is active
+
+
+if __name__ == "__main__":
+    tests = [
+        test_invalid_packs_are_rejected,
+        test_reload_swaps_ruleset_and_records_version,
+        test_edited_pack_is_reloaded_off_the_request_path,
+        test_failed_reload_keeps_current_ruleset,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {str(e)[:300]}")
+    sys.exit(1 if failed else 0)
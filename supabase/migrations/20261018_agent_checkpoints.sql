@@ -0,0 +1,61 @@
+-- KmedTour — LangGraph Agent Checkpoints
+-- File: supabase/migrations/20261018_agent_checkpoints.sql
+-- Used by: agents/app/core/checkpointer.py (CHECKPOINT_BACKEND=postgres)
+--
+-- Durable conversation state for the chat agent and the intake workflow.
+-- One row per LangGraph checkpoint; the agent keeps only the newest
+-- CHECKPOINT_KEEP_PER_THREAD rows per thread.
+
+-- ─── Checkpoints ─────────────────────────────────────────────────────────────
+
+CREATE TABLE IF NOT EXISTS public.agent_checkpoints (
+  thread_id             text        NOT NULL,
+  checkpoint_ns         text        NOT NULL DEFAULT '',
+  checkpoint_id         text        NOT NULL,
+  parent_checkpoint_id  text,
+  checkpoint_type       text        NOT NULL,
+  checkpoint            bytea       NOT NULL,
+  metadata_type         text        NOT NULL,
+  metadata              bytea       NOT NULL,
+  created_at            timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+
+-- ─── Pending writes ──────────────────────────────────────────────────────────
+
+CREATE TABLE IF NOT EXISTS public.agent_checkpoint_writes (
+  thread_id      text    NOT NULL,
+  checkpoint_ns  text    NOT NULL DEFAULT '',
+  checkpoint_id  text    NOT NULL,
+  task_id        text    NOT NULL,
+  idx            integer NOT NULL,
+  channel        text    NOT NULL,
+  value_type     text    NOT NULL,
+  value          bytea   NOT NULL,
+  PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+
+-- ─── Indexes ─────────────────────────────────────────────────────────────────
+
+-- Idle-thread cleanup jobs
+CREATE INDEX IF NOT EXISTS idx_agent_checkpoints_created
+  ON public.agent_checkpoints (created_at);
+
+-- ─── Row Level Security ───────────────────────────────────────────────────────
+
+-- Conversation state is server-side only; no anon/authenticated access
+ALTER TABLE public.agent_checkpoints ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.agent_checkpoint_writes ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS agent_checkpoints_service_all ON public.agent_checkpoints;
+CREATE POLICY agent_checkpoints_service_all ON public.agent_checkpoints
+    FOR ALL USING (auth.role() = 'service_role')
+    WITH CHECK (auth.role() = 'service_role');
+
+DROP POLICY IF EXISTS agent_checkpoint_writes_service_all ON public.agent_checkpoint_writes;
+CREATE POLICY agent_checkpoint_writes_service_all ON public.agent_checkpoint_writes
+    FOR ALL USING (auth.role() = 'service_role')
+    WITH CHECK (auth.role() = 'service_role');
+
+GRANT ALL ON public.agent_checkpoints TO service_role;
+GRANT ALL ON public.agent_checkpoint_writes TO service_role;
@@ -0,0 +1,217 @@
+-- KmedTour — Atomic Journey Transitions
+-- File: supabase/migrations/20261018_journey_atomic_transition.sql
+-- Used by: agents/src/core/state_machine.py (POST /rest/v1/rpc/journey_transition)
+--
+-- A transition used to be three HTTP calls (read state, write state, insert
+-- event) with no compare-and-swap, so two concurrent transitions could both
+-- be validated against the same stale state. journey_transition() does the
+-- read, validation, state write and state_change event in one transaction,
+-- holding the row lock, and reports a conflict instead of overwriting when
+-- the caller's expected state or version no longer holds.
+--
+-- patient_journey_state.version is bumped on every state change (also by
+-- writes that bypass the function), for optimistic concurrency.
+
+-- ─── Version column ──────────────────────────────────────────────────────────
+
+ALTER TABLE public.patient_journey_state
+  ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT 0;
+
+-- ─── Transition table ────────────────────────────────────────────────────────
+
+-- Same as STATE_TRANSITIONS in agents/src/core/state_machine.py
+CREATE OR REPLACE FUNCTION public.journey_allowed_transitions()
+RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT '{
+        "INQUIRY": ["SCREENING", "CANCELLED"],
+        "SCREENING": ["MATCHING", "CANCELLED"],
+        "MATCHING": ["QUOTE", "SCREENING", "CANCELLED"],
+        "QUOTE": ["BOOKING", "MATCHING", "CANCELLED"],
+        "BOOKING": ["PRE_TRAVEL", "CANCELLED"],
+        "PRE_TRAVEL": ["TREATMENT", "CANCELLED"],
+        "TREATMENT": ["POST_CARE"],
+        "POST_CARE": ["FOLLOWUP", "COMPLETED"],
+        "FOLLOWUP": ["COMPLETED"],
+        "CANCELLED": [],
+        "COMPLETED": []
+    }'::jsonb;
+$$;
+
+-- ─── Triggers ────────────────────────────────────────────────────────────────
+
+-- Forced transitions set kmedtour.force_transition for their transaction
+-- only, instead of disabling the trigger table-wide (ALTER TABLE takes an
+-- exclusive lock and leaks the disabled state to concurrent writers).
+CREATE OR REPLACE FUNCTION public.validate_journey_state_transition()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        RETURN NEW;
+    END IF;
+
+    IF OLD.state = NEW.state THEN
+        RETURN NEW;
+    END IF;
+
+    IF current_setting('kmedtour.force_transition', true) IS DISTINCT FROM 'on'
+       AND NOT (public.journey_allowed_transitions()->OLD.state::text ? NEW.state::text) THEN
+        RAISE EXCEPTION 'Invalid state transition from % to %', OLD.state, NEW.state;
+    END IF;
+
+    NEW.previous_state := OLD.state;
+    NEW.state_entered_at := now();
+    NEW.last_updated_at := now();
+    NEW.version := OLD.version + 1;
+
+    RETURN NEW;
+END;
+$$;
+
+-- journey_transition() writes a richer state_change event itself
+CREATE OR REPLACE FUNCTION public.auto_log_state_change()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF OLD.state IS DISTINCT FROM NEW.state
+       AND current_setting('kmedtour.event_logged', true) IS DISTINCT FROM 'on' THEN
+        PERFORM public.log_journey_event(
+            p_patient_id := NEW.patient_id,
+            p_event_type := 'state_change',
+            p_triggered_by := COALESCE(NEW.metadata->'last_transition'->>'triggered_by', 'system'),
+            p_event_data := jsonb_build_object(
+                'thread_id', NEW.thread_id,
+                'checkpoint_data_size', CASE WHEN NEW.checkpoint_data IS NOT NULL THEN length(NEW.checkpoint_data::text) ELSE 0 END
+            ),
+            p_from_state := OLD.state,
+            p_to_state := NEW.state
+        );
+    END IF;
+
+    RETURN NEW;
+END;
+$$;
+
+-- ─── Transition ──────────────────────────────────────────────────────────────
+
+-- Returns {"status": "ok" | "conflict" | "invalid", "from_state", "to_state",
+--          "state": the row after the call (null if the journey doesn't exist)}
+--   conflict - p_expected_state / p_expected_version (0 = no journey yet)
+--              doesn't match the current row
+--   invalid  - the transition isn't allowed from the current state, or a
+--              new journey doesn't start at INQUIRY (p_force skips both checks)
+CREATE OR REPLACE FUNCTION public.journey_transition(
+    p_patient_id uuid,
+    p_to_state journey_state,
+    p_triggered_by text DEFAULT 'system',
+    p_expected_state journey_state DEFAULT NULL,
+    p_expected_version bigint DEFAULT NULL,
+    p_force boolean DEFAULT false,
+    p_agent_id text DEFAULT NULL,
+    p_coordinator_id uuid DEFAULT NULL,
+    p_coordinator_name text DEFAULT NULL,
+    p_event_data jsonb DEFAULT '{}'
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_row public.patient_journey_state%ROWTYPE;
+    v_from journey_state;
+BEGIN
+    SELECT * INTO v_row
+    FROM public.patient_journey_state
+    WHERE patient_id = p_patient_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        IF p_expected_state IS NOT NULL OR COALESCE(p_expected_version, 0) <> 0 THEN
+            RETURN jsonb_build_object('status', 'conflict', 'from_state', NULL,
+                                      'to_state', p_to_state, 'state', NULL);
+        END IF;
+
+        IF NOT p_force AND p_to_state <> 'INQUIRY' THEN
+            RETURN jsonb_build_object('status', 'invalid', 'from_state', NULL,
+                                      'to_state', p_to_state, 'state', NULL);
+        END IF;
+
+        INSERT INTO public.patient_journey_state (
+            patient_id, state, previous_state, thread_id, current_stage, version, metadata
+        )
+        VALUES (
+            p_patient_id, p_to_state, NULL, 'thread_' || p_patient_id::text, p_to_state::text, 1,
+            jsonb_build_object('created_by', p_triggered_by, 'agent_id', p_agent_id)
+        )
+        ON CONFLICT (patient_id) DO NOTHING
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            -- Another transaction created the journey first
+            SELECT * INTO v_row FROM public.patient_journey_state WHERE patient_id = p_patient_id;
+            RETURN jsonb_build_object('status', 'conflict', 'from_state', NULL,
+                                      'to_state', p_to_state, 'state', to_jsonb(v_row));
+        END IF;
+    ELSE
+        v_from := v_row.state;
+
+        IF (p_expected_state IS NOT NULL AND p_expected_state IS DISTINCT FROM v_from)
+           OR (p_expected_version IS NOT NULL AND p_expected_version <> v_row.version) THEN
+            RETURN jsonb_build_object('status', 'conflict', 'from_state', v_from,
+                                      'to_state', p_to_state, 'state', to_jsonb(v_row));
+        END IF;
+
+        IF NOT p_force AND NOT (public.journey_allowed_transitions()->v_from::text ? p_to_state::text) THEN
+            RETURN jsonb_build_object('status', 'invalid', 'from_state', v_from,
+                                      'to_state', p_to_state, 'state', to_jsonb(v_row));
+        END IF;
+
+        PERFORM set_config('kmedtour.force_transition', CASE WHEN p_force THEN 'on' ELSE 'off' END, true);
+        PERFORM set_config('kmedtour.event_logged', 'on', true);
+
+        UPDATE public.patient_journey_state SET
+            state = p_to_state,
+            previous_state = v_from,
+            state_entered_at = now(),
+            last_updated_at = now(),
+            current_stage = p_to_state::text,  -- Legacy field
+            -- A forced same-state transition doesn't fire the trigger's bump
+            version = CASE WHEN v_from = p_to_state THEN version + 1 ELSE version END,
+            metadata = COALESCE(metadata, '{}'::jsonb) || jsonb_build_object(
+                'last_transition', jsonb_build_object(
+                    'from', v_from,
+                    'to', p_to_state,
+                    'triggered_by', p_triggered_by,
+                    'agent_id', p_agent_id,
+                    'at', now()
+                )
+            )
+        WHERE patient_id = p_patient_id
+        RETURNING * INTO v_row;
+
+        PERFORM set_config('kmedtour.force_transition', 'off', true);
+        PERFORM set_config('kmedtour.event_logged', 'off', true);
+    END IF;
+
+    INSERT INTO public.journey_events (
+        patient_id, event_type, from_state, to_state, triggered_by,
+        agent_id, coordinator_id, coordinator_name, event_data
+    )
+    VALUES (
+        p_patient_id, 'state_change', v_from, p_to_state, p_triggered_by,
+        p_agent_id, p_coordinator_id, p_coordinator_name,
+        COALESCE(p_event_data, '{}'::jsonb)
+    );
+
+    RETURN jsonb_build_object('status', 'ok', 'from_state', v_from,
+                              'to_state', p_to_state, 'state', to_jsonb(v_row));
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.journey_transition(
+    uuid, journey_state, text, journey_state, bigint, boolean, text, uuid, text, jsonb
+) TO service_role;
@@ -0,0 +1,105 @@
+-- KmedTour — Bulk Journey Transitions
+-- File: supabase/migrations/20261018_journey_bulk_transition.sql
+-- Used by: agents/src/core/state_machine.py (transition_many, POST /api/journey/bulk/transition)
+--
+-- Coordinators move dozens of patients at once (e.g. every confirmed booking
+-- to PRE_TRAVEL). journey_transition_many() applies a batch in one statement:
+-- one UPDATE of every journey whose state/version still matches and whose
+-- transition is allowed, and one INSERT of the matching state_change events.
+-- Requires 20261018_journey_atomic_transition.sql.
+
+-- p_items: [{"patient_id", "to_state", "triggered_by", "expected_state",
+--            "expected_version", "force", "agent_id", "coordinator_id",
+--            "coordinator_name", "event_data"}, ...], one item per patient.
+-- Returns one object per item: {"patient_id", "status": "ok" | "conflict" |
+-- "invalid" | "not_found", "from_state", "to_state", "state"}, as
+-- journey_transition() does for a single patient.
+CREATE OR REPLACE FUNCTION public.journey_transition_many(p_items jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_results jsonb;
+BEGIN
+    -- Rows are validated by the UPDATE's WHERE clause, against the locked row
+    PERFORM set_config('kmedtour.force_transition', 'on', true);
+    PERFORM set_config('kmedtour.event_logged', 'on', true);
+
+    WITH items AS (
+        SELECT *
+        FROM jsonb_to_recordset(p_items) AS i(
+            patient_id uuid,
+            to_state journey_state,
+            triggered_by text,
+            expected_state journey_state,
+            expected_version bigint,
+            force boolean,
+            agent_id text,
+            coordinator_id uuid,
+            coordinator_name text,
+            event_data jsonb
+        )
+    ),
+    updated AS (
+        UPDATE public.patient_journey_state s SET
+            state = i.to_state,
+            previous_state = s.state,
+            state_entered_at = now(),
+            last_updated_at = now(),
+            current_stage = i.to_state::text,  -- Legacy field
+            version = CASE WHEN s.state = i.to_state THEN s.version + 1 ELSE s.version END,
+            metadata = COALESCE(s.metadata, '{}'::jsonb) || jsonb_build_object(
+                'last_transition', jsonb_build_object(
+                    'from', s.state,
+                    'to', i.to_state,
+                    'triggered_by', COALESCE(i.triggered_by, 'system'),
+                    'agent_id', i.agent_id,
+                    'at', now()
+                )
+            )
+        FROM items i
+        WHERE s.patient_id = i.patient_id
+          AND (i.expected_state IS NULL OR s.state = i.expected_state)
+          AND (i.expected_version IS NULL OR s.version = i.expected_version)
+          AND (COALESCE(i.force, false)
+               OR public.journey_allowed_transitions()->s.state::text ? i.to_state::text)
+        RETURNING s.*
+    ),
+    events AS (
+        INSERT INTO public.journey_events (
+            patient_id, event_type, from_state, to_state, triggered_by,
+            agent_id, coordinator_id, coordinator_name, event_data
+        )
+        SELECT
+            u.patient_id, 'state_change', u.previous_state, u.state, COALESCE(i.triggered_by, 'system'),
+            i.agent_id, i.coordinator_id, i.coordinator_name, COALESCE(i.event_data, '{}'::jsonb)
+        FROM updated u
+        JOIN items i ON i.patient_id = u.patient_id
+    )
+    -- s is the statement's snapshot, i.e. the row before this UPDATE
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+        'patient_id', i.patient_id,
+        'status', CASE
+            WHEN u.patient_id IS NOT NULL THEN 'ok'
+            WHEN s.patient_id IS NULL THEN 'not_found'
+            WHEN (i.expected_state IS NOT NULL AND s.state IS DISTINCT FROM i.expected_state)
+              OR (i.expected_version IS NOT NULL AND s.version <> i.expected_version) THEN 'conflict'
+            ELSE 'invalid'
+        END,
+        'from_state', COALESCE(u.previous_state, s.state),
+        'to_state', i.to_state,
+        'state', CASE WHEN u.patient_id IS NOT NULL THEN to_jsonb(u) ELSE to_jsonb(s) END
+    )), '[]'::jsonb)
+    INTO v_results
+    FROM items i
+    LEFT JOIN updated u ON u.patient_id = i.patient_id
+    LEFT JOIN public.patient_journey_state s ON s.patient_id = i.patient_id;
+
+    PERFORM set_config('kmedtour.force_transition', 'off', true);
+    PERFORM set_config('kmedtour.event_logged', 'off', true);
+
+    RETURN v_results;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.journey_transition_many(jsonb) TO service_role;
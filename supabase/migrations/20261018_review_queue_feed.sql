@@ -0,0 +1,43 @@
+-- KmedTour — Review Queue Feed
+-- File: supabase/migrations/20261018_review_queue_feed.sql
+-- Used by: agents/app/admin/review_queue.py (get_reviews, review_counts)
+--
+-- The review feed pages by keyset (created_at, id), newest first, filtered
+-- by status, query_type and violation type/severity (jsonb containment on
+-- violations). Dashboards poll per-status and per-type counts, which come
+-- from one function call instead of a count query per bucket.
+
+-- ─── Indexes ─────────────────────────────────────────────────────────────────
+
+-- Keyset pages within a status: WHERE status = ? AND (created_at, id) < (?, ?)
+CREATE INDEX IF NOT EXISTS idx_review_queue_status_created_id
+  ON public.review_queue (status, created_at DESC, id DESC);
+
+-- violations=cs.[{"type": ..., "severity": ...}]
+CREATE INDEX IF NOT EXISTS idx_review_queue_violations
+  ON public.review_queue USING gin (violations jsonb_path_ops);
+
+-- ─── Counts ──────────────────────────────────────────────────────────────────
+
+-- One row per status (violation_type NULL) with its entries and summed
+-- occurrences, plus one row per (status, violation type) with the entries
+-- having at least one violation of that type.
+CREATE OR REPLACE FUNCTION public.review_queue_counts()
+RETURNS TABLE (status text, violation_type text, entries bigint, occurrences bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT rq.status, NULL::text, count(*), sum(rq.occurrence_count)
+    FROM public.review_queue rq
+    GROUP BY rq.status
+    UNION ALL
+    SELECT rq.status, t.violation_type, count(*), sum(rq.occurrence_count)
+    FROM public.review_queue rq
+    CROSS JOIN LATERAL (
+        SELECT DISTINCT v->>'type' AS violation_type
+        FROM jsonb_array_elements(rq.violations) v
+    ) t
+    GROUP BY rq.status, t.violation_type;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.review_queue_counts() TO service_role;
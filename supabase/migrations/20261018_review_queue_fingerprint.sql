@@ -0,0 +1,114 @@
+-- KmedTour — Review Queue Fingerprint Dedup
+-- File: supabase/migrations/20261018_review_queue_fingerprint.sql
+-- Used by: agents/app/admin/review_queue.py (POST /rest/v1/rpc/ingest_review_queue)
+--
+-- When the LLM regresses, the same flagged phrasing comes back thousands of
+-- times. Each flagged response carries a fingerprint of its normalized text,
+-- violation types and query_type; a duplicate of a pending entry seen within
+-- the dedup window bumps occurrence_count and adds to the sample list of that
+-- entry instead of becoming a new row.
+
+-- ─── Columns ─────────────────────────────────────────────────────────────────
+
+ALTER TABLE public.review_queue
+  ADD COLUMN IF NOT EXISTS fingerprint      text,
+  ADD COLUMN IF NOT EXISTS occurrence_count integer     NOT NULL DEFAULT 1,
+  ADD COLUMN IF NOT EXISTS samples          jsonb       NOT NULL DEFAULT '[]',
+  ADD COLUMN IF NOT EXISTS last_seen_at     timestamptz NOT NULL DEFAULT now();
+
+-- Lookup of the open entry for a fingerprint
+CREATE INDEX IF NOT EXISTS idx_review_queue_fingerprint_pending
+  ON public.review_queue (fingerprint, last_seen_at DESC)
+  WHERE status = 'pending';
+
+-- ─── Ingest ──────────────────────────────────────────────────────────────────
+
+-- Inserts a batch of review_queue entries (JSON objects with the table's
+-- columns), merging each into the newest pending entry with the same
+-- fingerprint seen in the last p_window_seconds.
+--
+-- Replays are idempotent: an entry whose id already exists as a row, or as
+-- a sample of the entry it would merge into, is skipped. (An entry merged
+-- after the sample list is full can't be recognised and is counted again.)
+--
+-- Keys missing from an entry get the column defaults, so entries spooled
+-- before this migration (no fingerprint, occurrence_count, samples or
+-- last_seen_at) are inserted as single occurrences instead of failing the
+-- NOT NULL constraints on every replay.
+CREATE OR REPLACE FUNCTION public.ingest_review_queue(
+    p_entries jsonb,
+    p_window_seconds integer DEFAULT 3600,
+    p_max_samples integer DEFAULT 20
+)
+RETURNS TABLE (inserted integer, merged integer)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_entry jsonb;
+    v_target public.review_queue%ROWTYPE;
+    v_row public.review_queue%ROWTYPE;
+    v_inserted integer := 0;
+    v_merged integer := 0;
+BEGIN
+    FOR v_entry IN SELECT * FROM jsonb_array_elements(p_entries)
+    LOOP
+        IF EXISTS (SELECT 1 FROM public.review_queue WHERE id = (v_entry->>'id')::uuid) THEN
+            CONTINUE;
+        END IF;
+
+        IF v_entry->>'fingerprint' IS NOT NULL THEN
+            -- Serialise writers (several uvicorn workers) per fingerprint
+            PERFORM pg_advisory_xact_lock(hashtext('review_queue:' || (v_entry->>'fingerprint')));
+
+            SELECT * INTO v_target
+            FROM public.review_queue
+            WHERE fingerprint = v_entry->>'fingerprint'
+              AND status = 'pending'
+              AND last_seen_at >= now() - make_interval(secs => p_window_seconds)
+            ORDER BY last_seen_at DESC
+            LIMIT 1
+            FOR UPDATE;
+
+            IF FOUND THEN
+                IF v_target.samples @> jsonb_build_array(jsonb_build_object('id', v_entry->>'id')) THEN
+                    CONTINUE;
+                END IF;
+
+                UPDATE public.review_queue SET
+                    occurrence_count = occurrence_count + COALESCE((v_entry->>'occurrence_count')::integer, 1),
+                    last_seen_at = greatest(last_seen_at, COALESCE((v_entry->>'last_seen_at')::timestamptz, now())),
+                    samples = CASE
+                        WHEN jsonb_array_length(samples) >= p_max_samples THEN samples
+                        ELSE (
+                            SELECT COALESCE(jsonb_agg(s ORDER BY n), '[]')
+                            FROM jsonb_array_elements(samples || COALESCE(v_entry->'samples', '[]')) WITH ORDINALITY AS t(s, n)
+                            WHERE n <= p_max_samples
+                        )
+                    END
+                WHERE id = v_target.id;
+                v_merged := v_merged + 1;
+                CONTINUE;
+            END IF;
+        END IF;
+
+        -- jsonb_populate_record leaves missing keys NULL, not at their defaults
+        v_row := jsonb_populate_record(NULL::public.review_queue, v_entry);
+        v_row.id               := COALESCE(v_row.id, gen_random_uuid());
+        v_row.status           := COALESCE(v_row.status, 'pending');
+        v_row.violations       := COALESCE(v_row.violations, '[]');
+        v_row.created_at       := COALESCE(v_row.created_at, now());
+        v_row.occurrence_count := COALESCE(v_row.occurrence_count, 1);
+        v_row.samples          := COALESCE(v_row.samples, '[]');
+        v_row.last_seen_at     := COALESCE(v_row.last_seen_at, v_row.created_at);
+
+        INSERT INTO public.review_queue
+        SELECT (v_row).*
+        ON CONFLICT (id) DO NOTHING;
+        v_inserted := v_inserted + 1;
+    END LOOP;
+
+    RETURN QUERY SELECT v_inserted, v_merged;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.ingest_review_queue(jsonb, integer, integer) TO service_role;
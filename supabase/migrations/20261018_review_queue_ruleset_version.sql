@@ -0,0 +1,13 @@
+-- KmedTour — Safety Ruleset Version on Review Queue Entries
+-- File: supabase/migrations/20261018_review_queue_ruleset_version.sql
+-- Used by: agents/app/admin/review_queue.py
+--
+-- MedicalSafetyLayer rule packs are versioned and hot-reloaded
+-- (agents/app/core/safety_rules.json). Every flagged response records the
+-- version of the ruleset that produced its verdict, for audit.
+
+ALTER TABLE public.review_queue
+  ADD COLUMN IF NOT EXISTS ruleset_version text;
+
+CREATE INDEX IF NOT EXISTS idx_review_queue_ruleset_version
+  ON public.review_queue(ruleset_version);